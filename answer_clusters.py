@@ -0,0 +1,160 @@
+"""
+Groups identical and near-identical student answers so each group is graded once.
+
+Answers are canonicalized (case folded, whitespace collapsed, and punctuation dropped
+except for what can change an answer's meaning: signs, operators and decimal points)
+and exact duplicates are found by hashing the canonical text. Near-duplicates are found
+with MinHash signatures over character shingles, bucketed by LSH bands; every LSH
+candidate is then checked with the exact Jaccard similarity of the two shingle sets,
+so only pairs at or above the threshold are merged. Answers whose numbers differ are
+never merged, however similar the rest of their text is ("v = 12 m/s" vs "v = 72 m/s").
+
+AnswerClusterer works incrementally, as rows stream in: the first answer of a cluster
+becomes its representative and later answers are compared against representatives.
+"""
+
+import hashlib
+import random
+import re
+import string
+import threading
+import zlib
+
+DEFAULT_DEDUPE_THRESHOLD = 0.9
+DEFAULT_SHINGLE_SIZE = 4
+DEFAULT_NUM_PERM = 32
+DEFAULT_BANDS = 8
+
+_MERSENNE_PRIME = (1 << 61) - 1
+# Operators are kept everywhere ("a/b" is not "ab"); "." and "," only where they start or
+# continue a number ("1.5", ".5", "1,000"), so sentence punctuation still drops out.
+_OPERATORS = "+-*/=^<>%"
+_DROPPED_PUNCTUATION = "".join(char for char in string.punctuation if char not in _OPERATORS + ".,")
+_PUNCTUATION_RE = re.compile(f"[{re.escape(_DROPPED_PUNCTUATION)}]")
+_STRAY_SEPARATOR_RE = re.compile(r"[.,](?!\d)")
+_WORD_HYPHEN_RE = re.compile(r"(?<=[^\W\d_])-(?=[^\W\d_])")
+_OPERATOR_SPACING_RE = re.compile(f"\\s*([{re.escape(_OPERATORS)}])\\s*")
+_WHITESPACE_RE = re.compile(r"\s+")
+_NUMBER_RE = re.compile(r"[-+]?(?:\d+(?:[.,]\d+)*|[.,]\d+)")
+
+
+def canonical_answer(student_answer):
+    """
+    Lowercases, drops punctuation that cannot change the meaning, splits hyphenated words
+    and collapses whitespace, also around operators ("Speed = d/t!" -> "speed=d/t",
+    "The answer is -5." -> "the answer is-5").
+    """
+    text = _PUNCTUATION_RE.sub("", student_answer.casefold())
+    text = _STRAY_SEPARATOR_RE.sub("", text)
+    text = _WORD_HYPHEN_RE.sub(" ", text)
+    text = _WHITESPACE_RE.sub(" ", text)
+    return _OPERATOR_SPACING_RE.sub(r"\1", text).strip()
+
+
+def numeric_tokens(text):
+    """The signed numbers in a canonical answer, in order ("x=-1.5 or 2" -> ("-1.5", "2"))."""
+    return tuple(_NUMBER_RE.findall(text))
+
+
+def shingles(text, size=DEFAULT_SHINGLE_SIZE):
+    """Set of overlapping character substrings of length size; short texts are one shingle."""
+    if len(text) <= size:
+        return {text}
+    return {text[start:start + size] for start in range(len(text) - size + 1)}
+
+
+def jaccard(a, b):
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """MinHash signatures of shingle sets, using num_perm seeded universal hash functions."""
+
+    def __init__(self, num_perm=DEFAULT_NUM_PERM, seed=1):
+        rng = random.Random(seed)
+        self.params = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(_MERSENNE_PRIME)) for _ in range(num_perm)]
+
+    def signature(self, shingle_set):
+        hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in shingle_set]
+        return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in self.params)
+
+
+class AnswerClusterer:
+    """
+    Thread-safe, incremental clustering of answers by canonical text and shingled Jaccard
+    similarity. assign(key, answer) returns the key of the cluster representative the
+    answer belongs to (its own key when it starts a new cluster).
+
+    threshold=1.0 only groups answers whose canonical text is identical. Lower thresholds
+    also merge answers whose shingle sets have Jaccard similarity >= threshold with a
+    representative and that contain the same numbers in the same order; num_perm and bands
+    tune the LSH index (num_perm must divide evenly).
+    Memory grows with the number of distinct answers, not the number of rows.
+    """
+
+    def __init__(self, threshold=DEFAULT_DEDUPE_THRESHOLD, shingle_size=DEFAULT_SHINGLE_SIZE,
+                 num_perm=DEFAULT_NUM_PERM, bands=DEFAULT_BANDS):
+        if not 0 < threshold <= 1:
+            raise ValueError(f"threshold must be in (0, 1], got {threshold}")
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.rows_per_band = num_perm // bands
+        self.hasher = MinHasher(num_perm)
+        self.answers_seen = 0
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+        self._by_digest = {}  # Canonical-text digest -> representative key.
+        self._representatives = {}  # Representative key -> (shingle set, numeric tokens).
+        self._buckets = {}  # (band, band signature) -> representative keys.
+        self._lock = threading.Lock()
+
+    def assign(self, key, student_answer):
+        text = canonical_answer(student_answer)
+        digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        with self._lock:
+            self.answers_seen += 1
+            representative = self._by_digest.get(digest)
+            if representative is not None:
+                self.exact_duplicates += 1
+                return representative
+            if self.threshold >= 1:
+                self._by_digest[digest] = key
+                return key
+
+        numbers = numeric_tokens(text)
+        shingle_set = shingles(text, self.shingle_size)
+        signature = self.hasher.signature(shingle_set)
+        step = self.rows_per_band
+        bands = [(band, signature[band * step:(band + 1) * step]) for band in range(len(signature) // step)]
+        with self._lock:
+            checked = set()
+            for band in bands:
+                for candidate in self._buckets.get(band, ()):
+                    if candidate in checked:
+                        continue
+                    checked.add(candidate)
+                    candidate_shingles, candidate_numbers = self._representatives[candidate]
+                    if candidate_numbers == numbers and jaccard(shingle_set, candidate_shingles) >= self.threshold:
+                        self.near_duplicates += 1
+                        # Later copies of this exact text skip the similarity search.
+                        self._by_digest[digest] = candidate
+                        return candidate
+            self._by_digest[digest] = key
+            self._representatives[key] = (shingle_set, numbers)
+            for band in bands:
+                self._buckets.setdefault(band, []).append(key)
+            return key
+
+    @property
+    def duplicates(self):
+        return self.exact_duplicates + self.near_duplicates
+
+    def summary(self, batch_size=1):
+        saved = -(-self.duplicates // max(1, batch_size))
+        return (f"Deduplication: {self.answers_seen} answers in {self.answers_seen - self.duplicates} clusters "
+                f"({self.exact_duplicates} exact and {self.near_duplicates} near duplicates graded by fan-out); "
+                f"saved about {saved} API requests.")
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Grades many spreadsheets / assignments in one run.
+
+The manifest is a JSON file listing the assignments to grade, with optional defaults
+applied to every entry:
+
+    {
+      "defaults": {"answers_sheet": "sampel answers", "rubric_sheet": "sample rubric",
+                   "prompt_sheet": "Prompt", "incremental": true},
+      "assignments": [
+        {"name": "Period 1 lab", "spreadsheet": "Sample Responses"},
+        {"name": "Period 2 lab", "spreadsheet": "Period 2 Responses", "batch_size": 5},
+        {"name": "Essay", "spreadsheet": "Essay Responses", "models": ["gpt-4o-mini", "gpt-4-0613"],
+         "min_confidence": 0.8, "score_boundaries": [60, 70, 80, 90], "boundary_margin": 2}
+      ]
+    }
+
+"models" turns on the model cascade (see grading.ModelCascade) for that assignment; its
+thresholds fall back to the command-line options when not set.
+
+Google is authorized once and one GradingSession (gspread client plus pooled OpenAI
+connections) is shared. Assignments are graded in parallel,
+all drawing on one global requests/tokens-per-minute budget and one grade cache, and a
+per-assignment summary is printed at the end:
+
+    python3 batch_grade.py manifest.json --parallel-assignments 3 --requests-per-minute 300
+"""
+
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from grading import (
+    ProgressTracker, add_run_arguments, build_cascade, caller_from_args, creds_json_path, grade_cache_from_args,
+    metadata_cache_from_args, process_student_answers, rate_limiter_from_args, session_from_args,
+    throttled_progress_printer,
+)
+from metrics import open_metrics_sink
+
+DEFAULT_PARALLEL_ASSIGNMENTS = 2
+
+
+@dataclass(frozen=True)
+class Assignment:
+    """One manifest entry: which spreadsheet and worksheets to grade, and how."""
+    name: str
+    spreadsheet: str
+    answers_sheet: str = "sampel answers"
+    rubric_sheet: str = "sample rubric"
+    prompt_sheet: str = "Prompt"
+    rubric_range: str = "A1:E8"
+    incremental: object = None
+    batch_size: object = None
+    concurrency: object = None
+    models: object = None
+    min_confidence: object = None
+    score_boundaries: object = None
+    boundary_margin: object = None
+
+
+_ASSIGNMENT_FIELDS = set(Assignment.__dataclass_fields__)
+
+
+def parse_manifest(manifest):
+    """
+    Builds Assignments from a parsed manifest: either {"defaults": {...}, "assignments": [...]}
+    or a bare list of assignments. Entries without a name are named after their spreadsheet.
+    Unset incremental, batch_size, concurrency and cascade settings fall back to the
+    command-line options.
+    """
+    if isinstance(manifest, list):
+        manifest = {"assignments": manifest}
+    defaults = manifest.get("defaults", {})
+    entries = manifest.get("assignments")
+    if not entries:
+        raise ValueError("The manifest lists no assignments.")
+
+    assignments = []
+    for position, entry in enumerate(entries, start=1):
+        fields = dict(defaults, **entry)
+        unknown = set(fields) - _ASSIGNMENT_FIELDS
+        if unknown:
+            raise ValueError(f"Assignment {position} has unknown keys: {', '.join(sorted(unknown))}.")
+        if not fields.get("spreadsheet"):
+            raise ValueError(f"Assignment {position} does not name a spreadsheet.")
+        fields.setdefault("name", fields["spreadsheet"])
+        assignments.append(Assignment(**fields))
+
+    names = [assignment.name for assignment in assignments]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Assignment names must be unique; repeated: {', '.join(duplicates)}.")
+    return assignments
+
+
+def load_manifest(path):
+    with open(path, "r") as manifest_file:
+        return parse_manifest(json.load(manifest_file))
+
+
+@dataclass(frozen=True)
+class AssignmentResult:
+    """An assignment's GradingSummary, or the error that stopped it."""
+    assignment: Assignment
+    summary: object = None
+    error: object = None
+    elapsed_seconds: float = 0.0
+
+
+def cascade_for(assignment, args):
+    """The assignment's model cascade, with unset settings taken from the command line."""
+    def setting(name):
+        value = getattr(assignment, name)
+        return getattr(args, name) if value is None else value
+
+    return build_cascade(setting("models"), setting("min_confidence"), setting("score_boundaries"),
+                         setting("boundary_margin"))
+
+
+def run_assignment(session, assignment, args, rate_limiter, cache, metadata_cache, metrics_sink=None):
+    """Grades one assignment and returns its AssignmentResult; errors are captured, not raised."""
+    started = time.monotonic()
+    print(f"[{assignment.name}] Grading {assignment.answers_sheet!r} in {assignment.spreadsheet!r}...")
+    try:
+        spreadsheet = session.open_spreadsheet(assignment.spreadsheet, metadata_cache)
+        summary = process_student_answers(
+            spreadsheet,
+            answers_sheet_name=assignment.answers_sheet,
+            rubric_sheet_name=assignment.rubric_sheet,
+            prompt_sheet_name=assignment.prompt_sheet,
+            rubric_range=assignment.rubric_range,
+            max_workers=assignment.concurrency or args.concurrency,
+            rate_limiter=rate_limiter,
+            flush_every=args.flush_every,
+            flush_interval=args.flush_interval,
+            cache=cache,
+            incremental=args.incremental if assignment.incremental is None else assignment.incremental,
+            regrade_unfingerprinted=args.regrade_unfingerprinted,
+            batch_size=assignment.batch_size or args.batch_size,
+            caller=caller_from_args(args),
+            metadata_cache=metadata_cache,
+            page_size=args.page_size or None,
+            progress=ProgressTracker(throttled_progress_printer(label=assignment.name)),
+            quiet=args.quiet,
+            metrics_sink=metrics_sink,
+            dedupe_threshold=args.dedupe_threshold,
+            cascade=cascade_for(assignment, args),
+            session=session,
+        )
+    except Exception as e:
+        print(f"[{assignment.name}] Failed: {e}")
+        return AssignmentResult(assignment, error=e, elapsed_seconds=time.monotonic() - started)
+    return AssignmentResult(assignment, summary=summary, elapsed_seconds=time.monotonic() - started)
+
+
+def run_batch(session, assignments, args, rate_limiter=None, cache=None, metadata_cache=None,
+              parallel_assignments=DEFAULT_PARALLEL_ASSIGNMENTS, metrics_sink=None):
+    """
+    Grades assignments with up to parallel_assignments running at once, sharing the session,
+    rate limiter, grade cache, metadata cache and metrics sink. Returns AssignmentResults in
+    manifest order.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, parallel_assignments)) as executor:
+        futures = [
+            executor.submit(run_assignment, session, assignment, args, rate_limiter, cache, metadata_cache,
+                            metrics_sink)
+            for assignment in assignments
+        ]
+        return [future.result() for future in futures]
+
+
+def format_summary(results):
+    """Renders one line per assignment plus a total line."""
+    name_width = max([len("Assignment")] + [len(result.assignment.name) for result in results])
+    lines = [f"{'Assignment':<{name_width}}  {'Graded':>7}  {'Cached':>7}  {'Failed':>7}  {'Elapsed':>8}  Status"]
+    totals = [0, 0, 0]
+    for result in results:
+        summary = result.summary
+        if summary is None:
+            counts = ["-", "-", "-"]
+            status = f"error: {result.error}"
+        else:
+            counts = [summary.rows_graded, summary.cache_hits, summary.rows_failed]
+            totals = [total + count for total, count in zip(totals, counts)]
+            status = "ok" if not summary.rows_failed else "rows left ungraded"
+        lines.append(f"{result.assignment.name:<{name_width}}  {counts[0]:>7}  {counts[1]:>7}  {counts[2]:>7}  "
+                     f"{result.elapsed_seconds:>7.1f}s  {status}")
+    lines.append(f"{'Total':<{name_width}}  {totals[0]:>7}  {totals[1]:>7}  {totals[2]:>7}")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Grade every assignment listed in a manifest.")
+    parser.add_argument("manifest", help="JSON file listing the spreadsheets/assignments to grade.")
+    parser.add_argument("--parallel-assignments", type=int, default=DEFAULT_PARALLEL_ASSIGNMENTS,
+                        help="Assignments graded at the same time; --concurrency applies to each one.")
+    parser.add_argument("--creds", default=creds_json_path,
+                        help="Google service account credentials file.")
+    add_run_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    assignments = load_manifest(args.manifest)
+    session = session_from_args(args, args.creds, args.concurrency * max(1, args.parallel_assignments))
+    # One budget for the whole run, however many assignments are in flight.
+    rate_limiter = rate_limiter_from_args(args)
+    cache = grade_cache_from_args(args)
+    metadata_cache = metadata_cache_from_args(args)
+
+    print(f"Grading {len(assignments)} assignments, {args.parallel_assignments} at a time...")
+    try:
+        results = run_batch(session, assignments, args, rate_limiter, cache, metadata_cache,
+                            parallel_assignments=args.parallel_assignments,
+                            metrics_sink=open_metrics_sink(args.metrics_file))
+    finally:
+        metadata_cache.save()
+        if cache is not None:
+            cache.close()
+        session.close()
+    print(format_summary(results))
+    if any(result.error is not None for result in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
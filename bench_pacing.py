@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark for pacing.build_pacing against the original row-by-row implementation.
+
+Builds full-year M/W/F schedules and plans with mixed lesson durations for many
+sections, checks both implementations produce identical pacing, and reports the
+time each takes:
+
+    python3 bench_pacing.py --sections 300 --weeks 40
+
+It also replays a series of single-lesson duration edits on one section, comparing
+PacingIndex.set_duration with rebuilding the whole pacing after every edit.
+"""
+
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+from pacing import PacingIndex, build_pacing, empty_pacing, meeting_days
+
+
+def reference_build_pacing(schedule: pd.DataFrame, plan: pd.DataFrame) -> pd.DataFrame:
+    """The original iterrows() pacing loop, kept as the correctness and speed baseline."""
+    if schedule is None or plan is None or schedule.empty or plan.empty:
+        return empty_pacing()
+
+    meetings = meeting_days(schedule)
+    pacing_rows = []
+
+    plan_iterator = iter(plan.itertuples(index=False))
+    current_lesson = next(plan_iterator, None)
+    day_in_lesson = 1
+
+    for _, meeting in meetings.iterrows():
+        if current_lesson is None:
+            break
+
+        pacing_rows.append({
+            "date": meeting["date"],
+            "block_id": meeting["block_id"],
+            "lesson_id": current_lesson.lesson_id,
+            "title": current_lesson.title,
+            "type": current_lesson.type,
+            "day_index": day_in_lesson,
+            "duration_days": int(current_lesson.duration_days),
+        })
+
+        if day_in_lesson >= int(current_lesson.duration_days):
+            current_lesson = next(plan_iterator, None)
+            day_in_lesson = 1
+        else:
+            day_in_lesson += 1
+
+    return pd.DataFrame(pacing_rows) if pacing_rows else empty_pacing()
+
+
+def make_schedule(start: date, weeks: int) -> pd.DataFrame:
+    """Daily calendar rows with a block on Mondays, Wednesdays and Fridays, like the mock schedule."""
+    days = [start + timedelta(days=offset) for offset in range(7 * weeks)]
+    return pd.DataFrame({
+        "date": days,
+        "block_id": ["B2" if day.weekday() in (0, 2, 4) else None for day in days],
+        "start": "10:20",
+        "end": "11:05",
+    })
+
+
+def make_plan(num_lessons: int, rng: random.Random) -> pd.DataFrame:
+    return pd.DataFrame({
+        "order": range(1, num_lessons + 1),
+        "lesson_id": [f"L{n:04d}" for n in range(1, num_lessons + 1)],
+        "title": [f"Lesson {n}" for n in range(1, num_lessons + 1)],
+        "type": [rng.choice(["Lesson", "Lab", "Quiz"]) for _ in range(num_lessons)],
+        "unit": [1 + n // 8 for n in range(num_lessons)],
+        "lesson_no": [1 + n % 8 for n in range(num_lessons)],
+        "duration_days": [rng.choice([1, 1, 1, 2, 2, 3]) for _ in range(num_lessons)],
+    })
+
+
+def time_sections(build, sections):
+    started = time.perf_counter()
+    results = [build(schedule, plan) for schedule, plan in sections]
+    return time.perf_counter() - started, results
+
+
+def bench_duration_edits(schedule, plan, edits, rng):
+    """Times `edits` random duration changes applied incrementally and by full rebuilds."""
+    changes = [(rng.randrange(len(plan)), rng.choice([1, 2, 3, 4])) for _ in range(edits)]
+
+    started = time.perf_counter()
+    index = PacingIndex(schedule, plan)
+    for lesson_pos, duration in changes:
+        index.set_duration(lesson_pos, duration)
+    incremental_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    rebuilt_plan = plan.copy()
+    for lesson_pos, duration in changes:
+        rebuilt_plan = rebuilt_plan.copy()
+        rebuilt_plan.iloc[lesson_pos, rebuilt_plan.columns.get_loc("duration_days")] = duration
+        rebuilt = build_pacing(schedule, rebuilt_plan)
+    full_seconds = time.perf_counter() - started
+
+    pd.testing.assert_frame_equal(index.pacing, rebuilt)
+    pd.testing.assert_frame_equal(index.pacing, reference_build_pacing(schedule, index.plan))
+    return incremental_seconds, full_seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark vectorized pacing against the iterrows() loop.")
+    parser.add_argument("--sections", type=int, default=300)
+    parser.add_argument("--weeks", type=int, default=40, help="Length of each section's schedule.")
+    parser.add_argument("--lessons", type=int, default=90, help="Lessons in each section's plan.")
+    parser.add_argument("--edits", type=int, default=200, help="Single-lesson duration edits to replay.")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    schedule = make_schedule(date(2025, 8, 25), args.weeks)
+    sections = [(schedule.copy(), make_plan(args.lessons, rng)) for _ in range(args.sections)]
+
+    reference_seconds, expected = time_sections(reference_build_pacing, sections)
+    vectorized_seconds, actual = time_sections(build_pacing, sections)
+    for want, got in zip(expected, actual):
+        pd.testing.assert_frame_equal(got, want)
+
+    pacing_rows = sum(len(pacing) for pacing in actual)
+    print(f"{args.sections} sections, {args.weeks}-week schedules, {pacing_rows} pacing rows in total.")
+    print(f"  iterrows loop: {reference_seconds:.3f}s ({reference_seconds / args.sections * 1000:.2f} ms/section)")
+    print(f"  vectorized:    {vectorized_seconds:.3f}s ({vectorized_seconds / args.sections * 1000:.2f} ms/section)")
+    print(f"  speedup:       {reference_seconds / vectorized_seconds:.1f}x; outputs identical.")
+
+    if args.edits:
+        incremental_seconds, full_seconds = bench_duration_edits(schedule, sections[0][1], args.edits, rng)
+        print(f"{args.edits} single-lesson duration edits on one section:")
+        print(f"  full rebuild each time: {full_seconds / args.edits * 1000:.2f} ms/edit")
+        print(f"  incremental update:     {incremental_seconds / args.edits * 1000:.2f} ms/edit; outputs identical.")
+
+
+if __name__ == "__main__":
+    main()
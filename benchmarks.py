@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the grading and pacing hot paths.
+
+Every benchmark runs against synthetic data of configurable size: grading uses an
+InMemorySpreadsheet (fake_sheets.py) and the local fake chat-completions server
+(fake_openai_server.py) with injectable latency, and pacing uses generated
+full-year schedules and plans (bench_pacing.py). Results are printed as JSON so
+runs can be saved and compared across commits:
+
+    python3 benchmarks.py --rows 500 --latency 0.05 --output before.json
+    python3 benchmarks.py --only rebuild_pacing,student_view
+
+Each benchmark reports its iteration count, throughput, p50/p95 latency per
+iteration and the peak memory traced during one extra, separately measured iteration.
+
+The pacing benchmarks call the functions the Streamlit app delegates to
+(rebuild_pacing_for_section -> pacing.PacingIndex, seed_plan_from_content ->
+pacing.seed_plan, student_view -> pacing.PacingStore), so no Streamlit runtime is needed.
+The grading benchmark sends its requests to the fake server through its own
+GradingSession, so no OpenAI key file is needed.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+from bench_pacing import make_plan, make_schedule
+from fake_openai_server import FakeChatCompletionsServer
+from fake_sheets import InMemorySpreadsheet, InMemoryWorksheet
+from pacing import PacingIndex, PacingStore, plan_from_content, prepare_content, seed_plan
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a non-empty list of samples."""
+    ordered = sorted(samples)
+    rank = max(1, round(fraction * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def measure(name, run, iterations, units_per_iteration=1, unit="ops", setup=None):
+    """
+    Calls run(state) `iterations` times and summarizes the timings; setup() builds a fresh
+    state for each call when given. Peak memory comes from one more traced call so that
+    tracing does not slow the timed ones.
+    """
+    timings = []
+    for _ in range(iterations):
+        state = setup() if setup else None
+        started = time.perf_counter()
+        run(state)
+        timings.append(time.perf_counter() - started)
+
+    state = setup() if setup else None
+    tracemalloc.start()
+    try:
+        run(state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    total = sum(timings)
+    return {
+        "name": name,
+        "iterations": iterations,
+        "unit": unit,
+        "throughput_per_second": units_per_iteration * iterations / total if total else None,
+        "p50_ms": percentile(timings, 0.50) * 1000,
+        "p95_ms": percentile(timings, 0.95) * 1000,
+        "mean_ms": statistics.mean(timings) * 1000,
+        "peak_memory_bytes": peak,
+    }
+
+
+# --- Synthetic grading data ---
+def make_rubric_rows(criteria=4):
+    rows = [["Criterion", "Points", "Description"]]
+    for n in range(1, criteria + 1):
+        rows.append([f"Criterion {n}", "3", f"What a full-credit answer shows for criterion {n}."])
+    return rows
+
+
+def make_answer_sheet(rows, distinct_answers=None, seed=7):
+    """Builds an in-memory spreadsheet with `rows` answers (drawn from distinct_answers texts if set)."""
+    rng = random.Random(seed)
+    pool = distinct_answers or rows
+    answers = [["Name", "Answer"]]
+    for n in range(rows):
+        answer_id = rng.randrange(pool)
+        answers.append([f"Student {n}", f"Answer {answer_id}: velocity is displacement over time, "
+                                        f"measured in metres per second, example {answer_id}."])
+    return InMemorySpreadsheet({
+        "sampel answers": answers,
+        "sample rubric": make_rubric_rows(),
+        "Prompt": [["prompt"], ["Grade the student's explanation of velocity."]],
+    })
+
+
+# --- Benchmarks ---
+def bench_process_student_answers(args):
+    import grading
+
+    with FakeChatCompletionsServer(latency=args.latency) as server, \
+            grading.GradingSession(api_key="benchmark", base_url=server.base_url) as session:
+        def run(spreadsheet):
+            with contextlib.redirect_stdout(io.StringIO()):
+                grading.process_student_answers(
+                    spreadsheet, max_workers=args.concurrency, batch_size=args.batch_size,
+                    page_size=args.page_size or None, quiet=True, session=session,
+                )
+
+        result = measure("process_student_answers", run, args.grading_repeat, args.rows, "rows",
+                         setup=lambda: make_answer_sheet(args.rows))
+        # The traced run also hits the server.
+        result["api_requests_per_run"] = server.request_count / (args.grading_repeat + 1)
+    result["params"] = {"rows": args.rows, "latency_s": args.latency, "concurrency": args.concurrency,
+                        "batch_size": args.batch_size, "page_size": args.page_size}
+    return result
+
+
+def bench_get_rubric_text(args):
+    import grading
+
+    worksheet = InMemoryWorksheet("sample rubric", make_rubric_rows(args.rubric_criteria))
+    cell_range = f"A1:C{args.rubric_criteria + 1}"
+    result = measure("get_rubric_text", lambda _: grading.get_rubric_text(worksheet, cell_range), args.repeat)
+    result["params"] = {"criteria": args.rubric_criteria}
+    return result
+
+
+def make_sections(args):
+    rng = random.Random(args.seed)
+    schedule = make_schedule(date(2025, 8, 25), args.weeks)
+    return [(schedule.copy(), make_plan(args.lessons, rng)) for _ in range(args.sections)]
+
+
+def bench_rebuild_pacing(args):
+    sections = make_sections(args)
+
+    def run(_):
+        for schedule, plan in sections:
+            PacingIndex(schedule, plan)
+
+    result = measure("rebuild_pacing_for_section", run, args.repeat, len(sections), "sections")
+    result["params"] = {"sections": args.sections, "weeks": args.weeks, "lessons": args.lessons}
+    return result
+
+
+def bench_seed_plan(args):
+    rng = random.Random(args.seed)
+    content = prepare_content(make_plan(args.catalog, rng))
+    # Each section's plan is missing about a tenth of the catalog.
+    plans = [plan_from_content(content.sample(frac=0.9, random_state=n).sort_index()) for n in range(args.sections)]
+
+    def run(_):
+        for plan in plans:
+            seed_plan(content, plan)
+
+    result = measure("seed_plan_from_content", run, args.repeat, len(plans), "sections")
+    result["params"] = {"sections": args.sections, "catalog_lessons": args.catalog}
+    return result
+
+
+def bench_student_view(args):
+    schedule, plan = make_sections(args)[0]
+    store = PacingStore(PacingIndex(schedule, plan).pacing)
+    first, last = store.dates[0], store.dates[-1]
+    weeks = [first + timedelta(days=7 * n) for n in range((last - first).days // 7 + 1)]
+
+    def run(_):
+        for start in weeks:
+            store.by_date(start, start + timedelta(days=6))
+
+    result = measure("student_view_week_filter", run, args.repeat, len(weeks), "weeks")
+    result["params"] = {"weeks": len(weeks), "lessons": args.lessons}
+    return result
+
+
+BENCHMARKS = {
+    "process_student_answers": bench_process_student_answers,
+    "get_rubric_text": bench_get_rubric_text,
+    "rebuild_pacing": bench_rebuild_pacing,
+    "seed_plan": bench_seed_plan,
+    "student_view": bench_student_view,
+}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark grading and pacing hot paths; prints JSON.")
+    parser.add_argument("--only", default=None,
+                        help=f"Comma-separated subset of: {', '.join(BENCHMARKS)}.")
+    parser.add_argument("--repeat", type=int, default=20, help="Iterations for the fast benchmarks.")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default=None, help="Also write the JSON report to this file.")
+    grading_group = parser.add_argument_group("grading")
+    grading_group.add_argument("--rows", type=int, default=200, help="Answer rows per synthetic sheet.")
+    grading_group.add_argument("--latency", type=float, default=0.02, help="Fake API latency per request (s).")
+    grading_group.add_argument("--concurrency", type=int, default=8)
+    grading_group.add_argument("--batch-size", type=int, default=1)
+    grading_group.add_argument("--page-size", type=int, default=500)
+    grading_group.add_argument("--grading-repeat", type=int, default=3, help="Full grading runs to time.")
+    grading_group.add_argument("--rubric-criteria", type=int, default=8)
+    pacing_group = parser.add_argument_group("pacing")
+    pacing_group.add_argument("--sections", type=int, default=100)
+    pacing_group.add_argument("--weeks", type=int, default=40)
+    pacing_group.add_argument("--lessons", type=int, default=90)
+    pacing_group.add_argument("--catalog", type=int, default=2000, help="Lessons in the content catalog.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise SystemExit(f"Unknown benchmarks: {', '.join(unknown)}")
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": [],
+    }
+    for name in names:
+        print(f"Running {name}...", file=sys.stderr)
+        report["results"].append(BENCHMARKS[name](args))
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as report_file:
+            report_file.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
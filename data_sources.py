@@ -0,0 +1,266 @@
+"""
+Data sources for teachers, sections and master schedules.
+
+The Streamlit app talks to a DataSource rather than calling a backend directly.
+Implementations:
+
+- MockDataSource: the built-in demo data (three teachers, M/W/F schedules).
+- SQLiteDataSource: the same data read from a local SQLite file, which can be
+  filled from any other source with `import_from`.
+- CachedDataSource: wraps another source with a thread-safe TTL/LRU cache so
+  reruns and sessions do not hit the backend again, and can prefetch all of a
+  teacher's sections in one bulk call.
+
+Cached values are shared between sessions; treat returned lists and DataFrames
+as read-only.
+"""
+
+import abc
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+SCHEDULE_COLUMNS = ["date", "block_id", "start", "end"]
+DEFAULT_TTL_SECONDS = 300
+DEFAULT_MAX_ENTRIES = 512
+
+
+class DataSource(abc.ABC):
+    """Interface for fetching teachers, sections and master schedules."""
+
+    @abc.abstractmethod
+    def fetch_teachers(self) -> List[Dict]:
+        ...
+
+    @abc.abstractmethod
+    def fetch_sections(self, teacher_id: str) -> List[Dict]:
+        ...
+
+    @abc.abstractmethod
+    def fetch_master_schedule(self, section_id: str) -> pd.DataFrame:
+        ...
+
+    def fetch_master_schedules(self, section_ids: Iterable[str]) -> Dict[str, pd.DataFrame]:
+        """Fetches several schedules; backends with a bulk query should override this."""
+        return {section_id: self.fetch_master_schedule(section_id) for section_id in section_ids}
+
+
+class MockDataSource(DataSource):
+    """Demo data: a fixed set of teachers and sections meeting M/W/F for 12 weeks from this week."""
+
+    TEACHERS = [
+        {"id": "t_1001", "name": "Ada Lovelace"},
+        {"id": "t_1002", "name": "Isaac Newton"},
+        {"id": "t_1003", "name": "Marie Curie"},
+    ]
+    SECTIONS = {
+        "t_1001": [
+            {"id": "sec_phy_honors_A", "name": "Physics Honors - A", "year": 2025},
+            {"id": "sec_phy_honors_B", "name": "Physics Honors - B", "year": 2025},
+            {"id": "sec_phy", "name": "Physics", "year": 2025},
+        ],
+        "t_1002": [{"id": "sec_alg2_A", "name": "Algebra II - A", "year": 2025}],
+        "t_1003": [
+            {"id": "sec_chem_A", "name": "Chemistry - A", "year": 2025},
+            {"id": "sec_chem_B", "name": "Chemistry - B", "year": 2025},
+        ],
+    }
+
+    def fetch_teachers(self) -> List[Dict]:
+        return [dict(teacher) for teacher in self.TEACHERS]
+
+    def fetch_sections(self, teacher_id: str) -> List[Dict]:
+        return [dict(section) for section in self.SECTIONS.get(teacher_id, [])]
+
+    def fetch_master_schedule(self, section_id: str) -> pd.DataFrame:
+        """Generates a mock master schedule for a section (M/W/F for 12 weeks)."""
+        today = date.today()
+        start_of_week = today - timedelta(days=today.weekday())
+        days = pd.date_range(start_of_week, start_of_week + timedelta(days=7 * 12), freq="D")
+        meets = days.weekday.isin([0, 2, 4])  # Mon, Wed, Fri
+        return pd.DataFrame({
+            "date": days.date,
+            "block_id": ["B2" if meeting else None for meeting in meets],
+            "start": "10:20",
+            "end": "11:05",
+        })
+
+
+class SQLiteDataSource(DataSource):
+    """
+    Reads teachers, sections and schedules from a local SQLite file.
+    Schedule dates are stored as ISO strings and returned as datetime.date values.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.executescript(
+                "CREATE TABLE IF NOT EXISTS teachers (id TEXT PRIMARY KEY, name TEXT NOT NULL);"
+                "CREATE TABLE IF NOT EXISTS sections ("
+                " id TEXT PRIMARY KEY, teacher_id TEXT NOT NULL, name TEXT NOT NULL, year INTEGER);"
+                "CREATE INDEX IF NOT EXISTS sections_teacher ON sections (teacher_id);"
+                "CREATE TABLE IF NOT EXISTS schedule ("
+                " section_id TEXT NOT NULL, date TEXT NOT NULL, block_id TEXT, start TEXT, end TEXT,"
+                " PRIMARY KEY (section_id, date));"
+            )
+
+    def fetch_teachers(self) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT id, name FROM teachers ORDER BY name").fetchall()
+        return [{"id": teacher_id, "name": name} for teacher_id, name in rows]
+
+    def fetch_sections(self, teacher_id: str) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, name, year FROM sections WHERE teacher_id = ? ORDER BY rowid", (teacher_id,)
+            ).fetchall()
+        return [{"id": section_id, "name": name, "year": year} for section_id, name, year in rows]
+
+    def fetch_master_schedule(self, section_id: str) -> pd.DataFrame:
+        return self.fetch_master_schedules([section_id])[section_id]
+
+    def fetch_master_schedules(self, section_ids: Iterable[str]) -> Dict[str, pd.DataFrame]:
+        """Reads every requested schedule with a single query."""
+        section_ids = list(section_ids)
+        if not section_ids:
+            return {}
+        placeholders = ", ".join("?" for _ in section_ids)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT section_id, date, block_id, start, end FROM schedule"
+                f" WHERE section_id IN ({placeholders}) ORDER BY section_id, date",
+                section_ids,
+            ).fetchall()
+        frame = pd.DataFrame(rows, columns=["section_id"] + SCHEDULE_COLUMNS)
+        frame["date"] = [date.fromisoformat(value) for value in frame["date"]]
+        schedules = {
+            section_id: group[SCHEDULE_COLUMNS].reset_index(drop=True)
+            for section_id, group in frame.groupby("section_id", sort=False)
+        }
+        return {
+            section_id: schedules.get(section_id, pd.DataFrame(columns=SCHEDULE_COLUMNS))
+            for section_id in section_ids
+        }
+
+    def import_from(self, source: DataSource):
+        """Replaces this database's contents with everything `source` returns."""
+        teachers = source.fetch_teachers()
+        sections_by_teacher = {teacher["id"]: source.fetch_sections(teacher["id"]) for teacher in teachers}
+        section_ids = [section["id"] for sections in sections_by_teacher.values() for section in sections]
+        schedules = source.fetch_master_schedules(section_ids)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM schedule")
+            self._conn.execute("DELETE FROM sections")
+            self._conn.execute("DELETE FROM teachers")
+            self._conn.executemany("INSERT INTO teachers (id, name) VALUES (?, ?)",
+                                   [(teacher["id"], teacher["name"]) for teacher in teachers])
+            self._conn.executemany(
+                "INSERT INTO sections (id, teacher_id, name, year) VALUES (?, ?, ?, ?)",
+                [(section["id"], teacher_id, section["name"], section.get("year"))
+                 for teacher_id, sections in sections_by_teacher.items() for section in sections],
+            )
+            for section_id, schedule in schedules.items():
+                self._conn.executemany(
+                    "INSERT INTO schedule (section_id, date, block_id, start, end) VALUES (?, ?, ?, ?, ?)",
+                    [(section_id, row.date.isoformat(), row.block_id, row.start, row.end)
+                     for row in schedule[SCHEDULE_COLUMNS].itertuples(index=False)],
+                )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CachedDataSource(DataSource):
+    """
+    Thread-safe TTL/LRU cache in front of another DataSource.
+
+    Entries expire after ttl_seconds, and once more than max_entries are held the
+    least recently used are dropped. prefetch_teacher loads a teacher's sections and
+    all of their schedules in one bulk call so switching sections is a cache hit.
+    """
+
+    def __init__(self, source: DataSource, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.source = source
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: tuple):
+        """Returns (True, value) for a fresh entry, else (False, None)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def _put(self, key: tuple, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _cached(self, key: tuple, fetch):
+        found, value = self._get(key)
+        if not found:
+            value = fetch()
+            self._put(key, value)
+        return value
+
+    def fetch_teachers(self) -> List[Dict]:
+        return self._cached(("teachers",), self.source.fetch_teachers)
+
+    def fetch_sections(self, teacher_id: str) -> List[Dict]:
+        return self._cached(("sections", teacher_id), lambda: self.source.fetch_sections(teacher_id))
+
+    def fetch_master_schedule(self, section_id: str) -> pd.DataFrame:
+        return self._cached(("schedule", section_id), lambda: self.source.fetch_master_schedule(section_id))
+
+    def fetch_master_schedules(self, section_ids: Iterable[str]) -> Dict[str, pd.DataFrame]:
+        """Serves cached schedules and fetches the rest in one bulk call."""
+        schedules = {}
+        missing = []
+        for section_id in section_ids:
+            found, schedule = self._get(("schedule", section_id))
+            if found:
+                schedules[section_id] = schedule
+            else:
+                missing.append(section_id)
+        if missing:
+            for section_id, schedule in self.source.fetch_master_schedules(missing).items():
+                self._put(("schedule", section_id), schedule)
+                schedules[section_id] = schedule
+        return schedules
+
+    def prefetch_teacher(self, teacher_id: str) -> List[Dict]:
+        """Loads a teacher's sections and all their schedules; returns the sections."""
+        sections = self.fetch_sections(teacher_id)
+        self.fetch_master_schedules([section["id"] for section in sections])
+        return sections
+
+    def invalidate(self, kind: Optional[str] = None):
+        """Drops every cached entry, or only those of one kind ("teachers", "sections", "schedule")."""
+        with self._lock:
+            if kind is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == kind]:
+                    del self._entries[key]
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI chat-completions endpoint.
+
+Lets grading.py be exercised end-to-end without an API key or network access,
+with configurable per-request latency so the concurrent grading engine can be
+measured against something that behaves like a slow model.
+
+Run standalone:
+    python3 fake_openai_server.py --port 8787 --latency 0.5
+    python3 grading.py --openai-base-url http://127.0.0.1:8787/v1/
+
+Or embed in a script:
+    server = FakeChatCompletionsServer(latency=0.2)
+    base_url = server.start()
+    ...
+    server.stop()
+"""
+
+import argparse
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Accept bursts of new connections from a wide thread pool without resetting them.
+    request_queue_size = 128
+
+DEFAULT_GRADE = {
+    "Criteria": {"Accuracy": 3, "Completeness": 2},
+    "Overall": 5,
+    "Explanation": "Graded by the local fake chat-completions server.",
+}
+
+# Mirrors grading.BATCH_ANSWERS_HEADER; the answers JSON follows on the next line.
+BATCH_ANSWERS_MARKER = "Student Answers (JSON array of"
+
+
+def default_responder(messages):
+    """
+    Returns the same well-formed grade JSON for every request. Batched grading prompts
+    get a JSON array with one graded object per submitted row.
+    """
+    prompt = str(messages[-1].get("content", "")) if messages else ""
+    if BATCH_ANSWERS_MARKER in prompt:
+        answers_json = prompt.split(BATCH_ANSWERS_MARKER, 1)[1].split("\n", 1)[1]
+        rows = [item["row"] for item in json.loads(answers_json)]
+        return json.dumps([dict(DEFAULT_GRADE, row=row) for row in rows])
+    return json.dumps(DEFAULT_GRADE)
+
+
+class FakeChatCompletionsServer:
+    """
+    Threaded HTTP server that answers POST /v1/chat/completions with a canned reply.
+
+    `responder` receives the request's message list and returns the assistant content;
+    `responders` can map model names to their own responder (e.g. to test a model cascade),
+    and requests per model are counted in `model_requests`.
+    Provider throttling can be simulated: the first `fail_first` requests and every
+    `fail_every`-th request after that get `fail_status`, with a Retry-After header when
+    `retry_after` is set. Request counts and the peak number of concurrent requests are recorded so callers
+    can check how hard the grading engine actually drove the endpoint.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, responder=default_responder,
+                 fail_first=0, fail_every=None, fail_status=429, retry_after=None, responders=None):
+        self.latency = latency
+        self.responder = responder
+        self.responders = dict(responders or {})
+        self.fail_first = fail_first
+        self.fail_every = fail_every
+        self.fail_status = fail_status
+        self.retry_after = retry_after
+        self.request_count = 0
+        self.failed_count = 0
+        self.max_in_flight = 0
+        self.model_requests = Counter()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._httpd = _Server((host, port), self._make_handler())
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1/"
+
+    def start(self):
+        """Serves in a background thread and returns the base URL to hand to the client."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _enter_request(self):
+        """Registers a request and returns True if it should be answered with an injected failure."""
+        with self._lock:
+            self.request_count += 1
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+            should_fail = self.request_count <= self.fail_first or bool(
+                self.fail_every and (self.request_count - self.fail_first) % self.fail_every == 0
+            )
+            if should_fail:
+                self.failed_count += 1
+            return should_fail
+
+    def _leave_request(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _completion(self, body):
+        messages = body.get("messages", [])
+        model = body.get("model", "fake-model")
+        with self._lock:
+            self.model_requests[model] += 1
+        content = self.responders.get(model, self.responder)(messages)
+        prompt_chars = sum(len(str(m.get("content", ""))) for m in messages)
+        prompt_tokens = prompt_chars // 4 + 1
+        completion_tokens = len(content) // 4 + 1
+        return {
+            "id": f"chatcmpl-fake-{self.request_count}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except json.JSONDecodeError:
+                    self._send_json(400, {"error": {"message": "Request body is not valid JSON."}})
+                    return
+
+                should_fail = server._enter_request()
+                try:
+                    if server.latency:
+                        time.sleep(server.latency)
+                    if should_fail:
+                        headers = {}
+                        if server.retry_after is not None:
+                            headers["Retry-After"] = str(server.retry_after)
+                        error = {"error": {"message": "Injected failure from the fake server.", "type": "fake_error"}}
+                        self._send_json(server.fail_status, error, headers)
+                        return
+                    self._send_json(200, server._completion(body))
+                finally:
+                    server._leave_request()
+
+            def _send_json(self, status, payload, headers=None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass  # Keep benchmark and grading output readable.
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake OpenAI chat-completions endpoint.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to sleep before each reply.")
+    parser.add_argument("--fail-first", type=int, default=0, help="Fail this many requests at startup.")
+    parser.add_argument("--fail-every", type=int, default=None, help="Then fail every Nth request.")
+    parser.add_argument("--fail-status", type=int, default=429, help="HTTP status for injected failures.")
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry-After seconds on injected failures.")
+    args = parser.parse_args()
+
+    server = FakeChatCompletionsServer(
+        args.host, args.port, latency=args.latency, fail_first=args.fail_first, fail_every=args.fail_every,
+        fail_status=args.fail_status, retry_after=args.retry_after,
+    )
+    print(f"Fake chat-completions server at {server.start()} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
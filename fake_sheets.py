@@ -0,0 +1,166 @@
+"""
+In-memory stand-ins for gspread spreadsheets and worksheets.
+
+They implement the subset of the gspread API that grading.py uses and count every
+call that would be a Sheets API request, so write-back batching can be exercised
+and measured without Google credentials.
+
+    spreadsheet = InMemorySpreadsheet({
+        "sampel answers": [["Name", "Answer"], ["Ada", "Velocity is..."]],
+        "sample rubric": [["Criterion", "Points"], ["Accuracy", "3"]],
+        "Prompt": [["prompt"], ["Grade this answer."]],
+    })
+    process_student_answers(spreadsheet)
+    spreadsheet.worksheet("sampel answers").api_calls["batch_update"]
+"""
+
+import re
+from collections import Counter
+
+from sheet_writer import a1_to_rowcol
+
+_ROW_RANGE_RE = re.compile(r"^(\d+):(\d+)$")
+
+
+def split_sheet_range(a1_range):
+    """Splits "'sample rubric'!A1:E8" into ("sample rubric", "A1:E8"); the range part may be empty."""
+    if "!" in a1_range:
+        sheet, _, cell_range = a1_range.rpartition("!")
+    else:
+        sheet, cell_range = a1_range, ""
+    if sheet.startswith("'") and sheet.endswith("'"):
+        sheet = sheet[1:-1].replace("''", "'")
+    return sheet, cell_range
+
+
+class InMemoryWorksheet:
+    """A grid of strings addressed with gspread's 1-indexed (row, col) conventions."""
+
+    def __init__(self, title, rows=None):
+        self.title = title
+        self.rows = [list(row) for row in (rows or [])]
+        self.api_calls = Counter()
+
+    @property
+    def row_count(self):
+        return len(self.rows)
+
+    @property
+    def col_count(self):
+        return max((len(row) for row in self.rows), default=0)
+
+    def _ensure_size(self, row, col):
+        while len(self.rows) < row:
+            self.rows.append([])
+        target = self.rows[row - 1]
+        while len(target) < col:
+            target.append("")
+
+    def _set(self, row, col, value):
+        self._ensure_size(row, col)
+        self.rows[row - 1][col - 1] = "" if value is None else str(value)
+
+    def _parse_range(self, cell_range):
+        if "!" in cell_range:
+            cell_range = cell_range.split("!", 1)[1]
+        row_range = _ROW_RANGE_RE.match(cell_range)
+        if row_range:
+            first_row, last_row = (int(group) for group in row_range.groups())
+            return first_row, 1, last_row, max(self.col_count, 1)
+        start, _, end = cell_range.partition(":")
+        start_row, start_col = a1_to_rowcol(start)
+        end_row, end_col = a1_to_rowcol(end) if end else (start_row, start_col)
+        return start_row, start_col, end_row, end_col
+
+    def _read(self, start_row, start_col, end_row, end_col):
+        values = []
+        for row in self.rows[start_row - 1:end_row]:
+            values.append(row[start_col - 1:end_col])
+        # Like the Sheets API, drop trailing empty cells and rows.
+        values = [self._trim(row) for row in values]
+        while values and not values[-1]:
+            values.pop()
+        return values
+
+    @staticmethod
+    def _trim(row):
+        row = list(row)
+        while row and row[-1] == "":
+            row.pop()
+        return row
+
+    def get_all_values(self):
+        self.api_calls["get_all_values"] += 1
+        width = self.col_count
+        return [row + [""] * (width - len(row)) for row in self.rows]
+
+    def get(self, cell_range):
+        self.api_calls["get"] += 1
+        return self._read(*self._parse_range(cell_range))
+
+    def update_cell(self, row, col, value):
+        self.api_calls["update_cell"] += 1
+        self._set(row, col, value)
+
+    def batch_update(self, data, **kwargs):
+        self.api_calls["batch_update"] += 1
+        for entry in data:
+            start_row, start_col, _, _ = self._parse_range(entry["range"])
+            for row_offset, values in enumerate(entry["values"]):
+                for col_offset, value in enumerate(values):
+                    self._set(start_row + row_offset, start_col + col_offset, value)
+
+    def read_range(self, cell_range):
+        """Reads an A1 range (or the whole sheet for an empty range) without counting an API call."""
+        if not cell_range:
+            return self._read(1, 1, max(self.row_count, 1), max(self.col_count, 1))
+        return self._read(*self._parse_range(cell_range))
+
+    def cell_value(self, row, col):
+        """Reads one cell without counting it as an API call."""
+        if row > len(self.rows) or col > len(self.rows[row - 1]):
+            return ""
+        return self.rows[row - 1][col - 1]
+
+
+class InMemorySpreadsheet:
+    """Holds named InMemoryWorksheets; accepts either worksheets or raw row lists."""
+
+    def __init__(self, worksheets=None, title="In-Memory Spreadsheet"):
+        self.title = title
+        self.api_calls = Counter()
+        self._worksheets = {}
+        for name, rows in (worksheets or {}).items():
+            self.add_worksheet(name, rows)
+
+    def add_worksheet(self, title, rows=None):
+        worksheet = rows if isinstance(rows, InMemoryWorksheet) else InMemoryWorksheet(title, rows)
+        self._worksheets[title] = worksheet
+        return worksheet
+
+    def worksheet(self, title):
+        self.api_calls["worksheet"] += 1
+        try:
+            return self._worksheets[title]
+        except KeyError:
+            raise KeyError(f"No worksheet named {title!r}") from None
+
+    def values_batch_get(self, ranges, params=None):
+        """Reads several "'Sheet'!A1:B2" ranges in one call, in the Sheets API response shape."""
+        self.api_calls["values_batch_get"] += 1
+        value_ranges = []
+        for a1_range in ranges:
+            title, cell_range = split_sheet_range(a1_range)
+            values = self._worksheets[title].read_range(cell_range)
+            value_ranges.append({"range": a1_range, "majorDimension": "ROWS", "values": values})
+        return {"spreadsheetId": "in-memory", "valueRanges": value_ranges}
+
+    def worksheets(self):
+        return list(self._worksheets.values())
+
+    def total_api_calls(self):
+        """Spreadsheet-level calls plus every call made on its worksheets."""
+        total = sum(self.api_calls.values())
+        for worksheet in self._worksheets.values():
+            total += sum(worksheet.api_calls.values())
+        return total
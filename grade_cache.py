@@ -0,0 +1,141 @@
+"""
+Persistent, content-addressed cache of grading results.
+
+Results are keyed by a SHA-256 of everything that determines the model's output:
+custom prompt, rubric text, normalized student answer, model and temperature.
+Re-running grading.py on a sheet therefore only pays for answers it has not seen
+with that exact prompt and rubric before.
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = "grade_cache.sqlite3"
+DEFAULT_MAX_ENTRIES = 50000
+DEFAULT_MAX_AGE_DAYS = 90
+
+# Run size-based eviction after this many inserts rather than on every put.
+_EVICT_EVERY_PUTS = 200
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_answer(student_answer):
+    """Collapses runs of whitespace and trims the ends so reformatting does not change the key."""
+    return _WHITESPACE_RE.sub(" ", student_answer).strip()
+
+
+def answer_fingerprint(student_answer):
+    """
+    Short, stable fingerprint of a normalized answer, stored next to its grade so
+    later runs can tell whether the answer changed. The "fp-" prefix keeps Sheets
+    from reading the value as a number.
+    """
+    digest = hashlib.sha256(normalize_answer(student_answer).encode("utf-8")).hexdigest()
+    return f"fp-{digest[:16]}"
+
+
+def cache_key(custom_prompt, rubric_text, student_answer, model, temperature):
+    """Returns the hex SHA-256 content address for one grading request."""
+    payload = json.dumps(
+        [custom_prompt, rubric_text, normalize_answer(student_answer), model, float(temperature)],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class GradeCache:
+    """
+    SQLite-backed result cache that is safe to share across grading threads.
+
+    Entries older than max_age_days are dropped, and once the cache holds more than
+    max_entries the least recently used entries are evicted.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, max_age_days=DEFAULT_MAX_AGE_DAYS):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.hits = 0
+        self.misses = 0
+        self._puts_since_evict = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS grades ("
+                " key TEXT PRIMARY KEY,"
+                " result TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_used_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS grades_last_used ON grades (last_used_at)")
+        self.evict()
+
+    def get(self, key):
+        """Returns the cached result for key, or None on a miss."""
+        with self._lock:
+            row = self._conn.execute("SELECT result, created_at FROM grades WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            if row is None or self._is_expired(row[1], now):
+                self.misses += 1
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE grades SET last_used_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, result):
+        with self._lock:
+            now = time.time()
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO grades (key, result, created_at, last_used_at) VALUES (?, ?, ?, ?)",
+                    (key, result, now, now),
+                )
+            self._puts_since_evict += 1
+            due = self._puts_since_evict >= _EVICT_EVERY_PUTS
+        if due:
+            self.evict()
+
+    def _is_expired(self, created_at, now):
+        return self.max_age_days is not None and now - created_at > self.max_age_days * 86400
+
+    def evict(self):
+        """Applies the age and size limits. Returns the number of entries removed."""
+        with self._lock, self._conn:
+            removed = 0
+            if self.max_age_days is not None:
+                cutoff = time.time() - self.max_age_days * 86400
+                removed += self._conn.execute("DELETE FROM grades WHERE created_at < ?", (cutoff,)).rowcount
+            if self.max_entries is not None:
+                removed += self._conn.execute(
+                    "DELETE FROM grades WHERE key IN ("
+                    " SELECT key FROM grades ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                ).rowcount
+            self._puts_since_evict = 0
+            return removed
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM grades")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM grades").fetchone()[0]
+
+    def close(self):
+        self.evict()
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,54 +1,223 @@
 import os
+import re
+import json
+import time
+import inspect
 import logging
+import argparse
+import queue
+import threading
+from collections import Counter, deque
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
 import openai
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
 
+from sheet_writer import SheetWriteBuffer, DEFAULT_FLUSH_EVERY, DEFAULT_FLUSH_INTERVAL
+from resilience import (
+    ResilientCaller, CircuitBreaker, RetriesExhaustedError, CircuitOpenError,
+    DEFAULT_MAX_ATTEMPTS, DEFAULT_FAILURE_THRESHOLD, DEFAULT_COOLDOWN_SECONDS
+)
+from grade_cache import GradeCache, cache_key, answer_fingerprint, DEFAULT_CACHE_PATH, DEFAULT_MAX_ENTRIES, DEFAULT_MAX_AGE_DAYS
+from metrics import StageTimings, open_metrics_sink
+from answer_clusters import AnswerClusterer
+
 ########################################
 # 1) SETUP OPENAI
 ########################################
 api_key_path = "openai_key.txt"
 
-try:
-    with open(api_key_path, "r") as key_file:
-        openai.api_key = key_file.read().strip()
-    # In your working code you used:
-    # openai_client = OpenAI(api_key=openai.api_key)
-    # For this script we'll simply alias the openai module as our client.
-    openai_client = openai
-except FileNotFoundError:
-    logging.error(f"API key file not found at {api_key_path}")
-    raise
-except Exception as e:
-    logging.error(f"Error loading OpenAI API key: {e}")
-    raise
+# Model settings shared by every grading request.
+DEFAULT_MODEL = "gpt-4-0613"
+DEFAULT_TEMPERATURE = 0.0  # Lower temperature for more deterministic responses.
+SYSTEM_PROMPT = "You are a helpful grading assistant."
 
 # Path to your Google Service Account credentials file.
 creds_json_path = "/Users/kevinringuette/Library/Mobile Documents/com~apple~CloudDocs/Pacifica/Scripts/Linen Patrol Grading.json"
 
-def authorize_google_sheets(creds_json_path, spreadsheet_name):
+# Worksheet metadata remembered between runs so startup can skip lookup requests.
+DEFAULT_METADATA_CACHE_PATH = "sheet_metadata_cache.json"
+
+# Pooled HTTP connections to the OpenAI API; at least one per concurrent grading request.
+DEFAULT_MAX_CONNECTIONS = 64
+DEFAULT_REQUEST_TIMEOUT = 120.0  # Seconds.
+
+def read_api_key(path=api_key_path):
     """
-    Authorizes access to Google Sheets and returns the spreadsheet object.
+    Reads the OpenAI API key from a file.
+    """
+    try:
+        with open(path, "r") as key_file:
+            return key_file.read().strip()
+    except FileNotFoundError:
+        logging.error(f"API key file not found at {path}")
+        raise
+
+def authorize_gspread_client(creds_json_path):
+    """
+    Authorizes the service account and returns a gspread client that can open any
+    spreadsheet shared with it. Authorize once and reuse the client for several sheets.
     """
     scope = [
         "https://spreadsheets.google.com/feeds",
         "https://www.googleapis.com/auth/drive"
     ]
     creds = ServiceAccountCredentials.from_json_keyfile_name(creds_json_path, scope)
-    client = gspread.authorize(creds)
-    return client.open(spreadsheet_name)
+    return gspread.authorize(creds)
 
-def get_rubric_text(rubric_sheet, cell_range="A1:C8"):
+def open_spreadsheet(client, spreadsheet_name, metadata_cache=None):
     """
-    Retrieves the rubric from the specified range and converts it into a text block.
+    Opens a spreadsheet by name with an authorized client.
+    With a SheetMetadataCache, a spreadsheet opened before is opened directly by its key,
+    skipping the Drive search that opening by name requires.
+    """
+    spreadsheet_id = metadata_cache.get_spreadsheet_id(spreadsheet_name) if metadata_cache else None
+    if spreadsheet_id:
+        return client.open_by_key(spreadsheet_id)
+    spreadsheet = client.open(spreadsheet_name)
+    if metadata_cache is not None:
+        metadata_cache.set_spreadsheet_id(spreadsheet_name, spreadsheet.id)
+    return spreadsheet
+
+class GradingSession:
+    """
+    The API clients a grading run talks to, each created on first use and then reused:
+    one OpenAI client whose HTTP connection pool keeps connections alive between requests,
+    and one authorized gspread client. Nothing is read or authorized until a client is
+    needed, and the session is safe to share between threads and runs.
+    
+    The API key comes from api_key, or else from the file at api_key_path.
+    """
+
+    def __init__(self, api_key=None, api_key_path=api_key_path, base_url=None, creds_json_path=creds_json_path,
+                 max_connections=DEFAULT_MAX_CONNECTIONS, timeout=DEFAULT_REQUEST_TIMEOUT):
+        self.api_key = api_key
+        self.api_key_path = api_key_path
+        self.base_url = base_url
+        self.creds_json_path = creds_json_path
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._openai_client = None
+        self._http_client = None
+        self._gspread_client = None
+        self._openai_lock = threading.Lock()
+        self._gspread_lock = threading.Lock()
+
+    @property
+    def openai_client(self):
+        client = self._openai_client
+        if client is None:
+            with self._openai_lock:
+                if self._openai_client is None:
+                    self._openai_client = self._create_openai_client()
+                client = self._openai_client
+        return client
+
+    def _create_openai_client(self):
+        api_key = self.api_key or read_api_key(self.api_key_path)
+        # The Limits class of whichever HTTP library this openai release is built on.
+        limits = type(openai.DEFAULT_CONNECTION_LIMITS)(max_connections=self.max_connections,
+                                                         max_keepalive_connections=self.max_connections)
+        self._http_client = openai.DefaultHttpxClient(limits=limits, timeout=self.timeout)
+        # Retries are handled by resilience.ResilientCaller so they can share one circuit breaker.
+        return openai.OpenAI(api_key=api_key, base_url=self.base_url, max_retries=0, http_client=self._http_client)
+
+    def set_base_url(self, base_url):
+        """
+        Sends later requests to another chat-completions endpoint, e.g. fake_openai_server.py.
+        """
+        with self._openai_lock:
+            self.base_url = base_url
+            self._close_openai_client()
+
+    @property
+    def gspread_client(self):
+        client = self._gspread_client
+        if client is None:
+            with self._gspread_lock:
+                if self._gspread_client is None:
+                    self._gspread_client = authorize_gspread_client(self.creds_json_path)
+                client = self._gspread_client
+        return client
+
+    def open_spreadsheet(self, spreadsheet_name, metadata_cache=None):
+        return open_spreadsheet(self.gspread_client, spreadsheet_name, metadata_cache)
+
+    def warm_up(self, sheets=True):
+        """
+        Creates the clients on a background thread so the first request does not wait for
+        key loading and service-account authorization. Returns the thread.
+        """
+        def create_clients():
+            try:
+                self.openai_client
+                if sheets:
+                    self.gspread_client
+            except Exception as e:
+                logging.warning(f"Could not prepare API clients in the background: {e}")
+
+        thread = threading.Thread(target=create_clients, name="grading-session-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def _close_openai_client(self):
+        if self._http_client is not None:
+            self._http_client.close()
+        self._openai_client = None
+        self._http_client = None
+
+    def close(self):
+        """
+        Closes the pooled OpenAI connections; the client is re-created if used again.
+        """
+        with self._openai_lock:
+            self._close_openai_client()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+# Sessions shared by callers that do not pass their own, one per credentials file.
+_shared_sessions = {}
+_shared_sessions_lock = threading.Lock()
+
+def default_session(creds_json_path=creds_json_path):
+    """
+    Returns the shared GradingSession for a credentials file, creating it on first use.
+    """
+    with _shared_sessions_lock:
+        session = _shared_sessions.get(creds_json_path)
+        if session is None:
+            session = _shared_sessions[creds_json_path] = GradingSession(creds_json_path=creds_json_path)
+        return session
+
+def authorize_google_sheets(creds_json_path, spreadsheet_name, metadata_cache=None):
+    """
+    Authorizes access to Google Sheets and returns the spreadsheet object.
+    The authorized client is kept in the shared session and reused by later calls.
+    """
+    return default_session(creds_json_path).open_spreadsheet(spreadsheet_name, metadata_cache)
+
+def format_rubric_rows(rubric_cells):
+    """
+    Converts rubric rows into the text block used in the grading prompt.
     """
-    rubric_cells = rubric_sheet.get(cell_range)
     rubric_lines = []
     for row in rubric_cells:
         # Join each cell content using " | " as a delimiter.
         line = " | ".join(str(cell) for cell in row)
         rubric_lines.append(line)
-    rubric_text = "\n".join(rubric_lines)
+    return "\n".join(rubric_lines)
+
+def get_rubric_text(rubric_sheet, cell_range="A1:C8"):
+    """
+    Retrieves the rubric from the specified range and converts it into a text block.
+    """
+    rubric_cells = rubric_sheet.get(cell_range)
+    rubric_text = format_rubric_rows(rubric_cells)
     return rubric_text
 
 def get_custom_prompt_text(spreadsheet, prompt_sheet_name="Prompt"):
@@ -59,6 +228,12 @@ def get_custom_prompt_text(spreadsheet, prompt_sheet_name="Prompt"):
     """
     worksheet_prompt = spreadsheet.worksheet(prompt_sheet_name)
     data = worksheet_prompt.get_all_values()
+    return parse_custom_prompt(data)
+
+def parse_custom_prompt(data):
+    """
+    Extracts the custom prompt from the Prompt worksheet's rows (header row first).
+    """
     if not data:
         raise Exception("The Prompt worksheet is empty.")
     headers = data[0]
@@ -66,71 +241,1178 @@ def get_custom_prompt_text(spreadsheet, prompt_sheet_name="Prompt"):
         prompt_idx = headers.index("prompt")
     except ValueError:
         raise Exception("The header 'prompt' was not found in the Prompt worksheet.")
-    if len(data) < 2 or not data[1][prompt_idx]:
+    if len(data) < 2 or len(data[1]) <= prompt_idx or not data[1][prompt_idx]:
         raise Exception("No prompt text found under the 'prompt' header in the Prompt worksheet.")
     custom_prompt = data[1][prompt_idx]
     return custom_prompt
 
-def grade_response_with_openai(rubric_text, student_answer, custom_prompt):
+# The prompt is laid out so everything shared by a sheet (custom prompt, rubric, instructions)
+# comes first and the student answer(s) last. Every request for a sheet then starts with the
+# same prefix, which providers can cache, and a batch pays for that prefix only once.
+GRADING_INSTRUCTIONS = (
+    "Instructions:\n"
+    "1. Analyze the provided rubric to determine all grading criteria and any associated point values. \n"
+    "2. Evaluate the student answer below according to each criterion and assign an appropriate score. \n"
+    "3. Calculate an overall grade from the individual scores (explain your method clearly). \n"
+    "4. Provide a brief explanation of how each score and the overall grade were determined. \n"
+    "5. Return your answer strictly in valid JSON format with exactly the following keys:\n"
+    "   {\n"
+    "     \"Criteria\": { \"<criterion1>\": <score>, \"<criterion2>\": <score>, ... },\n"
+    "     \"Overall\": <overall grade>,\n"
+    "     \"Explanation\": \"<brief explanation>\"\n"
+    "   }\n"
+    "Do not include any additional text outside the JSON."
+)
+
+BATCH_GRADING_INSTRUCTIONS = (
+    "Instructions:\n"
+    "1. Analyze the provided rubric to determine all grading criteria and any associated point values. \n"
+    "2. Evaluate each student answer below independently according to each criterion and assign an appropriate score. \n"
+    "3. Calculate an overall grade for each answer from its individual scores (explain your method clearly). \n"
+    "4. Provide a brief explanation of how each score and the overall grade were determined. \n"
+    "5. Return your answer strictly as a valid JSON array with one object per student answer, copying each\n"
+    "   answer's \"row\" id, with exactly the following keys:\n"
+    "   [\n"
+    "     {\n"
+    "       \"row\": <row id>,\n"
+    "       \"Criteria\": { \"<criterion1>\": <score>, \"<criterion2>\": <score>, ... },\n"
+    "       \"Overall\": <overall grade>,\n"
+    "       \"Explanation\": \"<brief explanation>\"\n"
+    "     },\n"
+    "     ...\n"
+    "   ]\n"
+    "Do not include any additional text outside the JSON."
+)
+
+# Appended to the instructions when grading through a ModelCascade, so cheaper tiers can
+# say when they are unsure and the answer should go to a stronger model.
+CONFIDENCE_INSTRUCTION = (
+    "\nAlso add a \"Confidence\" key to each JSON object: a number from 0 to 1 saying how sure "
+    "you are that the scores are right (1 = certain)."
+)
+
+BATCH_ANSWERS_HEADER = "Student Answers (JSON array of {\"row\", \"answer\"} objects):\n"
+
+def build_shared_prefix(rubric_text, custom_prompt, instructions=GRADING_INSTRUCTIONS):
     """
-    Constructs a prompt to evaluate a student answer against a dynamically provided rubric,
-    along with a custom grading prompt loaded from the "Prompt" worksheet, using the OpenAI API.
-    The final prompt instructs the assistant to analyze the rubric, apply it to the student answer,
-    and return a grading summary in valid JSON.
+    Builds the part of the prompt that is identical for every answer on a sheet.
     """
-    prompt = (
+    return (
         # Prepend the custom instructions from the Prompt worksheet.
         f"{custom_prompt}\n\n"
         "Rubric:\n"
         f"{rubric_text}\n\n"
-        "Student Answer:\n"
-        f"{student_answer}\n\n"
-        "Instructions:\n"
-        "1. Analyze the provided rubric to determine all grading criteria and any associated point values. \n"
-        "2. Evaluate the student answer according to each criterion and assign an appropriate score. \n"
-        "3. Calculate an overall grade from the individual scores (explain your method clearly). \n"
-        "4. Provide a brief explanation of how each score and the overall grade were determined. \n"
-        "5. Return your answer strictly in valid JSON format with exactly the following keys:\n"
-        "   {\n"
-        "     \"Criteria\": { \"<criterion1>\": <score>, \"<criterion2>\": <score>, ... },\n"
-        "     \"Overall\": <overall grade>,\n"
-        "     \"Explanation\": \"<brief explanation>\"\n"
-        "   }\n"
-        "Do not include any additional text outside the JSON."
+        f"{instructions}\n\n"
     )
-    
-    response = openai_client.chat.completions.create(
-        model="gpt-4-0613",
+
+def build_grading_prompt(rubric_text, student_answer, custom_prompt, instructions=GRADING_INSTRUCTIONS):
+    """
+    Builds the user prompt sent to the model for a single student answer.
+    """
+    return (
+        build_shared_prefix(rubric_text, custom_prompt, instructions)
+        + "Student Answer:\n"
+        + f"{student_answer}"
+    )
+
+def build_batch_grading_prompt(rubric_text, batch, custom_prompt, instructions=BATCH_GRADING_INSTRUCTIONS):
+    """
+    Builds one user prompt that grades every (row_idx, student_answer) pair in batch.
+    The answers are embedded as JSON so quoting and newlines in them cannot break the layout.
+    """
+    answers = [{"row": row_idx, "answer": student_answer} for row_idx, student_answer in batch]
+    return (
+        build_shared_prefix(rubric_text, custom_prompt, instructions)
+        + BATCH_ANSWERS_HEADER
+        + json.dumps(answers, ensure_ascii=False, indent=1)
+    )
+
+class BatchParseError(Exception):
+    """Raised when a batched grading response is not a JSON array of graded rows."""
+
+def strip_code_fences(text):
+    """
+    Removes a surrounding Markdown code fence (```json ... ```) that models sometimes add.
+    """
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        if text.rstrip().endswith("```"):
+            text = text.rstrip()[:-3]
+    return text.strip()
+
+class GradeParseError(Exception):
+    """Raised when a model reply does not match the Criteria/Overall/Explanation schema."""
+
+GRADE_KEYS = ("Criteria", "Overall", "Explanation")
+_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+
+def coerce_score(value):
+    """
+    Converts a score such as 3, "3", "3/4" or "85%" to a number (the first number found).
+    Returns None when the value holds no number.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        number = float(value)
+    elif isinstance(value, str):
+        match = _NUMBER_RE.search(value)
+        if not match:
+            return None
+        number = float(match.group())
+    else:
+        return None
+    return int(number) if number.is_integer() else number
+
+def validate_grade(grade):
+    """
+    Checks a decoded grade against the expected schema and returns a cleaned copy with
+    numeric criterion scores. A non-numeric Overall (e.g. a letter grade) is kept as text.
+    A numeric Confidence, if the model gave one, is kept as a fraction between 0 and 1.
+    """
+    if not isinstance(grade, dict):
+        raise GradeParseError("Grade is not a JSON object.")
+    missing = [key for key in GRADE_KEYS if key not in grade]
+    if missing:
+        raise GradeParseError(f"Grade is missing keys: {', '.join(missing)}.")
+
+    criteria = grade["Criteria"]
+    if not isinstance(criteria, dict) or not criteria:
+        raise GradeParseError("Criteria must be a non-empty object of scores.")
+    scores = {}
+    for name, score in criteria.items():
+        number = coerce_score(score)
+        if number is None:
+            raise GradeParseError(f"Score for criterion {name!r} is not a number: {score!r}.")
+        scores[str(name).strip()] = number
+
+    overall = coerce_score(grade["Overall"])
+    if overall is None:
+        overall = str(grade["Overall"] or "").strip()
+        if not overall:
+            raise GradeParseError("Overall grade is empty.")
+
+    cleaned = {"Criteria": scores, "Overall": overall, "Explanation": str(grade["Explanation"] or "").strip()}
+    confidence = coerce_score(grade.get("Confidence"))
+    if confidence is not None:
+        if confidence > 1:
+            confidence = confidence / 100  # Given as a percentage.
+        cleaned["Confidence"] = min(max(confidence, 0), 1)
+    return cleaned
+
+def parse_grade_result(content):
+    """
+    Parses and validates a single grading reply. Raises GradeParseError if it is malformed.
+    """
+    try:
+        grade = json.loads(strip_code_fences(content))
+    except json.JSONDecodeError as e:
+        raise GradeParseError(f"Reply is not valid JSON: {e}") from e
+    return validate_grade(grade)
+
+def parse_batch_response(content, batch):
+    """
+    Maps a batched response back to rows. Returns {row_idx: validated_grade} for every row
+    the model answered with a well-formed grade; other rows are simply absent so the caller
+    can fall back to grading them one at a time.
+    """
+    try:
+        items = json.loads(strip_code_fences(content))
+    except json.JSONDecodeError as e:
+        raise BatchParseError(f"Batched response is not valid JSON: {e}") from e
+    if not isinstance(items, list):
+        raise BatchParseError("Batched response is not a JSON array.")
+
+    expected_rows = {row_idx for row_idx, _ in batch}
+    results = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        try:
+            row_idx = int(item.get("row"))
+        except (TypeError, ValueError):
+            continue
+        if row_idx not in expected_rows:
+            continue
+        try:
+            results[row_idx] = validate_grade(item)
+        except GradeParseError as e:
+            logging.warning(f"Malformed grade for row {row_idx} in batched response: {e}")
+    return results
+
+def _create_chat_completion(prompt, token_report=None, caller=None, stats=None, model=DEFAULT_MODEL, session=None,
+                            rate_limiter=None, estimated_tokens=0):
+    """
+    Sends one chat-completions request through session (default: the shared session) and
+    returns the reply text. With stats (a RunStats), the whole call including retries is
+    timed as the "api" stage and each attempt as "api_request". With a rate_limiter, every
+    attempt (retries included) waits for and is charged estimated_tokens.
+    """
+    request = dict(
+        model=model,
         messages=[
-            {"role": "system", "content": "You are a helpful grading assistant."},
+            {"role": "system", "content": SYSTEM_PROMPT},
             {"role": "user", "content": prompt}
         ],
-        temperature=0.0  # Lower temperature for more deterministic responses.
+        temperature=DEFAULT_TEMPERATURE
     )
+    create = (session or default_session()).openai_client.chat.completions.create
+    if stats is not None:
+        untimed_create = create
+
+        def create(**kwargs):
+            with stats.timings.span("api_request"):
+                return untimed_create(**kwargs)
+
+    if rate_limiter is not None:
+        unlimited_create = create
+
+        def create(**kwargs):
+            rate_limiter.acquire(estimated_tokens)
+            return unlimited_create(**kwargs)
+
+    if stats is not None:
+        with stats.timings.span("api"):
+            response = caller.call(create, **request) if caller is not None else create(**request)
+    else:
+        response = caller.call(create, **request) if caller is not None else create(**request)
+    if token_report is not None:
+        token_report.record_request(prompt, getattr(response, "usage", None))
+    return response.choices[0].message.content.strip()
+
+def grade_response_with_openai(rubric_text, student_answer, custom_prompt, token_report=None, caller=None,
+                               stats=None, session=None):
+    """
+    Constructs a prompt to evaluate a student answer against a dynamically provided rubric,
+    along with a custom grading prompt loaded from the "Prompt" worksheet, using the OpenAI API.
+    The final prompt instructs the assistant to analyze the rubric, apply it to the student answer,
+    and return a grading summary in valid JSON.
+    Pass a resilience.ResilientCaller to retry transient API errors.
+    """
+    prompt = build_grading_prompt(rubric_text, student_answer, custom_prompt)
+    return _create_chat_completion(prompt, token_report, caller, stats, session=session)
+
+def grade_batch_with_openai(rubric_text, batch, custom_prompt, token_report=None, caller=None, stats=None,
+                            session=None):
+    """
+    Grades several (row_idx, student_answer) pairs in one request, sending the shared
+    prompt and rubric only once. Returns {row_idx: validated_grade} for the rows the
+    model answered; raises BatchParseError if the reply cannot be read at all.
+    """
+    prompt = build_batch_grading_prompt(rubric_text, batch, custom_prompt)
+    content = _create_chat_completion(prompt, token_report, caller, stats, session=session)
+    return parse_batch_response(content, batch)
+
+DEFAULT_MIN_CONFIDENCE = 0.7
+DEFAULT_BOUNDARY_MARGIN = 1.0
+
+@dataclass(frozen=True)
+class ModelCascade:
+    """
+    Models to grade with, cheapest first. A grade from one tier is escalated to the next
+    when the reply fails validation, its self-reported Confidence is missing or below
+    min_confidence, or a numeric Overall lies within boundary_margin of one of boundaries
+    (e.g. letter-grade cutoffs such as 60, 70, 80, 90). The last tier's grade is always kept.
+    A single model just replaces DEFAULT_MODEL, with no escalation.
+    """
+    models: tuple
+    min_confidence: float = DEFAULT_MIN_CONFIDENCE
+    boundaries: tuple = ()
+    boundary_margin: float = DEFAULT_BOUNDARY_MARGIN
+
+    @property
+    def escalates(self):
+        return len(self.models) > 1
+
+    @property
+    def cache_model(self):
+        """
+        Model name for grade cache keys; covers every setting that decides which grade is kept.
+        """
+        if not self.escalates:
+            return self.models[0]
+        boundaries = ",".join(f"{boundary:g}" for boundary in self.boundaries)
+        return (f"cascade:{'>'.join(self.models)};confidence>={self.min_confidence:g};"
+                f"boundaries={boundaries}~{self.boundary_margin:g}")
+
+    def escalation_reason(self, grade):
+        """
+        Returns why a validated grade should go to the next tier, or None to keep it.
+        """
+        confidence = grade.get("Confidence")
+        if confidence is None or confidence < self.min_confidence:
+            return "low_confidence"
+        overall = grade["Overall"]
+        if isinstance(overall, (int, float)) and any(
+            abs(overall - boundary) <= self.boundary_margin for boundary in self.boundaries
+        ):
+            return "near_boundary"
+        return None
+
+    def summary(self, stats):
+        """
+        Per-tier requests, acceptance and escalation rates and API latency from a run's RunStats.
+        """
+        counters = stats.counters
+        stages = stats.timings.snapshot()
+        lines = ["Model cascade:"]
+        for tier, model in enumerate(self.models):
+            accepted = counters[f"tier{tier}_accepted"]
+            escalated = counters[f"tier{tier}_escalated"]
+            graded = accepted + escalated
+            rate = f"{escalated / graded:.0%}" if graded else "n/a"
+            latency = stages.get(f"tier{tier}_api")
+            timing = f", p50 {latency['p50_ms']:.0f} ms, p95 {latency['p95_ms']:.0f} ms" if latency else ""
+            lines.append(f"  tier {tier} ({model}): {counters[f'tier{tier}_requests']} requests, "
+                         f"{accepted} kept, {escalated} escalated ({rate}){timing}")
+        reasons = ", ".join(f"{reason}={counters[f'escalated_{reason}']}"
+                            for reason in ("invalid", "low_confidence", "near_boundary"))
+        lines.append(f"  Escalation reasons: {reasons}.")
+        return "\n".join(lines)
+
+########################################
+# 2) CONCURRENT GRADING ENGINE
+########################################
+DEFAULT_CONCURRENCY = 8
+# Rough allowance for the model's reply when budgeting tokens per request.
+COMPLETION_TOKEN_ESTIMATE = 300
+
+def estimate_tokens(text):
+    """
+    Cheap token estimate (about four characters per token) used for rate budgeting.
+    """
+    return len(text) // 4 + 1
+
+class RateLimiter:
+    """
+    Thread-safe sliding-window limiter for requests and tokens per minute.
+    Either limit may be None to leave it uncapped. A single instance can be
+    shared by several grading runs to enforce one global API budget.
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None, window_seconds=60.0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.window_seconds = window_seconds
+        self._events = deque()  # (timestamp, tokens) for each request in the window.
+        self._tokens_in_window = 0
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        while self._events and now - self._events[0][0] >= self.window_seconds:
+            _, tokens = self._events.popleft()
+            self._tokens_in_window -= tokens
+
+    def _has_capacity(self, tokens):
+        if not self._events:
+            # An empty window always admits one request, even an oversized one.
+            return True
+        if self.requests_per_minute is not None and len(self._events) >= self.requests_per_minute:
+            return False
+        if self.tokens_per_minute is not None and self._tokens_in_window + tokens > self.tokens_per_minute:
+            return False
+        return True
+
+    def acquire(self, tokens=0):
+        """
+        Blocks until a request costing `tokens` fits in the current window, then records it.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._expire(now)
+                if self._has_capacity(tokens):
+                    self._events.append((now, tokens))
+                    self._tokens_in_window += tokens
+                    return
+                wait = self._events[0][0] + self.window_seconds - now
+            time.sleep(max(wait, 0.01))
+
+class TokenReport:
+    """
+    Thread-safe token accounting for one grading run. Tracks the tokens actually sent
+    and compares them with an estimate of grading every API-graded answer on its own.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.batch_requests = 0
+        self.answers_graded = 0
+        self.fallback_answers = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.estimated_prompt_tokens = 0
+        self.estimated_unbatched_prompt_tokens = 0
+        self._lock = threading.Lock()
+
+    def record_request(self, prompt, usage=None):
+        """Records one API request, using the provider's usage numbers when available."""
+        estimated = estimate_tokens(SYSTEM_PROMPT + prompt)
+        with self._lock:
+            self.requests += 1
+            self.estimated_prompt_tokens += estimated
+            self.prompt_tokens += getattr(usage, "prompt_tokens", None) or estimated
+            self.completion_tokens += getattr(usage, "completion_tokens", None) or 0
+
+    def record_batch(self):
+        with self._lock:
+            self.batch_requests += 1
+
+    def record_answers(self, rubric_text, custom_prompt, answers, fallback=False):
+        """Records answers graded through the API and what they would cost one per request."""
+        estimated = sum(
+            estimate_tokens(SYSTEM_PROMPT + build_grading_prompt(rubric_text, answer, custom_prompt))
+            for answer in answers
+        )
+        with self._lock:
+            self.answers_graded += len(answers)
+            self.estimated_unbatched_prompt_tokens += estimated
+            if fallback:
+                self.fallback_answers += len(answers)
+
+    def summary(self):
+        with self._lock:
+            lines = [
+                f"Token report: {self.answers_graded} answers graded in {self.requests} API requests "
+                f"({self.fallback_answers} fell back to per-answer grading).",
+                f"  Prompt tokens sent: {self.prompt_tokens} (estimated {self.estimated_prompt_tokens}); "
+                f"completion tokens: {self.completion_tokens}.",
+                f"  Estimated prompt tokens if unbatched: {self.estimated_unbatched_prompt_tokens} "
+                f"in {self.answers_graded} requests.",
+            ]
+            if self.batch_requests and self.estimated_unbatched_prompt_tokens:
+                saved = 1 - self.estimated_prompt_tokens / self.estimated_unbatched_prompt_tokens
+                lines.append(f"  Estimated prompt-token savings from batching: {saved:.0%}.")
+            return "\n".join(lines)
+
+class RunStats:
+    """
+    Thread-safe counters for one grading run, plus the rows that could not be graded
+    and per-stage timings (see metrics.StageTimings).
+    """
+
+    def __init__(self):
+        self.counters = Counter()
+        self.timings = StageTimings()
+        self.failed_rows = []
+        self._lock = threading.Lock()
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def add_failed_row(self, row_idx):
+        with self._lock:
+            self.failed_rows.append(row_idx)
+
+    def summary(self):
+        with self._lock:
+            counters = ", ".join(f"{name}={count}" for name, count in sorted(self.counters.items()))
+            failed = ", ".join(str(row_idx) for row_idx in sorted(self.failed_rows)) or "none"
+            return f"Run stats: {counters or 'no events'}; failed rows: {failed}."
+
+MAX_PARSE_ATTEMPTS = 3
+PARSE_RETRY_BASE_DELAY = 1.0  # Seconds; doubled after every malformed reply.
+
+# Marks a row whose API calls exhausted their retries; it is re-tried once at the end of the run.
+_DEAD_LETTER = object()
+# Marks a row that is still waiting for its grade.
+_PENDING = object()
+
+def grade_answers_concurrently(jobs, rubric_text, custom_prompt, max_workers=DEFAULT_CONCURRENCY, rate_limiter=None,
+                               cache=None, batch_size=1, token_report=None, stats=None,
+                               max_parse_attempts=MAX_PARSE_ATTEMPTS, parse_retry_delay=PARSE_RETRY_BASE_DELAY,
+                               caller=None, clusterer=None, cascade=None, session=None):
+    """
+    Grades (row_idx, student_answer) jobs on a thread pool capped at max_workers,
+    optionally throttled by a RateLimiter. Yields (row_idx, grade) pairs in the same
+    order as jobs, each as soon as it and every job before it has finished. A grade is
+    the validated dict from parse_grade_result, or None if the row could not be graded.
+    jobs may be any iterable, including a generator reading the sheet page by page: only
+    a bounded window of rows (about 2 * max_workers * batch_size) is held at a time.
+    
+    When a GradeCache is given, cached results are returned without calling the API.
+    With batch_size > 1, uncached answers are packed batch_size per request; any rows a
+    batched reply fails to cover are re-graded one at a time. Malformed replies are
+    counted in stats and retried with exponential backoff up to max_parse_attempts times.
+    
+    Transient API errors are retried by caller (a ResilientCaller with a per-run circuit
+    breaker). Rows that still fail go to a dead-letter list and are re-processed once after
+    every other row, so they are yielded last; rows that fail again are yielded with None.
     
-    answer = response.choices[0].message.content.strip()
-    return answer
+    With an answer_clusters.AnswerClusterer, uncached answers that fall in the same cluster
+    as an earlier row are not sent: they receive that representative row's grade.
+    
+    With a ModelCascade, answers (and batches) go to its first model, and each grade that
+    fails validation or meets an escalation rule is graded again, on its own, by the next
+    model. Only the last tier retries malformed replies. Per-tier requests, kept and
+    escalated answers are counted in stats, and each tier's API latency is timed as the
+    "tier<N>_api" stage.
+    
+    Requests go through session's pooled OpenAI client (default: the shared session).
+    """
+    if stats is None:
+        stats = RunStats()
+    if caller is None:
+        caller = ResilientCaller(stats=stats)
+    timings = stats.timings
+    if session is None:
+        session = default_session()
+    models = cascade.models if cascade is not None else (DEFAULT_MODEL,)
+    escalates = cascade is not None and cascade.escalates
+    instructions = GRADING_INSTRUCTIONS
+    batch_instructions = BATCH_GRADING_INSTRUCTIONS
+    if escalates:
+        instructions += CONFIDENCE_INSTRUCTION
+        batch_instructions += CONFIDENCE_INSTRUCTION
+    cache_model = cascade.cache_model if cascade is not None else DEFAULT_MODEL
+
+    def cache_key_for(student_answer):
+        return cache_key(custom_prompt, rubric_text, student_answer, cache_model, DEFAULT_TEMPERATURE)
+
+    def store(student_answer, grade):
+        if cache is not None:
+            cache.put(cache_key_for(student_answer), json.dumps(grade, ensure_ascii=False))
+
+    def count_tier(name, amount=1):
+        if escalates:
+            stats.increment(name, amount)
+
+    def request(prompt, tier, answers=1):
+        # The limiter is charged inside the retried call, so retries count against the budget too.
+        estimated_tokens = estimate_tokens(prompt) + COMPLETION_TOKEN_ESTIMATE * answers
+        if not escalates:
+            return _create_chat_completion(prompt, token_report, caller, stats, models[tier], session,
+                                           rate_limiter, estimated_tokens)
+        count_tier(f"tier{tier}_requests")
+        with timings.span(f"tier{tier}_api"):
+            return _create_chat_completion(prompt, token_report, caller, stats, models[tier], session,
+                                           rate_limiter, estimated_tokens)
+
+    def escalate(row_idx, tier, reason):
+        logging.info(f"Row {row_idx} escalated from {models[tier]} to {models[tier + 1]}: {reason}.")
+        count_tier(f"tier{tier}_escalated")
+        count_tier(f"escalated_{reason}")
+
+    def grade_single(row_idx, student_answer, fallback=False, first_tier=0):
+        with timings.span("prompt_build"):
+            prompt = build_grading_prompt(rubric_text, student_answer, custom_prompt, instructions)
+        for tier in range(first_tier, len(models)):
+            last_tier = tier == len(models) - 1
+            # Lower tiers escalate a malformed reply instead of retrying it.
+            attempts = max_parse_attempts if last_tier else 1
+            grade = None
+            for attempt in range(1, attempts + 1):
+                try:
+                    graded_result = request(prompt, tier)
+                except (RetriesExhaustedError, CircuitOpenError) as e:
+                    logging.warning(f"Row {row_idx} moved to the dead-letter list: {e}")
+                    stats.increment("dead_lettered")
+                    return _DEAD_LETTER
+                try:
+                    with timings.span("parse"):
+                        grade = parse_grade_result(graded_result)
+                    break
+                except GradeParseError as e:
+                    stats.increment("malformed_results")
+                    logging.warning(f"Malformed grade for row {row_idx} (attempt {attempt} of {attempts}): {e}")
+                    if attempt < attempts:
+                        stats.increment("parse_retries")
+                        time.sleep(parse_retry_delay * 2 ** (attempt - 1))
+            if grade is None:
+                if last_tier:
+                    break
+                escalate(row_idx, tier, "invalid")
+                continue
+            reason = None if last_tier else cascade.escalation_reason(grade)
+            if reason is not None:
+                escalate(row_idx, tier, reason)
+                continue
+            count_tier(f"tier{tier}_accepted")
+            if token_report is not None:
+                token_report.record_answers(rubric_text, custom_prompt, [student_answer], fallback=fallback)
+            store(student_answer, grade)
+            return grade
+        stats.add_failed_row(row_idx)
+        return None
+
+    def grade_chunk(chunk):
+        if len(chunk) == 1:
+            row_idx, student_answer = chunk[0]
+            return {row_idx: grade_single(row_idx, student_answer)}
+        with timings.span("prompt_build"):
+            prompt = build_batch_grading_prompt(rubric_text, chunk, custom_prompt, batch_instructions)
+        try:
+            content = request(prompt, 0, len(chunk))
+            with timings.span("parse"):
+                results = parse_batch_response(content, chunk)
+        except (RetriesExhaustedError, CircuitOpenError) as e:
+            logging.warning(f"Batch of {len(chunk)} answers moved to the dead-letter list: {e}")
+            stats.increment("dead_lettered", len(chunk))
+            return {row_idx: _DEAD_LETTER for row_idx, _ in chunk}
+        except BatchParseError as e:
+            stats.increment("malformed_batches")
+            logging.warning(f"Batch of {len(chunk)} answers could not be parsed ({e}); grading them one at a time.")
+            results = {}
+        escalated = set()
+        if escalates:
+            for row_idx in list(results):
+                reason = cascade.escalation_reason(results[row_idx])
+                if reason is not None:
+                    escalate(row_idx, 0, reason)
+                    escalated.add(row_idx)
+                    del results[row_idx]
+            count_tier("tier0_accepted", len(results))
+        answered = [(row_idx, answer) for row_idx, answer in chunk if row_idx in results]
+        if token_report is not None:
+            token_report.record_batch()
+            token_report.record_answers(rubric_text, custom_prompt, [answer for _, answer in answered])
+        for row_idx, student_answer in chunk:
+            if row_idx in results:
+                store(student_answer, results[row_idx])
+            elif row_idx in escalated:
+                results[row_idx] = grade_single(row_idx, student_answer, first_tier=1)
+            else:
+                results[row_idx] = grade_single(row_idx, student_answer, fallback=True)
+        return results
+
+    # Rows flow through a bounded window in job order: each entry is
+    # [row_idx, student_answer, grade, future, source_row], where grade is _PENDING until its
+    # chunk finishes and source_row is the row whose result it takes (its cluster representative).
+    batch_size = max(1, batch_size)
+    max_window = max(1, max_workers) * batch_size * 2
+    window = deque()
+    chunk = []
+    chunk_entries = []
+    dead_letters = []
+    # Cluster representatives still in the window, and the grades of those that have left it.
+    representative_entries = {}
+    representative_grades = {}
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+
+    def submit_chunk():
+        if chunk:
+            future = executor.submit(grade_chunk, list(chunk))
+            for entry in chunk_entries:
+                entry[3] = future
+            chunk.clear()
+            chunk_entries.clear()
+
+    def drain(limit):
+        # Yields finished rows from the head of the window, blocking while more than `limit` are pending.
+        while window:
+            entry = window[0]
+            row_idx, student_answer, grade, future, source_row = entry
+            if grade is _PENDING:
+                if future is None:
+                    if len(window) <= limit:
+                        return
+                    submit_chunk()
+                    future = entry[3]
+                if not future.done() and len(window) <= limit:
+                    return
+                grade = future.result()[source_row]
+            window.popleft()
+            if representative_entries.pop(row_idx, None) is not None:
+                representative_grades[row_idx] = grade
+            if grade is _DEAD_LETTER:
+                dead_letters.append((row_idx, student_answer, source_row))
+            else:
+                if grade is None and source_row != row_idx:
+                    stats.add_failed_row(row_idx)
+                yield row_idx, grade
+
+    try:
+        for row_idx, student_answer in jobs:
+            grade = _PENDING
+            if cache is not None:
+                with timings.span("cache_lookup"):
+                    cached_result = cache.get(cache_key_for(student_answer))
+                    if cached_result is not None:
+                        try:
+                            grade = parse_grade_result(cached_result)
+                            stats.increment("cache_hits")
+                        except GradeParseError:
+                            pass  # Entries from before results were validated; grade them again.
+            entry = [row_idx, student_answer, grade, None, row_idx]
+            representative = row_idx
+            if grade is _PENDING and clusterer is not None:
+                representative = clusterer.assign(row_idx, student_answer)
+            if representative != row_idx:
+                stats.increment("deduplicated")
+                entry[4] = representative
+                if representative in representative_grades:
+                    entry[2] = representative_grades[representative]
+                else:
+                    # Shares the representative's future, which is set when its chunk is submitted.
+                    entry[3] = representative_entries[representative][3]
+                    if entry[3] is None:
+                        chunk_entries.append(entry)
+                window.append(entry)
+            else:
+                window.append(entry)
+                if grade is _PENDING:
+                    if clusterer is not None:
+                        representative_entries[row_idx] = entry
+                    chunk.append((row_idx, student_answer))
+                    chunk_entries.append(entry)
+                    if len(chunk) >= batch_size:
+                        submit_chunk()
+            yield from drain(max_window)
+        submit_chunk()
+        yield from drain(0)
+
+        if dead_letters:
+            print(f"Re-processing {len(dead_letters)} dead-lettered rows...")
+            caller.breaker.reset()
+            # Only cluster representatives are graded again; their duplicates take the result.
+            retries = {}
+            for row_idx, student_answer, source_row in dead_letters:
+                if source_row not in retries:
+                    retries[source_row] = executor.submit(grade_single, source_row, student_answer)
+            for row_idx, _, source_row in dead_letters:
+                grade = retries[source_row].result()
+                if grade is _DEAD_LETTER:
+                    stats.add_failed_row(row_idx)
+                    grade = None
+                elif grade is None and source_row != row_idx:
+                    stats.add_failed_row(row_idx)
+                yield row_idx, grade
+    finally:
+        # Drop queued work if the caller stops early (e.g. Ctrl+C or an API error).
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def prefetch(iterable, maxsize):
+    """
+    Runs `iterable` on a background thread, keeping at most `maxsize` items buffered in a
+    bounded queue. Lets sheet reads overlap with grading without reading the whole sheet ahead.
+    """
+    items = queue.Queue(maxsize=max(1, maxsize))
+    stop = threading.Event()
+    done = object()
+
+    def put(item, error=None):
+        # Gives up once the consumer has gone away so the thread never blocks forever.
+        while not stop.is_set():
+            try:
+                items.put((item, error), timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+            put(done)
+        except BaseException as e:
+            put(done, e)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+
+class GradingProgress:
+    """
+    Point-in-time progress of a grading run, passed to progress callbacks.
+    rows_total is None until the size of the sheet is known; eta_seconds is None with it.
+    """
+
+    def __init__(self, rows_done, rows_graded, rows_total, elapsed_seconds):
+        self.rows_done = rows_done
+        self.rows_graded = rows_graded
+        self.rows_total = rows_total
+        self.elapsed_seconds = elapsed_seconds
+        self.rows_per_second = rows_done / elapsed_seconds if elapsed_seconds > 0 else 0.0
+        self.eta_seconds = None
+        if rows_total is not None and self.rows_per_second > 0:
+            self.eta_seconds = max(0, rows_total - rows_done) / self.rows_per_second
+
+    def __str__(self):
+        total = f"/{self.rows_total}" if self.rows_total is not None else ""
+        eta = f", ETA {self.eta_seconds:.0f}s" if self.eta_seconds is not None else ""
+        return (f"{self.rows_done}{total} rows done ({self.rows_graded} graded), "
+                f"{self.rows_per_second:.1f} rows/s{eta}")
+
+class ProgressTracker:
+    """
+    Thread-safe row counter that reports a GradingProgress to `callback` as rows finish.
+    Skipped rows count as done. Set rows_total once the sheet size is known.
+    """
+
+    def __init__(self, callback=None, rows_total=None):
+        self.callback = callback
+        self.rows_total = rows_total
+        self._rows_done = 0
+        self._rows_graded = 0
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def advance(self, rows=1, graded=False):
+        with self._lock:
+            self._rows_done += rows
+            if graded:
+                self._rows_graded += rows
+            progress = self.progress_locked()
+        if self.callback is not None:
+            self.callback(progress)
+
+    def progress_locked(self):
+        return GradingProgress(self._rows_done, self._rows_graded, self.rows_total, time.monotonic() - self._started)
+
+    def progress(self):
+        with self._lock:
+            return self.progress_locked()
+
+def throttled_progress_printer(interval_seconds=2.0, label=None):
+    """
+    Returns a progress callback that prints at most one line every interval_seconds,
+    prefixed with label when several runs share the console.
+    """
+    last_printed = [0.0]
+    prefix = f"Progress ({label})" if label else "Progress"
+
+    def print_progress(progress):
+        now = time.monotonic()
+        if now - last_printed[0] >= interval_seconds:
+            last_printed[0] = now
+            print(f"{prefix}: {progress}")
+
+    return print_progress
+
+########################################
+# 3) SPREADSHEET SNAPSHOT
+########################################
+def quote_sheet_name(sheet_name):
+    """
+    Quotes a worksheet title for use in an A1 range ("sample rubric" -> "'sample rubric'").
+    """
+    return "'" + sheet_name.replace("'", "''") + "'"
+
+@dataclass(frozen=True)
+class SheetSnapshot:
+    """
+    Immutable copy of everything a grading run reads from the spreadsheet: the custom
+    prompt, the rubric and the answers sheet (headers plus data rows from row 2 on).
+    Rows are tuples trimmed of trailing empty cells, as the Sheets API returns them.
+    answer_rows_limit is set when only the first rows of the answers sheet were fetched.
+    """
+    custom_prompt: str
+    rubric_rows: tuple
+    rubric_text: str
+    answer_headers: tuple
+    answer_rows: tuple
+    answer_rows_limit: object = None
+
+def load_sheet_snapshot(spreadsheet, answers_sheet_name="sampel answers", rubric_sheet_name="sample rubric",
+                        prompt_sheet_name="Prompt", rubric_range="A1:E8", answer_rows_limit=None):
+    """
+    Fetches the prompt, rubric and answers ranges with a single values batch-get request
+    and returns them as a SheetSnapshot. With answer_rows_limit, only the header row and
+    that many answer rows are fetched; the rest can be streamed with iter_answer_rows.
+    """
+    answers_range = quote_sheet_name(answers_sheet_name)
+    if answer_rows_limit is not None:
+        answers_range += f"!1:{answer_rows_limit + 1}"
+    ranges = [
+        f"{quote_sheet_name(prompt_sheet_name)}!1:2",
+        f"{quote_sheet_name(rubric_sheet_name)}!{rubric_range}",
+        answers_range,
+    ]
+    response = spreadsheet.values_batch_get(ranges)
+    prompt_values, rubric_values, answer_values = (
+        value_range.get("values", []) for value_range in response["valueRanges"]
+    )
+    if not answer_values:
+        raise Exception("The answers sheet is empty.")
+    rubric_rows = tuple(tuple(row) for row in rubric_values)
+    return SheetSnapshot(
+        custom_prompt=parse_custom_prompt(prompt_values),
+        rubric_rows=rubric_rows,
+        rubric_text=format_rubric_rows(rubric_rows),
+        answer_headers=tuple(answer_values[0]),
+        answer_rows=tuple(tuple(row) for row in answer_values[1:]),
+        answer_rows_limit=answer_rows_limit,
+    )
+
+def iter_answer_rows(snapshot, worksheet, page_size=None, timings=None):
+    """
+    Yields (row_idx, row) for every answer row: first the rows held in the snapshot, then,
+    if the snapshot only holds the first rows, further pages of page_size rows read from the
+    worksheet with ranged gets. Paging runs through the worksheet's row_count, so answers
+    after a run of blank rows longer than a page are still read, and past it until a page
+    comes back empty (row_count may be stale cached metadata). Page reads are recorded as
+    the "sheet_load" stage of timings when given.
+    """
+    yield from enumerate(snapshot.answer_rows, start=2)
+    if snapshot.answer_rows_limit is None:
+        return
+    page_size = page_size or snapshot.answer_rows_limit
+    row_count = getattr(worksheet, "row_count", None)
+    next_row = 2 + snapshot.answer_rows_limit
+    while True:
+        end_row = next_row + page_size - 1
+        if timings is not None:
+            with timings.span("sheet_load"):
+                values = worksheet.get(f"{next_row}:{end_row}")
+        else:
+            values = worksheet.get(f"{next_row}:{end_row}")
+        if not values and (row_count is None or end_row >= row_count):
+            return
+        yield from enumerate(values, start=next_row)
+        next_row = end_row + 1
+
+class SheetMetadataCache:
+    """
+    Small JSON file remembering spreadsheet keys and worksheet properties between runs,
+    so opening a known spreadsheet and its answers worksheet needs no lookup requests.
+    If a worksheet is renamed or deleted, rerun with --refresh-metadata.
+    """
+
+    def __init__(self, path=DEFAULT_METADATA_CACHE_PATH):
+        self.path = path
+        self._data = {}
+        self._dirty = False
+        # Shared by assignments graded in parallel (see batch_grade.py).
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r") as cache_file:
+                self._data = json.load(cache_file)
+        except FileNotFoundError:
+            pass
+        except (OSError, json.JSONDecodeError) as e:
+            logging.warning(f"Ignoring unreadable sheet metadata cache {path}: {e}")
+
+    def get_spreadsheet_id(self, spreadsheet_name):
+        with self._lock:
+            return self._data.get("spreadsheets", {}).get(spreadsheet_name)
+
+    def set_spreadsheet_id(self, spreadsheet_name, spreadsheet_id):
+        with self._lock:
+            self._data.setdefault("spreadsheets", {})[spreadsheet_name] = spreadsheet_id
+            self._dirty = True
+
+    def get_worksheet_properties(self, spreadsheet_id, title):
+        with self._lock:
+            return self._data.get("worksheets", {}).get(spreadsheet_id, {}).get(title)
+
+    def set_worksheet_properties(self, spreadsheet_id, title, properties):
+        with self._lock:
+            self._data.setdefault("worksheets", {}).setdefault(spreadsheet_id, {})[title] = properties
+            self._dirty = True
+
+    def clear(self):
+        with self._lock:
+            self._data = {}
+            self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as cache_file:
+                json.dump(self._data, cache_file, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
 
-def process_student_answers(spreadsheet, answers_sheet_name="sampel answers", rubric_sheet_name="sample rubric", prompt_sheet_name="Prompt"):
+def worksheet_from_properties(spreadsheet, properties):
+    """
+    Builds a gspread Worksheet from its sheet properties without an API request. The
+    constructor differs between gspread releases: 5.x takes (spreadsheet, properties),
+    6.0 takes (spreadsheet_id, client, properties) and 6.1+ requires all four.
+    """
+    parameters = inspect.signature(gspread.Worksheet.__init__).parameters
+    if "spreadsheet_id" not in parameters:
+        return gspread.Worksheet(spreadsheet, properties)
+    if "spreadsheet" not in parameters:
+        return gspread.Worksheet(spreadsheet.id, spreadsheet.client, properties)
+    return gspread.Worksheet(spreadsheet, properties, spreadsheet.id, spreadsheet.client)
+
+def open_worksheet(spreadsheet, title, metadata_cache=None):
+    """
+    Returns the named worksheet, building it from cached properties when possible instead of
+    asking the API for the spreadsheet's metadata again.
+    """
+    spreadsheet_id = getattr(spreadsheet, "id", None)
+    if metadata_cache is not None and spreadsheet_id and isinstance(spreadsheet, gspread.Spreadsheet):
+        properties = metadata_cache.get_worksheet_properties(spreadsheet_id, title)
+        if properties:
+            return worksheet_from_properties(spreadsheet, properties)
+    worksheet = spreadsheet.worksheet(title)
+    properties = getattr(worksheet, "_properties", None)
+    if metadata_cache is not None and spreadsheet_id and properties:
+        metadata_cache.set_worksheet_properties(spreadsheet_id, title, properties)
+    return worksheet
+
+# Answer rows read per request when streaming a sheet.
+DEFAULT_PAGE_SIZE = 500
+
+GRADE_HEADER = "Grade"
+EXPLANATION_HEADER = "Explanation"
+FINGERPRINT_HEADER = "Answer Fingerprint"
+
+def get_rubric_criteria(rubric_text):
+    """
+    Lists the criterion names in a rubric text block built by get_rubric_text: the first
+    cell of every row after the header row, in rubric order.
+    """
+    criteria = []
+    for line in rubric_text.splitlines()[1:]:
+        name = line.split(" | ", 1)[0].strip()
+        if name and name not in criteria:
+            criteria.append(name)
+    return criteria
+
+def score_header(criterion):
+    return f"{criterion} Score"
+
+def _criterion_key(name):
+    return re.sub(r"\W+", " ", name).strip().lower()
+
+def grade_row_values(grade, criteria):
+    """
+    Fans a validated grade out into {header: value} for the Grade, per-criterion score and
+    Explanation columns. Criteria are matched to rubric names ignoring case and punctuation;
+    rubric criteria the model did not score are left blank.
+    """
+    scores = {_criterion_key(name): score for name, score in grade["Criteria"].items()}
+    values = {GRADE_HEADER: grade["Overall"]}
+    for criterion in criteria:
+        values[score_header(criterion)] = scores.get(_criterion_key(criterion), "")
+    values[EXPLANATION_HEADER] = grade["Explanation"]
+    return values
+
+def ensure_columns(worksheet, headers, column_names):
+    """
+    Returns the 0-based index of each named column, appending any missing headers
+    to row 1 in a single batch update. `headers` is extended in place.
+    """
+    missing = [name for name in column_names if name not in headers]
+    if missing:
+        with SheetWriteBuffer(worksheet, flush_every=None, flush_interval=None) as header_buffer:
+            header_buffer.add_row(1, len(headers) + 1, missing)
+        headers.extend(missing)
+    return {name: headers.index(name) for name in column_names}
+
+def row_cell(row, col_index):
+    return row[col_index].strip() if col_index < len(row) else ""
+
+def needs_grading(row, student_answer, grade_col_index, fingerprint_col_index, regrade_unfingerprinted=False):
+    """
+    Incremental-mode check: a row needs grading when its Grade cell is empty or the
+    stored answer fingerprint no longer matches the current answer. Rows graded before
+    fingerprints were recorded have no way to tell whether the answer changed: they are
+    treated as up to date unless regrade_unfingerprinted is set, in which case they are
+    graded once more so their fingerprint gets written.
+    """
+    if not row_cell(row, grade_col_index):
+        return True
+    stored_fingerprint = row_cell(row, fingerprint_col_index)
+    if not stored_fingerprint:
+        return regrade_unfingerprinted
+    return stored_fingerprint != answer_fingerprint(student_answer)
+
+@dataclass(frozen=True)
+class GradingSummary:
+    """
+    Outcome of one process_student_answers run. rows_failed counts rows left ungraded
+    after every retry; cache_hits counts rows served from the grade cache; deduplicated
+    counts rows given the grade of an identical or near-identical answer.
+    """
+    rows_done: int
+    rows_graded: int
+    rows_failed: int
+    cache_hits: int
+    api_requests: int
+    elapsed_seconds: float
+    deduplicated: int = 0
+
+def process_student_answers(spreadsheet, answers_sheet_name="sampel answers", rubric_sheet_name="sample rubric", prompt_sheet_name="Prompt",
+                            max_workers=DEFAULT_CONCURRENCY, rate_limiter=None,
+                            flush_every=DEFAULT_FLUSH_EVERY, flush_interval=DEFAULT_FLUSH_INTERVAL, cache=None,
+                            incremental=False, batch_size=1, caller=None, snapshot=None, metadata_cache=None,
+                            page_size=DEFAULT_PAGE_SIZE, progress=None, rubric_range="A1:E8", quiet=False,
+                            metrics_sink=None, dedupe_threshold=None, cascade=None, session=None,
+                            regrade_unfingerprinted=False):
     """
     Reads student answers from the answers sheet, grades them using the rubric from the rubric sheet
     and the custom prompt from the Prompt worksheet, and writes the grading results back to the answers sheet.
+    Up to max_workers answers are graded in parallel; results are buffered and written back in
+    batches of flush_every rows (or every flush_interval seconds), with a final flush on exit.
+    Answers already graded with the same prompt, rubric and model are served from the cache.
+    
+    Each grade is stored with a fingerprint of the answer it was given for. In incremental mode
+    only rows with an empty Grade cell or a changed answer are graded, so re-runs during class
+    touch just the new submissions and an interrupted run resumes where its last flush ended.
+    Graded rows without a fingerprint (graded before fingerprints were stored) are skipped and
+    counted as "skipped_unfingerprinted"; regrade_unfingerprinted=True grades them once instead
+    so that later incremental runs can detect edits to them.
+    
+    With batch_size > 1, that many answers share one API request; a token report comparing the
+    batched cost with one-request-per-answer grading is printed at the end.
+    
+    With dedupe_threshold set, answers are clustered as they stream in (see answer_clusters):
+    only the first answer of each cluster is graded and its grade is written to every other row
+    whose normalized answer is identical or at least that similar. 1.0 groups exact duplicates only.
+    
+    Pass a ModelCascade to grade with a cheap model first and escalate uncertain or
+    near-boundary grades to stronger ones; a per-tier report is printed at the end.
+    
+    API requests go through session (a GradingSession; default: the shared session).
+    
+    Transient API errors are retried with backoff (see resilience.ResilientCaller); rows that
+    exhaust their retries are re-processed at the end instead of aborting the run.
+    
+    The prompt, rubric and answers are read in one batch request (see load_sheet_snapshot)
+    unless a SheetSnapshot is passed in. With page_size set, that request only covers the first
+    page of answers and the rest are streamed in pages of page_size rows, so memory stays flat
+    for very large sheets; page_size=None reads the whole sheet up front. Pass a ProgressTracker
+    to receive rows done, rows/sec and ETA as the run advances; its rows_total is set up front
+    (when paging, estimated from the worksheet's row count, which includes trailing blank rows)
+    and corrected once the last page has been read.
+    
+    Sheet load, prompt build, API calls, parsing, cache lookups and write-back are timed as
+    stages and summarized at the end. quiet=True drops the prompt, rubric and per-row prints,
+    which slow down large runs. Pass a metrics sink (see metrics.open_metrics_sink) to export
+    the run's counters and stage timings.
+    
+    Returns a GradingSummary of the run.
     """
-    # Access the worksheets by name.
-    worksheet_answers = spreadsheet.worksheet(answers_sheet_name)
-    worksheet_rubric = spreadsheet.worksheet(rubric_sheet_name)
+    started = time.monotonic()
+    stats = RunStats()
+    timings = stats.timings
+    if snapshot is None:
+        with timings.span("sheet_load"):
+            snapshot = load_sheet_snapshot(spreadsheet, answers_sheet_name, rubric_sheet_name, prompt_sheet_name,
+                                           rubric_range=rubric_range, answer_rows_limit=page_size)
+    # Only the answers worksheet is written to; the others are read through the snapshot.
+    worksheet_answers = open_worksheet(spreadsheet, answers_sheet_name, metadata_cache)
     
-    # Get the custom grading prompt from the "Prompt" worksheet.
-    custom_prompt = get_custom_prompt_text(spreadsheet, prompt_sheet_name)
-    print("Custom Grading Prompt loaded:\n", custom_prompt)
+    # The custom grading prompt from the "Prompt" worksheet.
+    custom_prompt = snapshot.custom_prompt
+    if not quiet:
+        print("Custom Grading Prompt loaded:\n", custom_prompt)
     
-    # Retrieve and format the rubric.
-    rubric_text = get_rubric_text(worksheet_rubric, cell_range="A1:E8")
-    print("Rubric loaded:\n", rubric_text)
+    # The formatted rubric.
+    rubric_text = snapshot.rubric_text
+    if not quiet:
+        print("Rubric loaded:\n", rubric_text)
     
-    # Retrieve all data from the answers sheet (assumes row 1 contains headers).
-    answers_data = worksheet_answers.get_all_values()
-    headers = answers_data[0]
+    # The answers sheet data (assumes row 1 contains headers).
+    headers = list(snapshot.answer_headers)
     
     # Determine the column containing student responses. We assume the header is exactly "Answer".
     try:
@@ -138,40 +1420,313 @@ def process_student_answers(spreadsheet, answers_sheet_name="sampel answers", ru
     except ValueError:
         raise Exception("The header 'Answer' was not found in the answers sheet.")
     
-    # Check for the "Grade" column. If missing, create it as the next column.
-    if "Grade" not in headers:
-        worksheet_answers.update_cell(1, len(headers) + 1, "Grade")
-        grade_col_index = len(headers)  # update_cell uses 1-indexed column numbers.
-    else:
-        grade_col_index = headers.index("Grade")
-    
-    # Process each student's answer (skip the header row).
-    for row_idx, row in enumerate(answers_data[1:], start=2):
-        student_answer = row[answer_col_index]
-        if not student_answer.strip():
-            continue  # Skip empty responses.
-        
-        print(f"Grading answer on row {row_idx}...")
-        graded_result = grade_response_with_openai(rubric_text, student_answer, custom_prompt)
-        print(f"Graded result for row {row_idx}: {graded_result}")
-        
-        # Write the graded result back to the "Grade" column.
-        worksheet_answers.update_cell(row_idx, grade_col_index + 1, graded_result)
-
-def main():
+    # Check for the "Grade", per-criterion score, "Explanation" and fingerprint columns.
+    # If missing, create them as the next columns so each row's result is one contiguous range.
+    criteria = get_rubric_criteria(rubric_text)
+    result_headers = [GRADE_HEADER] + [score_header(c) for c in criteria] + [EXPLANATION_HEADER]
+    columns = ensure_columns(worksheet_answers, headers, result_headers + [FINGERPRINT_HEADER])
+    grade_col_index = columns[GRADE_HEADER]
+    fingerprint_col_index = columns[FINGERPRINT_HEADER]
+    
+    token_report = TokenReport()
+    if caller is None:
+        caller = ResilientCaller(stats=stats)
+    elif caller.stats is None:
+        caller.stats = stats
+    if progress is None:
+        progress = ProgressTracker()
+    if snapshot.answer_rows_limit is None:
+        progress.rows_total = len(snapshot.answer_rows)
+    elif getattr(worksheet_answers, "row_count", None):
+        # An estimate from the worksheet's grid size until the last page has been read.
+        progress.rows_total = max(worksheet_answers.row_count - 1, len(snapshot.answer_rows))
+    answers_by_row = {}  # Answers of rows currently in the pipeline, for their fingerprints.
+    clusterer = AnswerClusterer(dedupe_threshold) if dedupe_threshold else None
+    
+    def iter_jobs():
+        # Walk each student's answer (the header row is already excluded), one page at a time.
+        skipped = 0
+        unfingerprinted = 0
+        rows_seen = 0
+        for row_idx, row in iter_answer_rows(snapshot, worksheet_answers, page_size, timings):
+            rows_seen += 1
+            student_answer = row[answer_col_index] if answer_col_index < len(row) else ""
+            if not student_answer.strip():
+                progress.advance()
+                continue  # Skip empty responses.
+            if incremental and not needs_grading(row, student_answer, grade_col_index, fingerprint_col_index,
+                                                 regrade_unfingerprinted):
+                skipped += 1
+                if not row_cell(row, fingerprint_col_index):
+                    unfingerprinted += 1
+                progress.advance()
+                continue
+            answers_by_row[row_idx] = student_answer
+            yield row_idx, student_answer
+        progress.rows_total = rows_seen
+        if incremental:
+            print(f"Incremental mode: {skipped} rows already graded and unchanged.")
+        if unfingerprinted:
+            stats.increment("skipped_unfingerprinted", unfingerprinted)
+            print(f"{unfingerprinted} of them have no answer fingerprint, so edits to their answers cannot be "
+                  f"detected; run once with --regrade-unfingerprinted to grade them again and store one.")
+    
+    print(f"Grading answers with up to {max_workers} concurrent requests...")
+    # Bounded stages: a reader thread pages through the sheet into a small queue, the grading
+    # engine keeps a bounded window of requests in flight, and the write buffer flushes in batches.
+    jobs = prefetch(iter_jobs(), maxsize=max(page_size or 0, max_workers * batch_size * 2))
+    results = grade_answers_concurrently(jobs, rubric_text, custom_prompt, max_workers=max_workers,
+                                         rate_limiter=rate_limiter, cache=cache, batch_size=batch_size,
+                                         token_report=token_report, stats=stats, caller=caller,
+                                         clusterer=clusterer, cascade=cascade, session=session)
+    write_buffer = SheetWriteBuffer(worksheet_answers, flush_every=flush_every, flush_interval=flush_interval,
+                                    on_flush=lambda cells, seconds: timings.record("write_back", seconds))
+    with write_buffer:
+        for row_idx, grade in results:
+            student_answer = answers_by_row.pop(row_idx)
+            if grade is None:
+                if not quiet:
+                    print(f"Row {row_idx} could not be graded; leaving it empty for the next run.")
+                progress.advance()
+                continue
+            if not quiet:
+                print(f"Graded result for row {row_idx}: {json.dumps(grade, ensure_ascii=False)}")
+            
+            # Queue the result columns and the answer fingerprint; the buffer writes them in a batch.
+            row_values = {columns[header] + 1: value for header, value in grade_row_values(grade, criteria).items()}
+            row_values[fingerprint_col_index + 1] = answer_fingerprint(student_answer)
+            write_buffer.add_cells(row_idx, row_values)
+            progress.advance(graded=True)
+    print(f"Done: {progress.progress()}.")
+    print(f"Wrote {write_buffer.cells_written} cells in {write_buffer.flush_count} batch updates.")
+    if cache is not None:
+        print(f"Grade cache: {cache.hits} hits, {cache.misses} misses.")
+    if clusterer is not None:
+        print(clusterer.summary(batch_size))
+    if cascade is not None and cascade.escalates:
+        print(cascade.summary(stats))
+    print(token_report.summary())
+    print(stats.summary())
+    print(timings.summary())
+    final_progress = progress.progress()
+    summary = GradingSummary(
+        rows_done=final_progress.rows_done,
+        rows_graded=final_progress.rows_graded,
+        rows_failed=len(stats.failed_rows),
+        cache_hits=stats.counters["cache_hits"],
+        api_requests=token_report.requests,
+        elapsed_seconds=time.monotonic() - started,
+        deduplicated=stats.counters["deduplicated"],
+    )
+    if metrics_sink is not None:
+        labels = {"spreadsheet": getattr(spreadsheet, "title", ""), "answers_sheet": answers_sheet_name}
+        counters = dict(stats.counters)
+        counters.update(
+            rows_done=summary.rows_done,
+            rows_graded=summary.rows_graded,
+            rows_failed=summary.rows_failed,
+            cache_hits=summary.cache_hits,
+            deduplicated=summary.deduplicated,
+            api_requests=token_report.requests,
+            prompt_tokens=token_report.prompt_tokens,
+            completion_tokens=token_report.completion_tokens,
+            cells_written=write_buffer.cells_written,
+            write_batches=write_buffer.flush_count,
+            elapsed_seconds=round(summary.elapsed_seconds, 3),
+        )
+        metrics_sink.write(labels, counters, timings)
+    return summary
+
+def add_run_arguments(parser):
+    """
+    Adds the grading, rate-limit, cache and retry options shared by grading.py and batch_grade.py.
+    """
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="Maximum number of grading requests in flight at once.")
+    parser.add_argument("--requests-per-minute", type=int, default=None,
+                        help="Cap on OpenAI requests per minute (default: uncapped).")
+    parser.add_argument("--tokens-per-minute", type=int, default=None,
+                        help="Cap on estimated OpenAI tokens per minute (default: uncapped).")
+    parser.add_argument("--openai-base-url", default=None,
+                        help="Send requests to another chat-completions endpoint, e.g. fake_openai_server.py.")
+    parser.add_argument("--flush-every", type=int, default=DEFAULT_FLUSH_EVERY,
+                        help="Write graded results back to the sheet every N rows.")
+    parser.add_argument("--flush-interval", type=float, default=DEFAULT_FLUSH_INTERVAL,
+                        help="Also write back pending results once they are this many seconds old.")
+    parser.add_argument("--cache-path", default=DEFAULT_CACHE_PATH,
+                        help="SQLite file that stores previously graded answers.")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Bypass the grade cache and call the API for every answer.")
+    parser.add_argument("--clear-cache", action="store_true",
+                        help="Delete every cached grade before grading.")
+    parser.add_argument("--cache-max-entries", type=int, default=DEFAULT_MAX_ENTRIES,
+                        help="Evict least recently used grades beyond this many entries.")
+    parser.add_argument("--cache-max-age-days", type=float, default=DEFAULT_MAX_AGE_DAYS,
+                        help="Evict grades older than this many days.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only grade rows with an empty Grade cell or an answer that changed since it was graded.")
+    parser.add_argument("--regrade-unfingerprinted", action="store_true",
+                        help="With --incremental, also grade rows that have a grade but no answer fingerprint "
+                             "(graded before fingerprints were stored), so later runs can detect their edits.")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="Grade this many answers per API request, sending the prompt and rubric once.")
+    parser.add_argument("--dedupe-threshold", type=float, default=None,
+                        help="Grade each cluster of near-identical answers once (Jaccard similarity, "
+                             "e.g. 0.9; 1.0 groups exact duplicates only). Off by default.")
+    parser.add_argument("--models", default=None,
+                        help=f"Comma-separated models to grade with, cheapest first (default: {DEFAULT_MODEL}). "
+                             "With several, uncertain grades are escalated to the next model.")
+    parser.add_argument("--min-confidence", type=float, default=DEFAULT_MIN_CONFIDENCE,
+                        help="Escalate grades whose self-reported confidence (0-1) is below this.")
+    parser.add_argument("--score-boundaries", default=None,
+                        help="Comma-separated Overall score cutoffs, e.g. 60,70,80,90; "
+                             "grades near one are escalated.")
+    parser.add_argument("--boundary-margin", type=float, default=DEFAULT_BOUNDARY_MARGIN,
+                        help="How close (in points) to a score boundary counts as near it.")
+    parser.add_argument("--metadata-cache", default=DEFAULT_METADATA_CACHE_PATH,
+                        help="JSON file remembering spreadsheet keys and worksheet properties between runs.")
+    parser.add_argument("--refresh-metadata", action="store_true",
+                        help="Ignore cached spreadsheet/worksheet metadata and look everything up again.")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE,
+                        help="Read the answers sheet this many rows at a time (0 reads it all at once).")
+    parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS,
+                        help="Attempts per API call before a row is dead-lettered.")
+    parser.add_argument("--breaker-threshold", type=int, default=DEFAULT_FAILURE_THRESHOLD,
+                        help="Consecutive API failures that open the circuit breaker.")
+    parser.add_argument("--breaker-cooldown", type=float, default=DEFAULT_COOLDOWN_SECONDS,
+                        help="Seconds the circuit breaker stays open before a trial request.")
+    parser.add_argument("--quiet", action="store_true",
+                        help="Skip printing the prompt, rubric and every graded row; summaries are still printed.")
+    parser.add_argument("--metrics-file", default=None,
+                        help="Write run counters and stage timings here: Prometheus text for *.prom, else JSON lines.")
+    return parser
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Grade student answers in a Google Sheet with OpenAI.")
+    add_run_arguments(parser)
+    return parser.parse_args(argv)
+
+def session_from_args(args, creds_json_path=creds_json_path, concurrent_requests=None):
+    """
+    Builds a GradingSession for the command-line options, with a connection pool sized for
+    concurrent_requests (default: --concurrency), and starts creating its clients.
+    """
+    session = GradingSession(
+        base_url=args.openai_base_url,
+        creds_json_path=creds_json_path,
+        max_connections=max(DEFAULT_MAX_CONNECTIONS, concurrent_requests or args.concurrency)
+    )
+    session.warm_up()
+    return session
+
+def parse_number_list(text):
+    """
+    Parses "60, 70,80" (or a list from a manifest) into a tuple of floats.
+    """
+    if isinstance(text, str):
+        text = [part for part in text.split(",") if part.strip()]
+    return tuple(float(value) for value in text)
+
+def build_cascade(models, min_confidence=DEFAULT_MIN_CONFIDENCE, boundaries=(),
+                  boundary_margin=DEFAULT_BOUNDARY_MARGIN):
+    """
+    Returns a ModelCascade for a comma-separated string or list of models, or None when
+    no models are given (grade with DEFAULT_MODEL).
+    """
+    if isinstance(models, str):
+        models = [model.strip() for model in models.split(",")]
+    models = tuple(model for model in models or () if model)
+    if not models:
+        return None
+    return ModelCascade(models, min_confidence, parse_number_list(boundaries or ()), boundary_margin)
+
+def cascade_from_args(args):
+    return build_cascade(args.models, args.min_confidence, args.score_boundaries, args.boundary_margin)
+
+def rate_limiter_from_args(args):
+    """
+    Returns a RateLimiter for the requested budget, or None when uncapped.
+    """
+    if args.requests_per_minute or args.tokens_per_minute:
+        return RateLimiter(args.requests_per_minute, args.tokens_per_minute)
+    return None
+
+def caller_from_args(args):
+    """
+    Returns a ResilientCaller with its own circuit breaker; build one per grading run.
+    """
+    return ResilientCaller(
+        max_attempts=args.max_attempts,
+        breaker=CircuitBreaker(args.breaker_threshold, args.breaker_cooldown)
+    )
+
+def grade_cache_from_args(args):
+    """
+    Opens the grade cache (clearing it first with --clear-cache), or returns None with --no-cache.
+    """
+    if args.no_cache and not args.clear_cache:
+        return None
+    cache = GradeCache(args.cache_path, max_entries=args.cache_max_entries, max_age_days=args.cache_max_age_days)
+    if args.clear_cache:
+        cache.clear()
+        print(f"Cleared grade cache at {args.cache_path}.")
+    if args.no_cache:
+        cache.close()
+        return None
+    return cache
+
+def metadata_cache_from_args(args):
+    metadata_cache = SheetMetadataCache(args.metadata_cache)
+    if args.refresh_metadata:
+        metadata_cache.clear()
+    return metadata_cache
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Key loading and Google authorization run in the background while the caches open.
+    session = session_from_args(args)
+    rate_limiter = rate_limiter_from_args(args)
+    caller = caller_from_args(args)
+    cache = grade_cache_from_args(args)
+
     # Spreadsheet name as provided.
     spreadsheet_name = "Sample Responses"
     
+    metadata_cache = metadata_cache_from_args(args)
+    
     # Authorize and open the spreadsheet.
-    spreadsheet = authorize_google_sheets(creds_json_path, spreadsheet_name)
+    spreadsheet = session.open_spreadsheet(spreadsheet_name, metadata_cache)
     
     # Process and grade student answers using the rubric and custom prompt.
-    process_student_answers(
-        spreadsheet,
-        answers_sheet_name="sampel answers",
-        rubric_sheet_name="sample rubric",
-        prompt_sheet_name="Prompt"
-    )
+    try:
+        process_student_answers(
+            spreadsheet,
+            answers_sheet_name="sampel answers",
+            rubric_sheet_name="sample rubric",
+            prompt_sheet_name="Prompt",
+            max_workers=args.concurrency,
+            rate_limiter=rate_limiter,
+            flush_every=args.flush_every,
+            flush_interval=args.flush_interval,
+            cache=cache,
+            incremental=args.incremental,
+            regrade_unfingerprinted=args.regrade_unfingerprinted,
+            batch_size=args.batch_size,
+            caller=caller,
+            metadata_cache=metadata_cache,
+            page_size=args.page_size or None,
+            progress=ProgressTracker(throttled_progress_printer()),
+            quiet=args.quiet,
+            metrics_sink=open_metrics_sink(args.metrics_file),
+            dedupe_threshold=args.dedupe_threshold,
+            cascade=cascade_from_args(args),
+            session=session
+        )
+    finally:
+        metadata_cache.save()
+        if cache is not None:
+            cache.close()
+        session.close()
 
 if __name__ == "__main__":
     main()
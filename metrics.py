@@ -0,0 +1,174 @@
+"""
+Stage timings and metrics export for grading runs.
+
+StageTimings records how long each stage of a run takes (sheet load, prompt build,
+API request, parse, write-back, ...) as spans:
+
+    timings = StageTimings()
+    with timings.span("parse"):
+        grade = parse_grade_result(content)
+
+At the end of a run its per-stage summary and the run's counters (tokens, retries,
+cache hits, ...) can be written to a metrics sink: a JSONL file that gets one line
+per run, or a Prometheus text-format file (for node_exporter's textfile collector)
+that always holds the latest values for each run's labels.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+# Samples kept per stage for percentiles; beyond this a uniform reservoir sample is kept.
+MAX_SAMPLES_PER_STAGE = 4096
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+class StageTimings:
+    """Thread-safe duration statistics per named stage."""
+
+    def __init__(self):
+        self._stages = {}
+        self._lock = threading.Lock()
+        self._random = random.Random(0)
+
+    def record(self, stage, seconds):
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                entry = self._stages[stage] = {"count": 0, "total": 0.0, "max": 0.0, "samples": []}
+            entry["count"] += 1
+            entry["total"] += seconds
+            entry["max"] = max(entry["max"], seconds)
+            samples = entry["samples"]
+            if len(samples) < MAX_SAMPLES_PER_STAGE:
+                samples.append(seconds)
+            else:
+                slot = self._random.randrange(entry["count"])
+                if slot < MAX_SAMPLES_PER_STAGE:
+                    samples[slot] = seconds
+
+    @contextmanager
+    def span(self, stage):
+        """Times the body of a with-block as one sample of stage, even if it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started)
+
+    def snapshot(self):
+        """Returns {stage: {count, total_seconds, mean_ms, p50_ms, p95_ms, max_ms}} in first-seen order."""
+        with self._lock:
+            stages = {stage: dict(entry, samples=sorted(entry["samples"])) for stage, entry in self._stages.items()}
+        return {
+            stage: {
+                "count": entry["count"],
+                "total_seconds": entry["total"],
+                "mean_ms": entry["total"] / entry["count"] * 1000,
+                "p50_ms": _percentile(entry["samples"], 0.50) * 1000,
+                "p95_ms": _percentile(entry["samples"], 0.95) * 1000,
+                "max_ms": entry["max"] * 1000,
+            }
+            for stage, entry in stages.items()
+        }
+
+    def summary(self):
+        lines = ["Stage timings:"]
+        for stage, stats in self.snapshot().items():
+            lines.append(f"  {stage}: {stats['count']} x, {stats['total_seconds']:.2f}s total, "
+                         f"p50 {stats['p50_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms, max {stats['max_ms']:.1f} ms")
+        return "\n".join(lines) if len(lines) > 1 else "Stage timings: none recorded."
+
+
+class JsonlMetricsSink:
+    """Appends one JSON object per run: labels, counters and stage timings."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def write(self, labels, counters, timings):
+        record = {
+            "timestamp": time.time(),
+            "labels": dict(labels),
+            "counters": dict(counters),
+            "stages": timings.snapshot(),
+        }
+        line = json.dumps(record, sort_keys=True)
+        with self._lock, open(self.path, "a") as metrics_file:
+            metrics_file.write(line + "\n")
+
+
+def _prometheus_labels(labels):
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in sorted(labels.items())) + "}"
+
+
+class PrometheusMetricsSink:
+    """
+    Keeps the latest counters and stage timings for every label set written so far and
+    rewrites the whole file in Prometheus text format on each write.
+    """
+
+    def __init__(self, path, prefix="grading"):
+        self.path = path
+        self.prefix = prefix
+        self._runs = {}
+        self._lock = threading.Lock()
+
+    def write(self, labels, counters, timings):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._runs[key] = (dict(counters), timings.snapshot())
+            text = self._render()
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as metrics_file:
+                metrics_file.write(text)
+            os.replace(tmp_path, self.path)
+
+    def _render(self):
+        counter_lines = {}
+        stage_lines = {"stage_seconds_total": [], "stage_count": [], "stage_p50_seconds": [],
+                       "stage_p95_seconds": [], "stage_max_seconds": []}
+        for key, (counters, stages) in self._runs.items():
+            labels = dict(key)
+            for name, value in sorted(counters.items()):
+                counter_lines.setdefault(name, []).append(f"{self.prefix}_{name}{_prometheus_labels(labels)} {value}")
+            for stage, stats in stages.items():
+                stage_labels = _prometheus_labels(dict(labels, stage=stage))
+                stage_lines["stage_seconds_total"].append(
+                    f"{self.prefix}_stage_seconds_total{stage_labels} {stats['total_seconds']:.6f}")
+                stage_lines["stage_count"].append(f"{self.prefix}_stage_count{stage_labels} {stats['count']}")
+                stage_lines["stage_p50_seconds"].append(
+                    f"{self.prefix}_stage_p50_seconds{stage_labels} {stats['p50_ms'] / 1000:.6f}")
+                stage_lines["stage_p95_seconds"].append(
+                    f"{self.prefix}_stage_p95_seconds{stage_labels} {stats['p95_ms'] / 1000:.6f}")
+                stage_lines["stage_max_seconds"].append(
+                    f"{self.prefix}_stage_max_seconds{stage_labels} {stats['max_ms'] / 1000:.6f}")
+
+        out = []
+        for name, lines in sorted(counter_lines.items()):
+            out.append(f"# TYPE {self.prefix}_{name} gauge")
+            out.extend(lines)
+        for name, lines in stage_lines.items():
+            if lines:
+                out.append(f"# TYPE {self.prefix}_{name} gauge")
+                out.extend(lines)
+        return "\n".join(out) + "\n"
+
+
+def open_metrics_sink(path):
+    """Returns a Prometheus sink for *.prom paths and a JSONL sink otherwise; None for no path."""
+    if not path:
+        return None
+    if path.endswith(".prom"):
+        return PrometheusMetricsSink(path)
+    return JsonlMetricsSink(path)
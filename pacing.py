@@ -0,0 +1,440 @@
+"""
+Pacing logic for the Pacing & Content Hub, kept free of Streamlit so it can be
+benchmarked and reused outside the app.
+
+A section's pacing maps its plan (lessons in order, each lasting `duration_days`
+meetings) onto the section's meeting days from the master schedule.
+"""
+
+import time
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+PACING_COLUMNS = ["date", "block_id", "lesson_id", "title", "type", "day_index", "duration_days"]
+PLAN_COLUMNS = ["order", "lesson_id", "title", "type", "unit", "lesson_no", "duration_days"]
+CONTENT_SORT_COLUMNS = ["unit", "lesson_no", "order"]
+
+
+def prepare_content(content_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns course content in its canonical form: order, unit and lesson_no as ints
+    (missing or invalid values become 1) and rows sorted by unit, lesson number and
+    order. Content is stored this way so readers can use it without copying or sorting.
+    """
+    if content_df.empty:
+        return content_df.reset_index(drop=True)
+    df = content_df.copy()
+    for col in CONTENT_SORT_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(1).astype(int)
+    return df.sort_values(CONTENT_SORT_COLUMNS, kind="stable").reset_index(drop=True)
+
+
+def plan_from_content(content_df: pd.DataFrame) -> pd.DataFrame:
+    """Builds a plan with every lesson in the prepared content, one day each."""
+    plan = content_df[PLAN_COLUMNS[:-1]].copy()
+    plan["duration_days"] = 1
+    return plan
+
+
+def seed_plan(content_df: pd.DataFrame, plan_df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """
+    Returns plan_df with the prepared content's lessons it is missing appended, re-sorted
+    and renumbered, or None when nothing is missing. Missing lessons are found by looking
+    the content's lesson ids up in an index of the plan's ids.
+    """
+    if content_df.empty:
+        return None
+    if plan_df is None or plan_df.empty:
+        missing = np.ones(len(content_df), dtype=bool)
+        plan_df = pd.DataFrame(columns=PLAN_COLUMNS)
+    else:
+        plan_ids = pd.Index(plan_df["lesson_id"]).unique()
+        missing = plan_ids.get_indexer(content_df["lesson_id"]) < 0
+    if not missing.any():
+        return None
+
+    new_plan_items = plan_from_content(content_df[missing])
+    updated_plan = pd.concat([plan_df, new_plan_items], ignore_index=True) if not plan_df.empty else new_plan_items
+    updated_plan = updated_plan.sort_values(CONTENT_SORT_COLUMNS, kind="stable").reset_index(drop=True)
+    updated_plan["order"] = range(1, len(updated_plan) + 1)
+    return updated_plan
+
+
+def _frame_kind(df: pd.DataFrame) -> tuple:
+    """Column names and dtypes: frames of the same kind concatenate without changing either."""
+    return tuple(df.columns), tuple(df.dtypes)
+
+
+def _split_by_section(df: pd.DataFrame, counts: np.ndarray) -> List[pd.DataFrame]:
+    """Splits a frame sorted by its "_section" column into one frame per section of counts[k] rows."""
+    df = df.drop(columns="_section")
+    bounds = np.concatenate([[0], np.cumsum(counts)])
+    return [df.iloc[bounds[k]:bounds[k + 1]].reset_index(drop=True) for k in range(len(counts))]
+
+
+def seed_plans(content_df: pd.DataFrame,
+               plans: Dict[str, Optional[pd.DataFrame]]) -> Dict[str, Optional[pd.DataFrame]]:
+    """
+    seed_plan for many sections at once: returns {section_id: updated plan or None}.
+
+    Plans of the same columns and dtypes (with integer sort columns) are handled together:
+    one lesson-id membership matrix finds every section's missing lessons, and one stable
+    sort of all appended plans, keyed by section first, re-sorts and renumbers them. Other
+    plans go through seed_plan one by one. The result is identical to calling seed_plan
+    for each section.
+    """
+    results: Dict[str, Optional[pd.DataFrame]] = {}
+    if content_df.empty:
+        return {section_id: None for section_id in plans}
+
+    full_plan = None
+    groups: Dict[tuple, List[str]] = {}
+    for section_id, plan in plans.items():
+        if plan is None or plan.empty:
+            if full_plan is None:
+                full_plan = seed_plan(content_df, None)
+            results[section_id] = full_plan.copy()
+        elif all(col in plan and pd.api.types.is_integer_dtype(plan[col]) for col in CONTENT_SORT_COLUMNS):
+            groups.setdefault(_frame_kind(plan), []).append(section_id)
+        else:
+            results[section_id] = seed_plan(content_df, plan)
+
+    lesson_ids = pd.Index(content_df["lesson_id"]).unique()
+    content_codes = lesson_ids.get_indexer(content_df["lesson_id"])
+    for section_ids in groups.values():
+        group_plans = [plans[section_id] for section_id in section_ids]
+        sizes = np.array([len(plan) for plan in group_plans])
+        plan_section = np.repeat(np.arange(len(group_plans)), sizes)
+        combined = pd.concat(group_plans, ignore_index=True)
+
+        # present[k, code]: section k's plan already has the content lesson with that id code.
+        plan_codes = lesson_ids.get_indexer(combined["lesson_id"])
+        known = plan_codes >= 0
+        present = np.zeros((len(group_plans), len(lesson_ids)), dtype=bool)
+        present[plan_section[known], plan_codes[known]] = True
+        missing = ~present[:, content_codes]
+        missing_counts = missing.sum(axis=1)
+        for section_id in np.asarray(section_ids)[missing_counts == 0]:
+            results[section_id] = None
+        seeded = np.flatnonzero(missing_counts)
+        if not len(seeded):
+            continue
+
+        # Row-major nonzero keeps each section's new lessons together and in content order.
+        new_section, new_rows = np.nonzero(missing[seeded])
+        new_items = plan_from_content(content_df.iloc[new_rows])
+        new_items["_section"] = new_section
+        keep = np.isin(plan_section, seeded)
+        existing = combined[keep].copy()
+        existing["_section"] = np.searchsorted(seeded, plan_section[keep])
+        updated = pd.concat([existing, new_items], ignore_index=True)
+        updated = updated.sort_values(["_section"] + CONTENT_SORT_COLUMNS, kind="stable")
+        updated["order"] = updated.groupby("_section").cumcount().to_numpy() + 1
+        for k, plan in zip(seeded, _split_by_section(updated, sizes[seeded] + missing_counts[seeded])):
+            results[section_ids[k]] = plan
+    return {section_id: results[section_id] for section_id in plans}
+
+
+def empty_pacing() -> pd.DataFrame:
+    """Returns a pacing DataFrame with the standard columns and no rows."""
+    return pd.DataFrame(columns=PACING_COLUMNS)
+
+
+def meeting_days(schedule: pd.DataFrame) -> pd.DataFrame:
+    """Returns the schedule rows that have a block assigned, sorted by date."""
+    return schedule[schedule["block_id"].notna()].sort_values("date", kind="stable").reset_index(drop=True)
+
+
+class PacingIndex:
+    """
+    A section's pacing together with the index needed to update it incrementally.
+
+    `lesson_starts` is a prefix sum of lesson spans: plan row i begins on meeting
+    `lesson_starts[i]`, so the pacing rows for every lesson before it are exactly
+    `pacing.iloc[:lesson_starts[i]]`. Changing one lesson's duration keeps that prefix
+    and regenerates only the rows from the edited lesson onward.
+    """
+
+    def __init__(self, schedule: pd.DataFrame, plan: pd.DataFrame):
+        self._set_inputs(plan, meeting_days(schedule) if schedule is not None and not schedule.empty else None)
+        self.pacing = self._pace_from(0)
+
+    @classmethod
+    def from_parts(cls, plan: pd.DataFrame, meetings: pd.DataFrame, pacing: pd.DataFrame) -> "PacingIndex":
+        """Wraps pacing already built from plan and meetings (see pace_sections) without rebuilding it."""
+        index = cls.__new__(cls)
+        index._set_inputs(plan, meetings)
+        index.pacing = pacing
+        return index
+
+    def _set_inputs(self, plan: Optional[pd.DataFrame], meetings: Optional[pd.DataFrame]):
+        self.plan = plan
+        self.meetings = meetings
+        durations = plan["duration_days"].to_numpy().astype(np.int64) if plan is not None else np.zeros(0, np.int64)
+        self.durations = durations
+        self.spans = np.maximum(durations, 1)
+        self.lesson_starts = np.cumsum(self.spans) - self.spans
+
+    @property
+    def num_meetings(self) -> int:
+        return 0 if self.meetings is None else len(self.meetings)
+
+    def _pace_from(self, first_row: int) -> pd.DataFrame:
+        """Builds the pacing rows for plan rows first_row onward."""
+        if first_row >= len(self.spans) or self.lesson_starts[first_row] >= self.num_meetings:
+            return empty_pacing()
+
+        first_day = int(self.lesson_starts[first_row])
+        # Only lessons that start before the schedule runs out appear in the pacing.
+        end_row = int(np.searchsorted(self.lesson_starts, self.num_meetings, side="left"))
+        spans = self.spans[first_row:end_row]
+        num_days = min(int(spans.sum()), self.num_meetings - first_day)
+
+        # Each pacing row belongs to plan row lesson_pos; day_index counts from that lesson's first meeting.
+        lesson_pos = first_row + np.repeat(np.arange(len(spans)), spans)[:num_days]
+        day_index = np.arange(first_day, first_day + num_days) - self.lesson_starts[lesson_pos] + 1
+        days = slice(first_day, first_day + num_days)
+
+        return pd.DataFrame({
+            "date": self.meetings["date"].to_numpy()[days],
+            "block_id": self.meetings["block_id"].to_numpy()[days],
+            "lesson_id": self.plan["lesson_id"].to_numpy()[lesson_pos],
+            "title": self.plan["title"].to_numpy()[lesson_pos],
+            "type": self.plan["type"].to_numpy()[lesson_pos],
+            "day_index": day_index,
+            "duration_days": self.durations[lesson_pos],
+        })
+
+    def set_duration(self, lesson_pos: int, duration_days: int) -> pd.DataFrame:
+        """
+        Changes the duration of plan row lesson_pos and returns the updated pacing.
+        Only the prefix sums and pacing rows from that lesson onward are recomputed;
+        `plan` is replaced with an updated copy.
+        """
+        duration_days = int(duration_days)
+        span = max(duration_days, 1)
+        plan = self.plan.copy()
+        plan.iloc[lesson_pos, plan.columns.get_loc("duration_days")] = duration_days
+        self.plan = plan
+        self.durations[lesson_pos] = duration_days
+        shift = span - self.spans[lesson_pos]
+        self.spans[lesson_pos] = span
+        self.lesson_starts[lesson_pos + 1:] += shift
+
+        keep = min(int(self.lesson_starts[lesson_pos]), len(self.pacing))
+        suffix = self._pace_from(lesson_pos)
+        if suffix.empty:
+            self.pacing = self.pacing.iloc[:keep].reset_index(drop=True)
+        else:
+            self.pacing = pd.concat([self.pacing.iloc[:keep], suffix], ignore_index=True)
+        return self.pacing
+
+
+def pace_sections(sections: Dict[str, Tuple[pd.DataFrame, pd.DataFrame]]) -> Dict[str, PacingIndex]:
+    """
+    Builds a PacingIndex for every {section_id: (schedule, plan)}, each with a non-empty
+    schedule and plan, equal to PacingIndex(schedule, plan).
+
+    Sections whose schedules and plans have the same columns and dtypes are paced together:
+    their meeting days come from one filter and sort over all their schedules, and their
+    pacing rows from one repeat over all their plans, split back per section at the end.
+    """
+    results: Dict[str, PacingIndex] = {}
+    groups: Dict[tuple, List[str]] = {}
+    for section_id, (schedule, plan) in sections.items():
+        groups.setdefault((_frame_kind(schedule), _frame_kind(plan)), []).append(section_id)
+
+    for section_ids in groups.values():
+        schedules = [sections[section_id][0] for section_id in section_ids]
+        plans = [sections[section_id][1] for section_id in section_ids]
+        num_sections = len(section_ids)
+
+        schedule_section = np.repeat(np.arange(num_sections), [len(schedule) for schedule in schedules])
+        meetings = pd.concat(schedules, ignore_index=True)
+        meetings["_section"] = schedule_section
+        meetings = meetings[meetings["block_id"].notna()].sort_values(["_section", "date"], kind="stable")
+        meeting_counts = np.bincount(meetings["_section"].to_numpy(), minlength=num_sections)
+        meeting_offsets = np.cumsum(meeting_counts) - meeting_counts
+
+        plan_sizes = np.array([len(plan) for plan in plans])
+        plan_section = np.repeat(np.arange(num_sections), plan_sizes)
+        combined_plan = pd.concat(plans, ignore_index=True)
+        durations = combined_plan["duration_days"].to_numpy().astype(np.int64)
+        spans = np.maximum(durations, 1)
+        # Each section's lesson_starts: the running total of spans, restarted at the section's first lesson.
+        ends = np.cumsum(spans)
+        section_ends = ends[np.cumsum(plan_sizes) - 1]
+        lesson_starts = ends - spans - np.concatenate([[0], section_ends[:-1]])[plan_section]
+
+        # Meetings each lesson covers: its span, cut at the end of the section's schedule.
+        emitted = np.clip(np.minimum(spans, meeting_counts[plan_section] - lesson_starts), 0, None)
+        lesson_pos = np.repeat(np.arange(len(spans)), emitted)
+        day_index = np.arange(len(lesson_pos)) - np.repeat(np.cumsum(emitted) - emitted, emitted) + 1
+        meeting_rows = meeting_offsets[plan_section[lesson_pos]] + lesson_starts[lesson_pos] + day_index - 1
+        pacing = pd.DataFrame({
+            "date": meetings["date"].to_numpy()[meeting_rows],
+            "block_id": meetings["block_id"].to_numpy()[meeting_rows],
+            "lesson_id": combined_plan["lesson_id"].to_numpy()[lesson_pos],
+            "title": combined_plan["title"].to_numpy()[lesson_pos],
+            "type": combined_plan["type"].to_numpy()[lesson_pos],
+            "day_index": day_index,
+            "duration_days": durations[lesson_pos],
+            "_section": plan_section[lesson_pos],
+        })
+        pacing_counts = np.bincount(plan_section, weights=emitted, minlength=num_sections).astype(np.int64)
+
+        section_meetings = _split_by_section(meetings, meeting_counts)
+        section_pacing = _split_by_section(pacing, pacing_counts)
+        for k, section_id in enumerate(section_ids):
+            section_pace = section_pacing[k] if pacing_counts[k] else empty_pacing()
+            results[section_id] = PacingIndex.from_parts(plans[k], section_meetings[k], section_pace)
+    return results
+
+
+def build_pacing(schedule: pd.DataFrame, plan: pd.DataFrame) -> pd.DataFrame:
+    """
+    Generates the dated pacing schedule by mapping the plan to meeting days.
+
+    Each lesson occupies `duration_days` consecutive meetings (at least one). Rather
+    than walking the meetings one by one, lesson durations are expanded with a repeat
+    and lined up against the sorted meeting dates in one step; lessons that do not fit
+    before the schedule ends are dropped.
+    """
+    if schedule is None or plan is None or schedule.empty or plan.empty:
+        return empty_pacing()
+    return PacingIndex(schedule, plan).pacing
+
+
+class PacingStore:
+    """
+    Read-only, date-indexed view of one section's pacing for calendar and student views.
+
+    Rows are kept as records in date order next to a sorted list of their dates, so a
+    week or month is found by bisection instead of masking the whole DataFrame.
+    """
+
+    def __init__(self, pacing: pd.DataFrame):
+        self.pacing = pacing
+        ordered = pacing.sort_values("date", kind="stable") if not pacing.empty else pacing
+        self.records = ordered.to_dict("records")
+        self.dates = [record["date"] for record in self.records]
+
+    def between(self, start: date, end: date) -> List[Dict]:
+        """Returns the pacing rows dated start through end (inclusive), in date order."""
+        return self.records[bisect_left(self.dates, start):bisect_right(self.dates, end)]
+
+    def by_date(self, start: date, end: date) -> Dict[date, List[Dict]]:
+        """Groups the rows dated start through end by date; days without lessons are omitted."""
+        days: Dict[date, List[Dict]] = {}
+        for record in self.between(start, end):
+            days.setdefault(record["date"], []).append(record)
+        return days
+
+
+def build_content_lookup(content_df: pd.DataFrame) -> Dict[str, Dict]:
+    """Maps each lesson_id to its content row as a dict (the last row wins for duplicate ids)."""
+    if content_df.empty:
+        return {}
+    return dict(zip(content_df["lesson_id"], content_df.to_dict("records")))
+
+
+@dataclass
+class SectionRepace:
+    """
+    One section's result from bulk_repace; index is None when the section has no pacing.
+    seconds is the section's own time, unless bulk is set: sections re-paced together in
+    one in-process pass all carry the pass's average (its time divided by the sections).
+    """
+    section_id: str
+    plan: pd.DataFrame
+    index: Optional[PacingIndex]
+    pacing: pd.DataFrame
+    reseeded: bool
+    seconds: float
+    bulk: bool = False
+
+
+def repace_section(section_id: str, content_df: pd.DataFrame, plan: Optional[pd.DataFrame],
+                   schedule: Optional[pd.DataFrame], reseed: bool = True) -> SectionRepace:
+    """
+    Adds lessons missing from a section's plan (when reseed is set, or when it has no plan
+    yet) and rebuilds its pacing, timing both steps.
+    """
+    started = time.perf_counter()
+    reseeded = False
+    if reseed or plan is None:
+        updated_plan = seed_plan(content_df, plan)
+        if updated_plan is not None:
+            plan, reseeded = updated_plan, True
+    if plan is None:
+        plan = pd.DataFrame(columns=PLAN_COLUMNS)
+        reseeded = True
+
+    index = None
+    pacing = empty_pacing()
+    if schedule is not None and not schedule.empty and not plan.empty:
+        index = PacingIndex(schedule, plan)
+        pacing = index.pacing
+    return SectionRepace(section_id, plan, index, pacing, reseeded, time.perf_counter() - started)
+
+
+# Content shared with process-pool workers once, instead of pickling it for every section.
+_worker_content: Optional[pd.DataFrame] = None
+
+
+def _init_worker(content_df: pd.DataFrame):
+    global _worker_content
+    _worker_content = content_df
+
+
+def _repace_in_worker(job: tuple) -> SectionRepace:
+    section_id, plan, schedule, reseed = job
+    return repace_section(section_id, _worker_content, plan, schedule, reseed)
+
+
+def bulk_repace(content_df: pd.DataFrame, plans: Dict[str, Optional[pd.DataFrame]],
+                schedules: Dict[str, Optional[pd.DataFrame]], reseed: bool = True,
+                processes: Optional[int] = None) -> List[SectionRepace]:
+    """
+    Reseeds and re-paces every section in `schedules` against the same prepared content.
+    Sections missing from `plans` get a plan built from the content. Results match
+    repace_section for each section and keep the order of `schedules`.
+
+    In-process, all sections are reseeded in one seed_plans pass and paced in one
+    pace_sections pass, so per-section times are only an average (see SectionRepace).
+    With processes > 1 the sections are spread over a process pool and timed one by one.
+    """
+    jobs = [(section_id, plans.get(section_id), schedule, reseed) for section_id, schedule in schedules.items()]
+    if processes and processes > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                 initargs=(content_df,)) as pool:
+            return list(pool.map(_repace_in_worker, jobs))
+
+    started = time.perf_counter()
+    seeded = seed_plans(content_df, {section_id: plan for section_id, plan, _, reseed in jobs
+                                     if reseed or plan is None})
+    section_plans = {}
+    reseeded = {}
+    for section_id, plan, _, _ in jobs:
+        updated_plan = seeded.get(section_id)
+        if updated_plan is not None:
+            plan = updated_plan
+        reseeded[section_id] = updated_plan is not None or plan is None
+        section_plans[section_id] = plan if plan is not None else pd.DataFrame(columns=PLAN_COLUMNS)
+
+    indexes = pace_sections({section_id: (schedule, section_plans[section_id]) for section_id, _, schedule, _ in jobs
+                             if schedule is not None and not schedule.empty and not section_plans[section_id].empty})
+    seconds = (time.perf_counter() - started) / max(1, len(jobs))
+    results = []
+    for section_id, _, _, _ in jobs:
+        index = indexes.get(section_id)
+        pacing = index.pacing if index is not None else empty_pacing()
+        results.append(SectionRepace(section_id, section_plans[section_id], index, pacing, reseeded[section_id],
+                                     seconds, bulk=True))
+    return results
@@ -0,0 +1,200 @@
+"""
+Retry, backoff and circuit breaking for OpenAI calls.
+
+A ResilientCaller wraps each chat-completions request: transient failures (429,
+5xx, timeouts and connection errors) are retried with jittered exponential backoff
+that honors the provider's Retry-After header, and a per-run CircuitBreaker pauses
+every worker once the provider keeps failing instead of letting each one hammer it.
+Calls that still fail raise RetriesExhaustedError so the caller can dead-letter the row.
+"""
+
+import email.utils
+import logging
+import random
+import threading
+import time
+
+import openai
+
+DEFAULT_MAX_ATTEMPTS = 6
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 60.0
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_COOLDOWN_SECONDS = 30.0
+DEFAULT_MAX_TRIPS = 5
+
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+
+class RetriesExhaustedError(Exception):
+    """Raised when a call still fails after every allowed attempt."""
+
+    def __init__(self, attempts, last_error):
+        super().__init__(f"Gave up after {attempts} attempts: {last_error}")
+        self.attempts = attempts
+        self.last_error = last_error
+
+
+class CircuitOpenError(Exception):
+    """Raised when the circuit breaker has tripped too many times to keep trying this run."""
+
+
+def is_retryable(error):
+    """True for rate limits, server errors, timeouts and dropped connections."""
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        return False
+    return status_code in RETRYABLE_STATUS_CODES or status_code >= 500
+
+
+def retry_after_seconds(error):
+    """Reads Retry-After (seconds or HTTP date) or retry-after-ms from an API error, if present."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def backoff_delay(attempt, base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY, retry_after=None):
+    """
+    Full-jitter exponential backoff for the given 1-based attempt. A Retry-After hint from
+    the provider is treated as a floor, with a little jitter so workers do not retry in lockstep.
+    """
+    delay = random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+    if retry_after is not None:
+        delay = max(delay, retry_after + random.uniform(0, base_delay))
+    return delay
+
+
+class CircuitBreaker:
+    """
+    Per-run breaker shared by all grading threads.
+
+    After `failure_threshold` consecutive failures it opens and every caller waits out
+    `cooldown_seconds`. One trial call is then let through (half-open): success closes
+    the breaker, failure opens it again. Once it has tripped more than `max_trips` times,
+    callers get CircuitOpenError instead of waiting so the run can finish.
+    """
+
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, cooldown_seconds=DEFAULT_COOLDOWN_SECONDS,
+                 max_trips=DEFAULT_MAX_TRIPS):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.max_trips = max_trips
+        self.state = "closed"
+        self.trips = 0
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._condition = threading.Condition()
+
+    def before_call(self):
+        """Blocks while the breaker is open; raises CircuitOpenError once it has given up."""
+        with self._condition:
+            while True:
+                if self.state == "closed":
+                    return
+                if self.max_trips is not None and self.trips > self.max_trips:
+                    raise CircuitOpenError(f"Circuit breaker tripped {self.trips} times; giving up for this run.")
+                if self.state == "open":
+                    remaining = self._opened_at + self.cooldown_seconds - time.monotonic()
+                    if remaining <= 0:
+                        self.state = "half_open"
+                        return
+                    self._condition.wait(remaining)
+                else:
+                    # Half-open: wait for the trial call to settle the state.
+                    self._condition.wait()
+
+    def record_success(self):
+        with self._condition:
+            self._consecutive_failures = 0
+            if self.state != "closed":
+                logging.info("Circuit breaker closed; resuming normal traffic.")
+            self.state = "closed"
+            self._condition.notify_all()
+
+    def record_failure(self):
+        with self._condition:
+            self._consecutive_failures += 1
+            if self.state == "half_open" or (
+                self.state == "closed" and self._consecutive_failures >= self.failure_threshold
+            ):
+                self.state = "open"
+                self.trips += 1
+                self._opened_at = time.monotonic()
+                logging.warning(f"Circuit breaker opened; pausing API calls for {self.cooldown_seconds:.0f}s.")
+                self._condition.notify_all()
+
+    def reset(self):
+        """Closes the breaker and clears its trip count, e.g. before re-processing dead letters."""
+        with self._condition:
+            self.state = "closed"
+            self.trips = 0
+            self._consecutive_failures = 0
+            self._condition.notify_all()
+
+
+class ResilientCaller:
+    """
+    Runs API calls with retries, backoff and a shared circuit breaker.
+
+    `stats` is any object with an increment(name, amount=1) method (e.g. grading.RunStats);
+    it receives "api_retries" and "api_errors" counts.
+    """
+
+    def __init__(self, max_attempts=DEFAULT_MAX_ATTEMPTS, base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY,
+                 breaker=None, stats=None, sleep=time.sleep):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self.stats = stats
+        self._sleep = sleep
+
+    def _count(self, name):
+        if self.stats is not None:
+            self.stats.increment(name)
+
+    def call(self, fn, *args, **kwargs):
+        """Calls fn(*args, **kwargs), retrying transient failures. Non-retryable errors propagate."""
+        for attempt in range(1, self.max_attempts + 1):
+            self.breaker.before_call()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e):
+                    # The provider answered, so this says nothing about its health.
+                    self.breaker.record_success()
+                    raise
+                self._count("api_errors")
+                self.breaker.record_failure()
+                if attempt == self.max_attempts:
+                    raise RetriesExhaustedError(attempt, e) from e
+                delay = backoff_delay(attempt, self.base_delay, self.max_delay, retry_after_seconds(e))
+                logging.warning(f"Transient API error ({e}); retrying in {delay:.1f}s "
+                                f"(attempt {attempt} of {self.max_attempts}).")
+                self._count("api_retries")
+                self._sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+Threaded HTTP server for the Live Grading Assistant front end.
+
+Replaces `python3 -m http.server` so a whole class of teachers can load the app from
+one machine:
+
+- Static assets are compressed once, up front (gzip, plus brotli when the optional
+  `brotli` package is installed), and served in the best encoding the browser accepts,
+  with strong ETags (304 on revalidation) and Cache-Control headers. Files are
+  re-read and re-compressed only when they change on disk.
+- Only front-end file types are served, so keys, credentials and caches that live in
+  the same directory (openai_key.txt, *.json, *.sqlite3, *.py) are never exposed.
+- POST /manual-transcript-callback accepts transcript results server-side (the service
+  worker only sees requests made by the page itself). Every result must name the
+  requestId it answers, and is delivered over Server-Sent Events only to the tab that
+  opened GET /manual-transcript-events?requestId=<that id>, so results never cross
+  between teachers sharing the server. Each event carries the same
+  {"type": "manual-transcript-result", "payload": ...} message the service worker posts;
+  results that arrive before the stream opens, or while it reconnects, are replayed.
+
+The server listens on localhost only unless --host says otherwise, and sends CORS
+headers only for the origin given with --allow-origin.
+
+Run:
+    python3 serve_app.py --port 8000
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import queue
+import threading
+import time
+from collections import deque
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+try:
+    import brotli
+except ImportError:  # Optional; gzip is always available.
+    brotli = None
+
+CALLBACK_PATH = "/manual-transcript-callback"
+EVENTS_PATH = "/manual-transcript-events"
+RESULT_MESSAGE_TYPE = "manual-transcript-result"
+
+SERVED_EXTENSIONS = {
+    ".html", ".js", ".mjs", ".tsx", ".ts", ".jsx", ".css", ".svg", ".png", ".jpg", ".jpeg", ".gif",
+    ".webp", ".ico", ".woff", ".woff2", ".webmanifest", ".map",
+}
+COMPRESSIBLE_EXTENSIONS = {".html", ".js", ".mjs", ".tsx", ".ts", ".jsx", ".css", ".svg", ".webmanifest", ".map"}
+MIN_COMPRESS_BYTES = 1024
+# Pages and the service worker are revalidated on every load (cheap with ETags) so edits
+# show up at once; everything else may be reused for a while.
+REVALIDATE_EXTENSIONS = {".html"}
+REVALIDATE_FILES = {"manual-transcript-sw.js"}
+DEFAULT_MAX_AGE = 3600
+MAX_CALLBACK_BYTES = 10 * 1024 * 1024
+SSE_KEEPALIVE_SECONDS = 15.0
+SSE_HISTORY = 100
+SSE_CLIENT_QUEUE = 256
+MAX_REQUEST_ID_LENGTH = 200
+REQUEST_ID_KEYS = ("requestId", "transcriptRequestId", "manualTranscriptRequestId")
+
+mimetypes.add_type("text/javascript", ".tsx")
+mimetypes.add_type("text/javascript", ".ts")
+mimetypes.add_type("text/javascript", ".jsx")
+mimetypes.add_type("application/manifest+json", ".webmanifest")
+
+
+class Asset:
+    """One file's bytes in every encoding worth sending, with an ETag per encoding."""
+
+    def __init__(self, path, relative_path):
+        stat = os.stat(path)
+        with open(path, "rb") as asset_file:
+            raw = asset_file.read()
+        self.signature = (stat.st_mtime_ns, stat.st_size)
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        extension = os.path.splitext(path)[1].lower()
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type in ("image/svg+xml", "application/manifest+json"):
+            content_type += "; charset=utf-8"
+        self.content_type = content_type
+        if extension in REVALIDATE_EXTENSIONS or os.path.basename(relative_path) in REVALIDATE_FILES:
+            self.cache_control = "no-cache"
+        else:
+            self.cache_control = None  # Filled in by the server's max-age.
+
+        digest = hashlib.blake2b(raw, digest_size=12).hexdigest()
+        self.bodies = {"identity": (raw, f'"{digest}"')}
+        if extension in COMPRESSIBLE_EXTENSIONS and len(raw) >= MIN_COMPRESS_BYTES:
+            gzipped = gzip.compress(raw, compresslevel=9, mtime=0)
+            if len(gzipped) < len(raw):
+                self.bodies["gzip"] = (gzipped, f'"{digest}-gz"')
+            if brotli is not None:
+                compressed = brotli.compress(raw, quality=11)
+                if len(compressed) < len(raw):
+                    self.bodies["br"] = (compressed, f'"{digest}-br"')
+
+    def choose(self, accept_encoding):
+        """Returns (encoding, body, etag) for an Accept-Encoding header value."""
+        accepted = parse_accept_encoding(accept_encoding)
+        for encoding in ("br", "gzip"):
+            if encoding in self.bodies and accepted.get(encoding, accepted.get("*", 0)) > 0:
+                return (encoding,) + self.bodies[encoding]
+        return ("identity",) + self.bodies["identity"]
+
+
+def parse_accept_encoding(header):
+    """Maps each coding in an Accept-Encoding header to its q-value ("gzip;q=0.5" -> {"gzip": 0.5})."""
+    accepted = {}
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        quality = 1.0
+        name, _, value = params.strip().partition("=")
+        if name.strip() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+class AssetStore:
+    """Thread-safe cache of compressed Assets under a root directory, refreshed when files change."""
+
+    def __init__(self, root):
+        self.root = os.path.realpath(root)
+        self._assets = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, url_path):
+        """Maps a URL path to a servable file path under root, or None."""
+        relative = unquote(url_path).lstrip("/")
+        if not relative or relative.endswith("/"):
+            relative += "index.html"
+        path = os.path.realpath(os.path.join(self.root, relative))
+        if os.path.commonpath([path, self.root]) != self.root:
+            return None
+        if os.path.splitext(path)[1].lower() not in SERVED_EXTENSIONS or not os.path.isfile(path):
+            return None
+        return path
+
+    def get(self, url_path):
+        path = self.resolve(url_path)
+        if path is None:
+            return None
+        stat = os.stat(path)
+        with self._lock:
+            asset = self._assets.get(path)
+        if asset is None or asset.signature != (stat.st_mtime_ns, stat.st_size):
+            asset = Asset(path, os.path.relpath(path, self.root))
+            with self._lock:
+                self._assets[path] = asset
+        return asset
+
+    def preload(self):
+        """Compresses every servable file now so the first visitors do not wait for it."""
+        count = 0
+        for directory, subdirectories, files in os.walk(self.root):
+            subdirectories[:] = [name for name in subdirectories if not name.startswith(".")]
+            for name in files:
+                url_path = "/" + os.path.relpath(os.path.join(directory, name), self.root).replace(os.sep, "/")
+                if self.get(url_path) is not None:
+                    count += 1
+        return count
+
+
+def callback_request_id(payload):
+    """Returns the requestId a callback payload answers, or None if it names none (or a bad one)."""
+    if not isinstance(payload, dict):
+        return None
+    for key in REQUEST_ID_KEYS:
+        value = payload.get(key)
+        if isinstance(value, (str, int)) and not isinstance(value, bool):
+            value = str(value).strip()
+            if value and len(value) <= MAX_REQUEST_ID_LENGTH:
+                return value
+    return None
+
+
+class Subscriber:
+    """One open event stream: a bounded queue of (event_id, data) and whether it was dropped."""
+
+    def __init__(self, request_id, queue_size):
+        self.request_id = request_id
+        self.events = queue.Queue(maxsize=queue_size)
+        self.dropped = False
+
+
+class EventHub:
+    """
+    Delivers events to the Server-Sent Events subscribers of one request id each. Keeps the
+    last `history` events so a stream opened after its results arrived, or reconnecting from
+    a Last-Event-ID, catches up; a subscriber whose queue fills up is dropped, and its tab
+    reconnects and catches up the same way.
+    """
+
+    def __init__(self, history=SSE_HISTORY, queue_size=SSE_CLIENT_QUEUE):
+        self.queue_size = queue_size
+        self._history = deque(maxlen=history)  # (event_id, request_id, data)
+        self._subscribers = {}  # request_id -> set of Subscribers
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def subscribe(self, request_id, last_event_id=None):
+        """
+        Returns a Subscriber for request_id whose queue already holds the retained events for
+        that request after last_event_id (all of them when last_event_id is None).
+        """
+        subscriber = Subscriber(request_id, self.queue_size)
+        with self._lock:
+            missed = [(event_id, data) for event_id, event_request_id, data in self._history
+                      if event_request_id == request_id and (last_event_id is None or event_id > last_event_id)]
+            for event in missed[-self.queue_size:]:
+                subscriber.events.put_nowait(event)
+            self._subscribers.setdefault(request_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._discard(subscriber)
+
+    def _discard(self, subscriber):
+        subscribers = self._subscribers.get(subscriber.request_id)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[subscriber.request_id]
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(self, request_id, data):
+        """Sends data (a JSON string) to request_id's subscribers; returns how many received it."""
+        with self._lock:
+            event = (self._next_id, data)
+            self._next_id += 1
+            self._history.append((event[0], request_id, data))
+            delivered = 0
+            for subscriber in list(self._subscribers.get(request_id, ())):
+                try:
+                    subscriber.events.put_nowait(event)
+                    delivered += 1
+                except queue.Full:
+                    subscriber.dropped = True
+                    self._discard(subscriber)
+            return delivered
+
+
+class AppServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, root, max_age=DEFAULT_MAX_AGE, quiet=False, allow_origin=None):
+        self.assets = AssetStore(root)
+        self.events = EventHub()
+        self.max_age = max_age
+        self.allow_origin = allow_origin
+        self.quiet = quiet
+        self.stopping = threading.Event()
+        super().__init__(address, AppRequestHandler)
+
+    def shutdown(self):
+        self.stopping.set()
+        super().shutdown()
+
+
+class AppRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "LiveGradingServer/1.0"
+
+    # --- Static assets ---
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == EVENTS_PATH:
+            self._stream_events()
+        else:
+            self._send_asset(path, include_body=True)
+
+    def do_HEAD(self):
+        path = urlsplit(self.path).path
+        if path == EVENTS_PATH:
+            # Lets the page check that result streams are available before it needs one.
+            self.send_response(204)
+            self.send_header("Cache-Control", "no-store")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        else:
+            self._send_asset(path, include_body=False)
+
+    def _send_asset(self, path, include_body):
+        asset = self.server.assets.get(path)
+        if asset is None:
+            self._send_json(404, {"error": "Not found"}, include_body=include_body)
+            return
+        encoding, body, etag = asset.choose(self.headers.get("Accept-Encoding"))
+        if_none_match = self.headers.get("If-None-Match", "")
+        not_modified = etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        self.send_response(304 if not_modified else 200)
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", asset.cache_control or f"public, max-age={self.server.max_age}")
+        self.send_header("Last-Modified", asset.last_modified)
+        self.send_header("Vary", "Accept-Encoding")
+        if not_modified:
+            self.end_headers()
+            return
+        self.send_header("Content-Type", asset.content_type)
+        if encoding != "identity":
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if include_body:
+            self.wfile.write(body)
+
+    # --- Manual transcript callback ---
+    def do_OPTIONS(self):
+        if urlsplit(self.path).path != CALLBACK_PATH:
+            self._send_json(404, {"error": "Not found"})
+            return
+        self.send_response(204)
+        self._send_cors_headers()
+        self.send_header("Access-Control-Max-Age", "86400")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        if urlsplit(self.path).path != CALLBACK_PATH:
+            self._send_json(404, {"error": "Not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if length < 0 or length > MAX_CALLBACK_BYTES:
+            self.close_connection = True
+            self._send_json(413, {"received": False, "error": "Callback body too large"})
+            return
+        text = self.rfile.read(length).decode("utf-8", errors="replace")
+        try:
+            payload = json.loads(text)
+        except json.JSONDecodeError:
+            payload = {"raw": text}
+        request_id = callback_request_id(payload)
+        if request_id is None:
+            self._send_json(400, {"received": False, "error": "Callback payload has no requestId"})
+            return
+        message = json.dumps({"type": RESULT_MESSAGE_TYPE, "payload": payload}, ensure_ascii=False)
+        delivered = self.server.events.publish(request_id, message)
+        self._send_json(200, {"received": True, "listeners": delivered})
+
+    def _stream_events(self):
+        request_id = parse_qs(urlsplit(self.path).query).get("requestId", [""])[0].strip()
+        if not request_id or len(request_id) > MAX_REQUEST_ID_LENGTH:
+            self._send_json(400, {"error": "requestId is required"})
+            return
+        try:
+            last_event_id = int(self.headers.get("Last-Event-ID", ""))
+        except ValueError:
+            last_event_id = None
+        subscriber = self.server.events.subscribe(request_id, last_event_id)
+        self.close_connection = True
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.send_header("X-Accel-Buffering", "no")
+            self.end_headers()
+            self.wfile.write(b"retry: 3000\n\n")
+            self.wfile.flush()
+            while not self.server.stopping.is_set() and not subscriber.dropped:
+                try:
+                    event_id, data = subscriber.events.get(timeout=SSE_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    self.wfile.write(b": keep-alive\n\n")
+                    self.wfile.flush()
+                    continue
+                lines = "".join(f"data: {line}\n" for line in data.split("\n"))
+                self.wfile.write(f"id: {event_id}\n{lines}\n".encode("utf-8"))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The tab went away.
+        finally:
+            # A dropped stream just ends; the browser reconnects and catches up from history.
+            self.server.events.unsubscribe(subscriber)
+
+    # --- Helpers ---
+    def _send_cors_headers(self):
+        if not self.server.allow_origin:
+            return
+        self.send_header("Access-Control-Allow-Origin", self.server.allow_origin)
+        self.send_header("Vary", "Origin")
+        self.send_header("Access-Control-Allow-Methods", "POST, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type")
+
+    def _send_json(self, status, payload, include_body=True):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Cache-Control", "no-store")
+        self._send_cors_headers()
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if include_body:
+            self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the Live Grading Assistant front end.")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="Interface to bind (default: localhost only; 0.0.0.0 for every interface).")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--root", default=os.path.dirname(os.path.abspath(__file__)),
+                        help="Directory holding index.html and the other front-end files.")
+    parser.add_argument("--max-age", type=int, default=DEFAULT_MAX_AGE,
+                        help="Cache-Control max-age (seconds) for assets other than pages and the service worker.")
+    parser.add_argument("--allow-origin",
+                        help="Origin allowed to POST results from a browser (CORS); none by default.")
+    parser.add_argument("--quiet", action="store_true", help="Do not log every request.")
+    args = parser.parse_args(argv)
+
+    server = AppServer((args.host, args.port), args.root, max_age=args.max_age, quiet=args.quiet,
+                       allow_origin=args.allow_origin)
+    started = time.monotonic()
+    count = server.assets.preload()
+    encodings = "gzip and brotli" if brotli is not None else "gzip (pip install brotli to add brotli)"
+    print(f"Prepared {count} assets with {encodings} in {time.monotonic() - started:.2f}s.")
+    host = args.host if args.host not in ("", "0.0.0.0", "127.0.0.1") else "localhost"
+    print(f"Serving {server.assets.root} at http://{host}:{args.port}/index.html (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stopping.set()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
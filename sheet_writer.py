@@ -0,0 +1,198 @@
+"""
+Buffered write-back for graded results.
+
+Instead of one `update_cell` request per graded row, results are collected in a
+SheetWriteBuffer and flushed as a single `batch_update` call made of as few
+rectangular A1 ranges as possible.
+"""
+
+import logging
+import re
+import threading
+import time
+
+DEFAULT_FLUSH_EVERY = 25
+DEFAULT_FLUSH_INTERVAL = 10.0
+
+_A1_CELL_RE = re.compile(r"^([A-Za-z]+)(\d+)$")
+
+
+def column_letter(col):
+    """Converts a 1-indexed column number to its A1 letters (1 -> A, 27 -> AA)."""
+    letters = ""
+    while col > 0:
+        col, remainder = divmod(col - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def rowcol_to_a1(row, col):
+    return f"{column_letter(col)}{row}"
+
+
+def a1_to_rowcol(label):
+    """Converts an A1 cell label such as "C12" to a 1-indexed (row, col) tuple."""
+    match = _A1_CELL_RE.match(label)
+    if not match:
+        raise ValueError(f"Not an A1 cell reference: {label!r}")
+    letters, row = match.groups()
+    col = 0
+    for char in letters.upper():
+        col = col * 26 + (ord(char) - 64)
+    return int(row), col
+
+
+def coalesce_cells(cells):
+    """
+    Groups a {(row, col): value} mapping into rectangular batch_update entries.
+
+    Each row is split into runs of adjacent columns, and consecutive rows that cover
+    the same column run are merged into one range.
+    """
+    cols_by_row = {}
+    for row, col in cells:
+        cols_by_row.setdefault(row, []).append(col)
+
+    row_segments = {}
+    for row in sorted(cols_by_row):
+        cols = sorted(cols_by_row[row])
+        start = prev = cols[0]
+        for col in cols[1:] + [None]:
+            if col is not None and col == prev + 1:
+                prev = col
+                continue
+            row_segments.setdefault((start, prev), []).append(row)
+            if col is not None:
+                start = prev = col
+
+    ranges = []
+    for (first_col, last_col), rows in row_segments.items():
+        block = [rows[0]]
+        for row in rows[1:] + [None]:
+            if row is not None and row == block[-1] + 1:
+                block.append(row)
+                continue
+            values = [[cells[(r, c)] for c in range(first_col, last_col + 1)] for r in block]
+            a1 = f"{rowcol_to_a1(block[0], first_col)}:{rowcol_to_a1(block[-1], last_col)}"
+            ranges.append({"range": a1, "values": values})
+            if row is not None:
+                block = [row]
+    ranges.sort(key=lambda entry: a1_to_rowcol(entry["range"].split(":")[0]))
+    return ranges
+
+
+class SheetWriteBuffer:
+    """
+    Collects cell writes for one worksheet and flushes them in ranged batch updates.
+
+    A flush happens once `flush_every` rows are pending or the oldest pending write is
+    `flush_interval` seconds old, and always when the buffer is closed. The interval is
+    enforced by a background thread, so rows are written even while no new results arrive
+    (e.g. when grading stalls on retries); its failed flushes are logged and retried later.
+    Use it as a context manager so a final flush also runs on errors and Ctrl+C.
+
+    on_flush, if given, is called as on_flush(cells, seconds) after every successful flush.
+    """
+
+    def __init__(self, worksheet, flush_every=DEFAULT_FLUSH_EVERY, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 value_input_option="USER_ENTERED", on_flush=None):
+        self.worksheet = worksheet
+        self.on_flush = on_flush
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.value_input_option = value_input_option
+        self.flush_count = 0
+        self.cells_written = 0
+        self._pending = {}
+        self._oldest_pending = None
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._timer = None
+
+    def add(self, row, col, value):
+        """Queues a single cell write using the same 1-indexed coordinates as update_cell."""
+        self.add_row(row, col, [value])
+
+    def add_row(self, row, start_col, values):
+        """Queues a run of adjacent cells in one row, starting at start_col."""
+        self.add_cells(row, {start_col + offset: value for offset, value in enumerate(values)})
+
+    def add_cells(self, row, values_by_col):
+        """
+        Queues writes to any cells of one row, given as {col: value}. They are added together,
+        so a flush never writes only part of them.
+        """
+        with self._lock:
+            if self._oldest_pending is None:
+                self._oldest_pending = time.monotonic()
+            for col, value in values_by_col.items():
+                self._pending[(row, col)] = value
+            due = self._is_due()
+            if self._timer is None and self.flush_interval and not self._closed.is_set():
+                self._timer = threading.Thread(target=self._flush_when_due, name="sheet-write-timer", daemon=True)
+                self._timer.start()
+        if due:
+            self.flush()
+
+    def _is_due(self):
+        pending_rows = len({row for row, _ in self._pending})
+        if self.flush_every and pending_rows >= self.flush_every:
+            return True
+        if self.flush_interval is not None and time.monotonic() - self._oldest_pending >= self.flush_interval:
+            return True
+        return False
+
+    def _flush_when_due(self):
+        """Timer thread: flushes whenever the oldest pending write reaches flush_interval."""
+        while True:
+            with self._lock:
+                if self._oldest_pending is None:
+                    wait = self.flush_interval
+                else:
+                    wait = self._oldest_pending + self.flush_interval - time.monotonic()
+            if wait > 0:
+                if self._closed.wait(wait):
+                    return
+                continue
+            try:
+                self.flush()
+            except Exception as e:
+                # flush() kept the writes and restarted their clock; the next interval retries them.
+                logging.warning(f"Background sheet write failed; retrying in {self.flush_interval}s: {e}")
+
+    @property
+    def pending_count(self):
+        return len(self._pending)
+
+    def flush(self):
+        """Writes every pending cell in one batch_update request. No-op when empty."""
+        with self._lock:
+            if not self._pending:
+                return
+            cells, self._pending = self._pending, {}
+            self._oldest_pending = None
+            started = time.monotonic()
+            try:
+                self.worksheet.batch_update(coalesce_cells(cells), value_input_option=self.value_input_option)
+            except BaseException:
+                # Keep the writes so a later flush can retry them.
+                cells.update(self._pending)
+                self._pending = cells
+                self._oldest_pending = time.monotonic()
+                raise
+            self.flush_count += 1
+            self.cells_written += len(cells)
+            if self.on_flush is not None:
+                self.on_flush(len(cells), time.monotonic() - started)
+
+    def close(self):
+        self._closed.set()
+        if self._timer is not None and self._timer is not threading.current_thread():
+            self._timer.join()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,13 +1,18 @@
 #!/bin/bash
-# Start a simple Python HTTP server on port 8000
+# Start the Live Grading Assistant server on localhost:8000 (override with HOST=... and PORT=...)
+HOST="${HOST:-127.0.0.1}"
+PORT="${PORT:-8000}"
 echo "Starting local server for Live Grading Assistant..."
-echo "Serving at http://localhost:8000"
+echo "Serving at http://localhost:${PORT}"
 echo "Press Ctrl+C to stop."
 
+cd "$(dirname "$0")"
+
 # Check if python3 is available
-if command -v python3 &>/dev/null; then
-    python3 -m http.server 8000
+if command -v python3 >/dev/null 2>&1; then
+    # Threaded server with compressed, cacheable assets and the transcript callback endpoint.
+    python3 serve_app.py --host "$HOST" --port "$PORT"
 else
-    # Fallback to python
-    python -m SimpleHTTPServer 8000
+    # Fallback to python (plain static files; transcript results only via the service worker)
+    python -m SimpleHTTPServer "$PORT"
 fi
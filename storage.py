@@ -0,0 +1,168 @@
+"""
+Persistent storage for course content and section pacing plans.
+
+Everything lives in one local SQLite file so it survives restarts. Reads are lazy:
+a section's plan is only loaded when that section is opened. Writes are write-behind:
+`save_content` / `save_plan` update memory immediately and queue the frame, repeated
+saves of the same frame are coalesced, and a background thread commits the latest
+version of everything pending in one transaction every `flush_interval` seconds
+(and on `flush()` / `close()`).
+
+Course content is shared: every session gets the same read-only DataFrame plus a
+version number, so a session can tell when another one changed it. Replace the
+frame through `save_content` rather than modifying it in place.
+"""
+
+import atexit
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+DEFAULT_STORAGE_PATH = "pacing_hub.sqlite3"
+DEFAULT_FLUSH_INTERVAL = 2.0
+
+_CONTENT_KEY = ("content", "")
+
+
+def frame_to_json(df: pd.DataFrame) -> str:
+    """Serializes a DataFrame's columns and rows (not its index); NaN becomes null."""
+    return df.to_json(orient="split", index=False)
+
+
+def frame_from_json(payload: str) -> pd.DataFrame:
+    data = json.loads(payload)
+    return pd.DataFrame(data["data"], columns=data["columns"])
+
+
+class PacingStorage:
+    """
+    SQLite-backed store for course content and per-section plans, safe to share
+    across Streamlit sessions and threads.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORAGE_PATH, flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_count = 0
+        self.frames_written = 0
+        self._pending: Dict[Tuple[str, str], str] = {}
+        self._content: Optional[pd.DataFrame] = None
+        self._content_version = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS frames ("
+                " kind TEXT NOT NULL, key TEXT NOT NULL, data TEXT NOT NULL, updated_at REAL NOT NULL,"
+                " PRIMARY KEY (kind, key))"
+            )
+        self._writer = threading.Thread(target=self._write_behind, name="pacing-storage-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _read(self, kind: str, key: str) -> Optional[str]:
+        with self._lock:
+            pending = self._pending.get((kind, key))
+        if pending is not None:
+            return pending
+        with self._db_lock:
+            row = self._conn.execute("SELECT data FROM frames WHERE kind = ? AND key = ?", (kind, key)).fetchone()
+        return row[0] if row else None
+
+    def _queue(self, kind: str, key: str, df: pd.DataFrame):
+        payload = frame_to_json(df)
+        with self._lock:
+            self._pending[(kind, key)] = payload
+
+    # --- Course content (shared) ---
+    def content(self) -> Tuple[int, Optional[pd.DataFrame]]:
+        """Returns (version, content DataFrame), loading it on first use; None if nothing is stored."""
+        with self._lock:
+            if self._content is not None:
+                return self._content_version, self._content
+        payload = self._read(*_CONTENT_KEY)
+        content = frame_from_json(payload) if payload is not None else None
+        with self._lock:
+            if self._content is None and content is not None:
+                self._content = content
+                self._content_version += 1
+            return self._content_version, self._content
+
+    def save_content(self, content_df: pd.DataFrame) -> int:
+        """Replaces the shared content and queues it for writing; returns the new version."""
+        with self._lock:
+            self._content = content_df
+            self._content_version += 1
+            version = self._content_version
+        self._queue(*_CONTENT_KEY, content_df)
+        return version
+
+    # --- Section plans (loaded lazily) ---
+    def load_plan(self, section_id: str) -> Optional[pd.DataFrame]:
+        """Returns the stored plan for a section, or None if it has never been saved."""
+        payload = self._read("plan", section_id)
+        return frame_from_json(payload) if payload is not None else None
+
+    def save_plan(self, section_id: str, plan: pd.DataFrame):
+        """Queues a section's plan for writing; later saves of the same plan replace it."""
+        self._queue("plan", section_id, plan)
+
+    # --- Write-behind ---
+    @property
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """Commits every pending frame in one transaction. No-op when nothing is pending."""
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+        now = time.time()
+        try:
+            with self._db_lock, self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO frames (kind, key, data, updated_at) VALUES (?, ?, ?, ?)",
+                    [(kind, key, data, now) for (kind, key), data in pending.items()],
+                )
+        except BaseException:
+            # Keep the writes (newer saves win) so the next flush retries them.
+            with self._lock:
+                pending.update(self._pending)
+                self._pending = pending
+            raise
+        with self._lock:
+            self.flush_count += 1
+            self.frames_written += len(pending)
+
+    def _write_behind(self):
+        while True:
+            with self._lock:
+                self._wakeup.wait(self.flush_interval)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except Exception as e:
+                logging.warning(f"Could not write pacing data to {self.path}; will retry: {e}")
+
+    def close(self):
+        """Flushes pending writes and stops the writer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wakeup.notify_all()
+        self._writer.join()
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
@@ -9,7 +9,7 @@ content, plan the pacing for different sections, and view the schedule.
 Run locally:
     python3 -m venv .venv
     source .venv/bin/activate
-    pip install streamlit pandas python-dateutil
+    pip install streamlit pandas
     streamlit run streamlit_app_refactored.py
 
 Key Concepts:
@@ -20,12 +20,20 @@ Key Concepts:
 
 import calendar
 from datetime import date, datetime, timedelta
+import html
+import os
 import re
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import pandas as pd
 import streamlit as st
-from dateutil.rrule import rrule, DAILY
+
+from data_sources import CachedDataSource, MockDataSource, SQLiteDataSource
+from storage import DEFAULT_STORAGE_PATH, PacingStorage
+from pacing import (
+    PLAN_COLUMNS, PacingIndex, PacingStore, build_content_lookup, bulk_repace, empty_pacing, plan_from_content,
+    prepare_content, seed_plan,
+)
 
 # --- Page Configuration ---
 st.set_page_config(page_title="Pacing & Content Hub", layout="wide")
@@ -54,6 +62,7 @@ def apply_custom_css():
             .plan-table .hdr { font-weight: 700; border-bottom: 2px solid #ddd; }
 
             /* Calendar Styling */
+            .cal-grid { display: grid; grid-template-columns: repeat(5, minmax(0, 1fr)); gap: 8px; }
             .weekday-header { text-align: center; font-weight: 700; margin-bottom: 6px; }
             .cal-cell {
                 border: 1px solid #e6e6e6; border-radius: 6px; padding: 8px 10px;
@@ -67,56 +76,39 @@ def apply_custom_css():
             }
             .cal-title { font-weight: 600; line-height: 1.2; margin-bottom: 4px; overflow-wrap: anywhere; }
             .cal-unit, .cal-hw { font-size: 0.9rem; line-height: 1.25; margin-bottom: 3px; color: #444; overflow-wrap: anywhere; }
+
+            /* Student View */
+            .student-day { margin-bottom: 18px; padding-bottom: 10px; border-bottom: 1px solid #eee; }
+            .student-day .lesson-card .cal-hw a { margin-right: 10px; }
         </style>
         """,
         unsafe_allow_html=True,
     )
 
 
-# --- Mock Data API ---
-def mock_fetch_teachers() -> List[Dict]:
-    """Returns a mock list of teachers."""
-    return [
-        {"id": "t_1001", "name": "Ada Lovelace"},
-        {"id": "t_1002", "name": "Isaac Newton"},
-        {"id": "t_1003", "name": "Marie Curie"},
-    ]
+# --- Data Source ---
+@st.cache_resource
+def get_data_source() -> CachedDataSource:
+    """
+    Returns the teacher/section/schedule source shared by every session.
 
+    Set PACING_DATA_SOURCE=sqlite:<path> to read from a local SQLite file (seeded with
+    the demo data on first use); the default is the built-in mock data.
+    """
+    setting = os.environ.get("PACING_DATA_SOURCE", "mock")
+    if setting.startswith("sqlite:"):
+        source = SQLiteDataSource(setting[len("sqlite:"):])
+        if not source.fetch_teachers():
+            source.import_from(MockDataSource())
+    else:
+        source = MockDataSource()
+    return CachedDataSource(source)
 
-def mock_fetch_sections(teacher_id: str) -> List[Dict]:
-    """Returns a mock list of sections for a given teacher."""
-    sections_data = {
-        "t_1001": [
-            {"id": "sec_phy_honors_A", "name": "Physics Honors - A", "year": 2025},
-            {"id": "sec_phy_honors_B", "name": "Physics Honors - B", "year": 2025},
-            {"id": "sec_phy", "name": "Physics", "year": 2025},
-        ],
-        "t_1002": [{"id": "sec_alg2_A", "name": "Algebra II - A", "year": 2025}],
-        "t_1003": [
-            {"id": "sec_chem_A", "name": "Chemistry - A", "year": 2025},
-            {"id": "sec_chem_B", "name": "Chemistry - B", "year": 2025},
-        ],
-    }
-    return sections_data.get(teacher_id, [])
-
-
-def mock_fetch_master_schedule(section_id: str) -> pd.DataFrame:
-    """Generates a mock master schedule for a section (M/W/F for 12 weeks)."""
-    today = date.today()
-    start_of_week = today - timedelta(days=today.weekday())
-    end_of_schedule = start_of_week + timedelta(days=7 * 12)
-    
-    meeting_dates = rrule(DAILY, dtstart=start_of_week, until=end_of_schedule)
-    schedule_data = [
-        {
-            "date": dt.date(),
-            "block_id": "B2" if dt.weekday() in [0, 2, 4] else None,  # Mon, Wed, Fri
-            "start": "10:20",
-            "end": "11:05",
-        }
-        for dt in meeting_dates
-    ]
-    return pd.DataFrame(schedule_data)
+
+@st.cache_resource
+def get_storage() -> PacingStorage:
+    """Returns the content/plan store shared by every session (PACING_STORAGE_PATH overrides the file)."""
+    return PacingStorage(os.environ.get("PACING_STORAGE_PATH", DEFAULT_STORAGE_PATH))
 
 
 # --- Session State Management ---
@@ -147,30 +139,95 @@ def initialize_session_state():
             "homework_url": "https://hw.com/vel-speed", "video_url": "", "resources": "[]",
         },
     ]
-    st.session_state.content_df = pd.DataFrame(SAMPLE_CONTENT, columns=DEFAULT_COLUMNS)
+    # Course content is shared read-only across sessions; the first run seeds the samples.
+    content_version, content_df = get_storage().content()
+    if content_df is None:
+        get_storage().save_content(prepare_content(pd.DataFrame(SAMPLE_CONTENT, columns=DEFAULT_COLUMNS)))
+        content_version, content_df = get_storage().content()
+    st.session_state.content_df = content_df
+    st.session_state.shared_content_version = content_version
     
     st.session_state.schedule_by_section = {}
     st.session_state.plan_by_section = {}
     st.session_state.pacing_by_section = {}
+
+    # Dependency tracking: version counters for the data stores above, and the
+    # (schedule, plan) versions each section's pacing was last built from.
+    st.session_state.data_versions = {}
+    st.session_state.pacing_inputs_by_section = {}
+    # Prefix-sum indexes that let a duration edit re-pace only the lessons after it.
+    st.session_state.pacing_index_by_section = {}
+    # Date-indexed views of each section's pacing and a lesson_id -> content lookup,
+    # rebuilt only when the pacing frame or the content version changes.
+    st.session_state.pacing_store_by_section = {}
+    st.session_state.content_lookup = (None, {})
+    # Rendered calendar and student-view HTML, keyed by view, section and date range (see cached_html).
+    st.session_state.calendar_html_cache = {}
     
     # UI state
     today = date.today()
     st.session_state.calendar_cursor = date(today.year, today.month, 1)
+    st.session_state.week_view_start = today - timedelta(days=today.weekday())
     st.session_state.student_view_week = today - timedelta(days=today.weekday())
 
     st.session_state.initialized = True
 
 
+# --- Dependency Tracking ---
+# Content, plans and schedules are only ever replaced through the setters below, which
+# bump a version counter. Derived data such as pacing records the versions it was built
+# from, so reruns can tell whether anything actually changed without comparing frames.
+def data_version(kind: str, section_id: Optional[str] = None) -> int:
+    """Returns the current version of a data store ("content", "plan" or "schedule")."""
+    return st.session_state.data_versions.get((kind, section_id), 0)
+
+
+def mark_changed(kind: str, section_id: Optional[str] = None):
+    """Bumps the version of a data store so anything derived from it is rebuilt."""
+    st.session_state.data_versions[(kind, section_id)] = data_version(kind, section_id) + 1
+
+
+def set_content(content_df: pd.DataFrame):
+    """Replaces the course content for every session and saves it, typed and sorted."""
+    content_df = prepare_content(content_df)
+    st.session_state.content_df = content_df
+    st.session_state.shared_content_version = get_storage().save_content(content_df)
+    mark_changed("content")
+
+
+def sync_shared_content():
+    """Picks up course content saved by another session since this one last looked."""
+    version, content_df = get_storage().content()
+    if version != st.session_state.shared_content_version and content_df is not None:
+        st.session_state.content_df = content_df
+        st.session_state.shared_content_version = version
+        mark_changed("content")
+
+
+def set_section_plan(section_id: str, plan: pd.DataFrame):
+    """Replaces a section's pacing plan and queues it for saving."""
+    st.session_state.plan_by_section[section_id] = plan
+    get_storage().save_plan(section_id, plan)
+    mark_changed("plan", section_id)
+
+
+def set_section_schedule(section_id: str, schedule: pd.DataFrame):
+    """Replaces a section's master schedule."""
+    st.session_state.schedule_by_section[section_id] = schedule
+    mark_changed("schedule", section_id)
+
+
+def pacing_inputs(section_id: str) -> tuple:
+    return (data_version("schedule", section_id), data_version("plan", section_id))
+
+
 # --- Data Processing and Pacing Logic ---
 def get_sorted_content() -> pd.DataFrame:
-    """Returns a sorted copy of the content DataFrame."""
-    df = st.session_state.content_df.copy()
-    if df.empty:
-        return df
-    
-    for col in ["order", "unit", "lesson_no"]:
-        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(1).astype(int)
-    return df.sort_values(["unit", "lesson_no", "order"]).reset_index(drop=True)
+    """
+    Returns the course content, already typed and sorted by set_content (see
+    pacing.prepare_content). The frame is shared; do not modify it in place.
+    """
+    return st.session_state.content_df
 
 
 def initialize_section_data(section: Dict):
@@ -181,101 +238,174 @@ def initialize_section_data(section: Dict):
     sid = section["id"]
 
     if sid not in st.session_state.schedule_by_section:
-        st.session_state.schedule_by_section[sid] = mock_fetch_master_schedule(sid)
+        set_section_schedule(sid, get_data_source().fetch_master_schedule(sid))
+
+    if sid not in st.session_state.plan_by_section:
+        # Plans are loaded from storage the first time a section is opened in this session.
+        stored_plan = get_storage().load_plan(sid)
+        if stored_plan is not None:
+            st.session_state.plan_by_section[sid] = stored_plan
+            mark_changed("plan", sid)
 
     if sid not in st.session_state.plan_by_section:
         content_df = get_sorted_content()
         if content_df.empty:
-            st.session_state.plan_by_section[sid] = pd.DataFrame(
-                columns=["order", "lesson_id", "title", "type", "unit", "lesson_no", "duration_days"]
-            )
+            plan = pd.DataFrame(columns=PLAN_COLUMNS)
         else:
-            plan = content_df[["order", "lesson_id", "title", "type", "unit", "lesson_no"]].copy()
-            plan["duration_days"] = 1
-            st.session_state.plan_by_section[sid] = plan
+            plan = plan_from_content(content_df)
+        set_section_plan(sid, plan)
+
+    ensure_pacing(sid)
 
-    rebuild_pacing_for_section(sid)
+
+def ensure_pacing(section_id: str):
+    """Rebuilds a section's pacing only if its schedule or plan changed since the last build."""
+    if (section_id in st.session_state.pacing_by_section
+            and st.session_state.pacing_inputs_by_section.get(section_id) == pacing_inputs(section_id)):
+        return
+    rebuild_pacing_for_section(section_id)
 
 
 def rebuild_pacing_for_section(section_id: str):
     """Generates the dated pacing schedule by mapping the plan to meeting days."""
     schedule = st.session_state.schedule_by_section.get(section_id)
     plan = st.session_state.plan_by_section.get(section_id)
-
     if schedule is None or plan is None or schedule.empty or plan.empty:
-        st.session_state.pacing_by_section[section_id] = pd.DataFrame(
-            columns=["date", "block_id", "lesson_id", "title", "type", "day_index", "duration_days"]
-        )
+        st.session_state.pacing_index_by_section.pop(section_id, None)
+        st.session_state.pacing_by_section[section_id] = empty_pacing()
+    else:
+        index = PacingIndex(schedule, plan)
+        st.session_state.pacing_index_by_section[section_id] = index
+        st.session_state.pacing_by_section[section_id] = index.pacing
+    st.session_state.pacing_inputs_by_section[section_id] = pacing_inputs(section_id)
+
+
+def set_lesson_duration(section_id: str, lesson_id: str, duration_days: int):
+    """
+    Changes one lesson's duration in a section's plan. When the section's pacing is
+    current, only the lessons from the edited one onward are re-paced.
+    """
+    was_current = st.session_state.pacing_inputs_by_section.get(section_id) == pacing_inputs(section_id)
+    index = st.session_state.pacing_index_by_section.get(section_id)
+    plan = st.session_state.plan_by_section[section_id]
+    matches = (plan["lesson_id"] == lesson_id).to_numpy().nonzero()[0]
+    if len(matches) == 0:
         return
 
-    meeting_days = schedule[schedule["block_id"].notna()].sort_values("date").reset_index(drop=True)
-    pacing_rows = []
-    
-    plan_iterator = iter(plan.itertuples(index=False))
-    current_lesson = next(plan_iterator, None)
-    day_in_lesson = 1
-
-    for _, meeting in meeting_days.iterrows():
-        if current_lesson is None:
-            break
-
-        pacing_rows.append({
-            "date": meeting["date"],
-            "block_id": meeting["block_id"],
-            "lesson_id": current_lesson.lesson_id,
-            "title": current_lesson.title,
-            "type": current_lesson.type,
-            "day_index": day_in_lesson,
-            "duration_days": int(current_lesson.duration_days),
-        })
-
-        if day_in_lesson >= int(current_lesson.duration_days):
-            current_lesson = next(plan_iterator, None)
-            day_in_lesson = 1
-        else:
-            day_in_lesson += 1
-            
-    st.session_state.pacing_by_section[section_id] = pd.DataFrame(pacing_rows)
+    if not was_current or index is None or index.plan is not plan:
+        updated_plan = plan.copy()
+        updated_plan.loc[updated_plan["lesson_id"] == lesson_id, "duration_days"] = int(duration_days)
+        set_section_plan(section_id, updated_plan)
+        rebuild_pacing_for_section(section_id)
+        return
 
+    for lesson_pos in matches:
+        index.set_duration(int(lesson_pos), duration_days)
+    set_section_plan(section_id, index.plan)
+    st.session_state.pacing_by_section[section_id] = index.pacing
+    st.session_state.pacing_inputs_by_section[section_id] = pacing_inputs(section_id)
 
-def seed_plan_from_content(section_id: str):
-    """Appends lessons from the main content that are missing in the section's plan."""
-    content_df = get_sorted_content()
-    plan_df = st.session_state.plan_by_section.get(section_id, pd.DataFrame())
 
-    if content_df.empty:
-        return
+def get_pacing_store(section_id: str) -> PacingStore:
+    """Returns the date-indexed store for a section's current pacing, building it on first use."""
+    pacing = st.session_state.pacing_by_section.get(section_id)
+    if pacing is None:
+        pacing = empty_pacing()
+    store = st.session_state.pacing_store_by_section.get(section_id)
+    if store is None or store.pacing is not pacing:
+        store = PacingStore(pacing)
+        st.session_state.pacing_store_by_section[section_id] = store
+    return store
 
-    existing_lesson_ids = set(plan_df["lesson_id"]) if not plan_df.empty else set()
-    missing_lessons = content_df[~content_df["lesson_id"].isin(existing_lesson_ids)]
 
-    if not missing_lessons.empty:
-        new_plan_items = missing_lessons[["order", "lesson_id", "title", "type", "unit", "lesson_no"]].copy()
-        new_plan_items["duration_days"] = 1
-        
-        updated_plan = pd.concat([plan_df, new_plan_items], ignore_index=True)
-        updated_plan = updated_plan.sort_values(["unit", "lesson_no", "order"]).reset_index(drop=True)
-        updated_plan["order"] = range(1, len(updated_plan) + 1)
-        st.session_state.plan_by_section[section_id] = updated_plan
+def get_content_lookup() -> Dict[str, Dict]:
+    """Returns the lesson_id -> content lookup, rebuilt only when the content changed."""
+    version, lookup = st.session_state.content_lookup
+    if version != data_version("content"):
+        lookup = build_content_lookup(st.session_state.content_df)
+        st.session_state.content_lookup = (data_version("content"), lookup)
+    return lookup
+
+
+def seed_plan_from_content(section_id: str):
+    """Appends lessons from the main content that are missing in the section's plan."""
+    updated_plan = seed_plan(get_sorted_content(), st.session_state.plan_by_section.get(section_id))
+    if updated_plan is not None:
+        set_section_plan(section_id, updated_plan)
+
+
+def sync_sections(sections: List[Dict], processes: Optional[int] = None) -> Tuple[pd.DataFrame, Optional[float]]:
+    """
+    Adds missing content lessons to every given section's plan and re-paces them all in
+    one bulk pass (see pacing.bulk_repace). Returns a per-section table and the bulk
+    pass's total seconds. Sections paced in one pass can't be timed one by one, so the
+    table then shows their average; with a process pool each section is timed and the
+    total is None.
+    """
+    section_ids = [section["id"] for section in sections]
+    missing_schedules = [sid for sid in section_ids if sid not in st.session_state.schedule_by_section]
+    for sid, schedule in get_data_source().fetch_master_schedules(missing_schedules).items():
+        set_section_schedule(sid, schedule)
+
+    plans = {}
+    for sid in section_ids:
+        plan = st.session_state.plan_by_section.get(sid)
+        plans[sid] = plan if plan is not None else get_storage().load_plan(sid)
+
+    results = bulk_repace(
+        get_sorted_content(),
+        plans,
+        {sid: st.session_state.schedule_by_section[sid] for sid in section_ids},
+        processes=processes,
+    )
+    for result in results:
+        sid = result.section_id
+        if result.reseeded:
+            set_section_plan(sid, result.plan)
+        elif sid not in st.session_state.plan_by_section:
+            st.session_state.plan_by_section[sid] = result.plan
+            mark_changed("plan", sid)
+        if result.index is None:
+            st.session_state.pacing_index_by_section.pop(sid, None)
+        else:
+            st.session_state.pacing_index_by_section[sid] = result.index
+        st.session_state.pacing_by_section[sid] = result.pacing
+        st.session_state.pacing_inputs_by_section[sid] = pacing_inputs(sid)
+
+    names = {section["id"]: section["name"] for section in sections}
+    bulk = any(result.bulk for result in results)
+    time_column = "avg ms (bulk pass)" if bulk else "ms"
+    table = pd.DataFrame([
+        {
+            "section": names[result.section_id],
+            "lessons added": result.reseeded,
+            "pacing days": len(result.pacing),
+            time_column: round(result.seconds * 1000, 1),
+        }
+        for result in results
+    ])
+    return table, sum(result.seconds for result in results) if bulk else None
 
 
 # --- UI Components ---
 def display_header():
     """Renders the main application header."""
     st.title("Teacher Pacing & Content Hub")
-    st.caption("A prototype for managing course content and pacing. Replace mock data with your API calls.")
+    st.caption("A prototype for managing course content and pacing. Plug your backend in as a data_sources.DataSource.")
 
 
 def onboarding_wizard():
     """Guides the user through the initial teacher and section selection."""
     st.header("Welcome! Let's get you set up.")
     
-    teachers = mock_fetch_teachers()
+    data_source = get_data_source()
+    teachers = data_source.fetch_teachers()
     teacher_names = [t["name"] for t in teachers]
     selected_teacher_name = st.selectbox("Select your name", teacher_names)
     
     teacher_id = next(t["id"] for t in teachers if t["name"] == selected_teacher_name)
-    sections = mock_fetch_sections(teacher_id)
+    # Loads the teacher's sections and all their schedules in one go, so switching is a cache hit.
+    sections = data_source.prefetch_teacher(teacher_id)
 
     if not sections:
         st.info("This teacher has no sections assigned in the mock data.")
@@ -296,14 +426,15 @@ def onboarding_wizard():
 def settings_and_section_switcher():
     """Allows switching the teacher or section and rebuilding the pacing."""
     with st.expander("Settings & Section Switcher"):
-        teachers = mock_fetch_teachers()
+        data_source = get_data_source()
+        teachers = data_source.fetch_teachers()
         teacher_map = {t["name"]: t["id"] for t in teachers}
         
         current_teacher_name = next((name for name, tid in teacher_map.items() if tid == st.session_state.teacher), None)
         new_teacher_name = st.selectbox("Teacher", teacher_map.keys(), index=list(teacher_map.keys()).index(current_teacher_name))
         
         new_teacher_id = teacher_map[new_teacher_name]
-        sections = mock_fetch_sections(new_teacher_id)
+        sections = data_source.prefetch_teacher(new_teacher_id)
         
         if not sections:
             st.warning("No sections available for the selected teacher.")
@@ -329,9 +460,21 @@ def settings_and_section_switcher():
             st.rerun()
 
         if col2.button("Rebuild Pacing", use_container_width=True):
+            # Explicit invalidation: rebuild even if no tracked input changed.
             rebuild_pacing_for_section(new_section["id"])
             st.success("Pacing has been rebuilt.")
 
+        st.caption(f"Apply course content changes to all of {new_teacher_name}'s sections at once.")
+        use_processes = st.checkbox("Use a process pool (for many sections)", value=False)
+        if st.button("Sync All Sections", use_container_width=True):
+            started = datetime.now()
+            timings, bulk_seconds = sync_sections(sections, processes=os.cpu_count() if use_processes else None)
+            elapsed = (datetime.now() - started).total_seconds()
+            st.success(f"Synced {len(sections)} sections in {elapsed:.2f}s.")
+            if bulk_seconds is not None:
+                st.caption(f"All sections were re-paced in one {bulk_seconds * 1000:.1f} ms pass.")
+            st.dataframe(timings, hide_index=True, use_container_width=True)
+
 
 def content_editor():
     """UI for editing the course content (units and lessons)."""
@@ -348,7 +491,7 @@ def content_editor():
             "title": "New Lesson", "type": "Lesson", "unit": new_unit_num, "lesson_no": 1,
             "success_criteria": "", "slides_url": "", "homework_url": "", "video_url": "", "resources": "[]",
         }
-        st.session_state.content_df = pd.concat([st.session_state.content_df, pd.DataFrame([new_lesson])], ignore_index=True)
+        set_content(pd.concat([st.session_state.content_df, pd.DataFrame([new_lesson])], ignore_index=True))
         st.rerun()
 
     # The rest of the content editor UI can be similarly refactored for clarity
@@ -364,21 +507,165 @@ def pacing_viewer():
         return
 
     sid = st.session_state.section["id"]
-    pacing_df = st.session_state.pacing_by_section.get(sid, pd.DataFrame())
 
     tab_plan, tab_week, tab_year = st.tabs(["Pacing Plan", "Week View", "Month View"])
 
     with tab_plan:
         st.caption("Adjust the duration for each lesson in this section-specific plan.")
-        # Refactored plan editor logic would go here.
+        plan = st.session_state.plan_by_section.get(sid, pd.DataFrame())
+        if plan.empty:
+            st.info("This section's plan has no lessons yet.")
+        else:
+            edited = st.data_editor(
+                plan,
+                key=f"plan_editor_{sid}",
+                hide_index=True,
+                use_container_width=True,
+                disabled=[col for col in plan.columns if col != "duration_days"],
+                column_config={"duration_days": st.column_config.NumberColumn("Days", min_value=1, step=1)},
+            )
+            changed = edited["duration_days"].fillna(1).astype(int) != plan["duration_days"].astype(int)
+            if changed.any():
+                for lesson_id, duration in edited.loc[changed, ["lesson_id", "duration_days"]].fillna(1).itertuples(index=False):
+                    set_lesson_duration(sid, lesson_id, int(duration))
+                st.rerun()
 
     with tab_week:
         st.caption("A weekly overview of the lessons.")
-        # Week view UI logic here.
+        week_view(sid)
 
     with tab_year:
         st.caption("A monthly calendar view of the pacing.")
-        # Year/month view UI logic here.
+        month_view(sid)
+
+
+def week_start(day: date) -> date:
+    """Returns the Monday of the week containing day."""
+    return day - timedelta(days=day.weekday())
+
+
+# --- Calendar Rendering ---
+# Each calendar or student week is built as one HTML string and sent as a single
+# st.markdown element, so navigating re-renders one element instead of one per day.
+# Rendered HTML is cached per session under (view, section, first day, last day) with
+# the version of the data it was built from; a stale entry is simply rebuilt.
+CALENDAR_CACHE_SIZE = 64
+
+
+def pacing_version(section_id: str) -> Optional[tuple]:
+    """Returns the (schedule, plan) versions the section's current pacing was built from."""
+    return st.session_state.pacing_inputs_by_section.get(section_id)
+
+
+def cached_html(key: tuple, version, build) -> str:
+    """
+    Returns the HTML cached under key if it was built at version, otherwise calls build()
+    and caches the result, dropping the least recently used entries past CALENDAR_CACHE_SIZE.
+    """
+    cache = st.session_state.calendar_html_cache
+    entry = cache.pop(key, None)
+    if entry is None or entry[0] != version:
+        entry = (version, build())
+    cache[key] = entry
+    while len(cache) > CALENDAR_CACHE_SIZE:
+        del cache[next(iter(cache))]
+    return entry[1]
+
+
+def render_day_cell(day: date, lessons: List[Dict], dim: bool = False) -> str:
+    """Renders one calendar day and its lessons as a .cal-cell block."""
+    parts = [f'<div class="cal-cell{" dim" if dim else ""}">',
+             f'<div class="cal-date">{day.strftime("%a %b %d")}</div>']
+    for lesson in lessons:
+        parts.append(f'<div class="cal-title">{html.escape(str(lesson["title"]))}</div>')
+        parts.append(f'<div class="cal-unit">{html.escape(str(lesson["type"]))} '
+                     f'&middot; Day {lesson["day_index"]} of {lesson["duration_days"]}</div>')
+    parts.append("</div>")
+    return "".join(parts)
+
+
+def render_calendar(weeks: List[List[date]], lessons_by_date: Dict[date, List[Dict]],
+                    month: Optional[int] = None, weekday_header: bool = False) -> str:
+    """
+    Renders Monday-Friday weeks as one .cal-grid block, optionally under a weekday header
+    row. When month is given, days from other months are dimmed.
+    """
+    parts = ['<div class="cal-grid">']
+    if weekday_header:
+        parts.extend(f'<div class="weekday-header">{name}</div>' for name in calendar.day_name[:5])
+    for week in weeks:
+        for day in week:
+            parts.append(render_day_cell(day, lessons_by_date.get(day, []),
+                                         dim=month is not None and day.month != month))
+    parts.append("</div>")
+    return "".join(parts)
+
+
+def render_link(label: str, url) -> str:
+    """Renders an http(s) URL as a link opening in a new tab; other values render nothing."""
+    url = str(url or "").strip()
+    if not url.lower().startswith(("http://", "https://")):
+        return ""
+    return f'<a href="{html.escape(url)}" target="_blank" rel="noopener noreferrer">{label}</a>'
+
+
+def render_student_week(lessons_by_date: Dict[date, List[Dict]], content_lookup: Dict[str, Dict]) -> str:
+    """Renders the student view of a week's lessons, with their slide, homework and video links."""
+    parts = []
+    for day, lessons in lessons_by_date.items():
+        parts.append(f'<div class="student-day"><h3>{day.strftime("%A, %b %d")}</h3>')
+        for lesson in lessons:
+            lesson_content = content_lookup.get(lesson["lesson_id"], {})
+            links = [render_link(label, lesson_content.get(field))
+                     for label, field in (("Slides", "slides_url"), ("Homework", "homework_url"),
+                                          ("Video", "video_url"))]
+            links = [link for link in links if link]
+            parts.append('<div class="lesson-card">'
+                         f'<div class="cal-title">{html.escape(str(lesson["title"]))}</div>'
+                         f'<div class="cal-unit muted">{html.escape(str(lesson["type"]))} | '
+                         f'Day {lesson["day_index"]} of {lesson["duration_days"]}</div>')
+            if links:
+                parts.append(f'<div class="cal-hw">{" ".join(links)}</div>')
+            parts.append("</div>")
+        parts.append("</div>")
+    return "".join(parts)
+
+
+def week_view(section_id: str):
+    """Shows Monday through Friday of the selected week as one calendar row."""
+    picked = st.date_input("Week of", value=st.session_state.week_view_start, key="week_view_date_picker")
+    st.session_state.week_view_start = week_start(picked)
+    start = st.session_state.week_view_start
+    days = [start + timedelta(days=offset) for offset in range(5)]
+
+    calendar_html = cached_html(
+        ("week", section_id, days[0], days[-1]),
+        pacing_version(section_id),
+        lambda: render_calendar([days], get_pacing_store(section_id).by_date(days[0], days[-1])),
+    )
+    st.markdown(calendar_html, unsafe_allow_html=True)
+
+
+def month_view(section_id: str):
+    """Shows a Monday-Friday calendar grid for the month at calendar_cursor."""
+    cursor = st.session_state.calendar_cursor
+    col_prev, col_title, col_next = st.columns([1, 4, 1])
+    if col_prev.button("◀ Previous", key="month_prev", use_container_width=True):
+        previous_month = cursor - timedelta(days=1)
+        st.session_state.calendar_cursor = cursor = date(previous_month.year, previous_month.month, 1)
+    if col_next.button("Next ▶", key="month_next", use_container_width=True):
+        next_month = cursor + timedelta(days=calendar.monthrange(cursor.year, cursor.month)[1])
+        st.session_state.calendar_cursor = cursor = next_month
+    col_title.markdown(f"<h4 style='text-align: center'>{cursor.strftime('%B %Y')}</h4>", unsafe_allow_html=True)
+
+    weeks = [week[:5] for week in calendar.Calendar().monthdatescalendar(cursor.year, cursor.month)]
+    calendar_html = cached_html(
+        ("month", section_id, weeks[0][0], weeks[-1][-1]),
+        pacing_version(section_id),
+        lambda: render_calendar(weeks, get_pacing_store(section_id).by_date(weeks[0][0], weeks[-1][-1]),
+                                month=cursor.month, weekday_header=True),
+    )
+    st.markdown(calendar_html, unsafe_allow_html=True)
 
 
 def student_view():
@@ -389,45 +676,29 @@ def student_view():
         return
 
     sid = st.session_state.section["id"]
-    pacing = st.session_state.pacing_by_section.get(sid, pd.DataFrame())
-    if pacing.empty:
+    store = get_pacing_store(sid)
+    if not store.records:
         st.info("The pacing for this section has not been set up yet.")
         return
 
+    picked = st.date_input("Week of", value=st.session_state.student_view_week, key="student_view_date_picker")
+    st.session_state.student_view_week = week_start(picked)
     start_of_week = st.session_state.student_view_week
     end_of_week = start_of_week + timedelta(days=6)
-    
-    content_df = st.session_state.content_df.set_index("lesson_id")
-    week_pacing = pacing[(pacing["date"] >= start_of_week) & (pacing["date"] <= end_of_week)].sort_values("date")
-
-    st.date_input("Week of", value=st.session_state.student_view_week, key="student_view_date_picker")
 
-    for dt in sorted(week_pacing["date"].unique()):
-        day_schedule = week_pacing[week_pacing["date"] == dt]
-        st.markdown(f"### {dt.strftime('%A, %b %d')}")
-        
-        for _, lesson in day_schedule.iterrows():
-            st.markdown(f"**{lesson['title']}**")
-            st.caption(f"{lesson['type']} | Day {lesson['day_index']} of {lesson['duration_days']}")
-            
-            lesson_content = content_df.loc[lesson["lesson_id"]] if lesson["lesson_id"] in content_df.index else {}
-            links = []
-            if lesson_content.get("slides_url"):
-                links.append(f"[Slides]({lesson_content['slides_url']})")
-            if lesson_content.get("homework_url"):
-                links.append(f"[Homework]({lesson_content['homework_url']})")
-            if lesson_content.get("video_url"):
-                links.append(f"[Video]({lesson_content['video_url']})")
-            
-            if links:
-                st.write(" | ".join(links))
-        st.markdown("---")
+    week_html = cached_html(
+        ("student", sid, start_of_week, end_of_week),
+        (pacing_version(sid), data_version("content")),
+        lambda: render_student_week(store.by_date(start_of_week, end_of_week), get_content_lookup()),
+    )
+    st.markdown(week_html, unsafe_allow_html=True)
 
 
 # --- Main Application ---
 def main():
     """Main function to run the Streamlit application."""
     initialize_session_state()
+    sync_shared_content()
     apply_custom_css()
     display_header()
 
@@ -0,0 +1,81 @@
+"""
+Shared fixtures: a local fake chat-completions server with a GradingSession pointed at
+it (fake_openai_server.py), and in-memory spreadsheets (fake_sheets.py), so grading runs
+end to end without an API key, Google credentials or network access.
+"""
+
+import json
+import re
+
+import pytest
+
+from fake_openai_server import BATCH_ANSWERS_MARKER, FakeChatCompletionsServer
+from fake_sheets import InMemorySpreadsheet
+
+RUBRIC_ROWS = [
+    ["Criterion", "Points", "Description"],
+    ["Accuracy", "3", "States the definition correctly."],
+    ["Units", "2", "Uses the right units."],
+]
+PROMPT_ROWS = [["prompt"], ["Grade the student's explanation of velocity."]]
+
+
+def answer_number(answer):
+    """The first integer in an answer ("Answer 12: ..." -> 12), or 0 when there is none."""
+    match = re.search(r"\d+", answer)
+    return int(match.group()) if match else 0
+
+
+def numbered_grade(answer):
+    """A valid grade whose Overall is the answer's number, so tests can tell grades apart."""
+    number = answer_number(answer)
+    return {"Criteria": {"Accuracy": number, "Units": 1}, "Overall": number, "Explanation": f"Graded {answer!r}."}
+
+
+def numbered_responder(messages):
+    """Fake-server responder that grades single and batched prompts with numbered_grade."""
+    prompt = str(messages[-1]["content"])
+    if BATCH_ANSWERS_MARKER in prompt:
+        items = json.loads(prompt.split(BATCH_ANSWERS_MARKER, 1)[1].split("\n", 1)[1])
+        return json.dumps([dict(numbered_grade(item["answer"]), row=item["row"]) for item in items])
+    return json.dumps(numbered_grade(prompt.split("Student Answer:\n", 1)[1]))
+
+
+@pytest.fixture
+def fake_api():
+    """
+    Starts fake chat-completions servers: fake_api(**server_options) returns (server, session)
+    where session is a GradingSession sending its requests to that server.
+    """
+    import grading
+
+    started = []
+
+    def start(**options):
+        options.setdefault("responder", numbered_responder)
+        server = FakeChatCompletionsServer(**options)
+        server.start()
+        session = grading.GradingSession(api_key="test", base_url=server.base_url)
+        started.append((server, session))
+        return server, session
+
+    yield start
+    for server, session in started:
+        session.close()
+        server.stop()
+
+
+@pytest.fixture
+def make_spreadsheet():
+    """make_spreadsheet(answers) builds an InMemorySpreadsheet with one answers row per answer."""
+    def build(answers, headers=("Name", "Answer")):
+        rows = [list(headers)]
+        for n, answer in enumerate(answers):
+            rows.append([f"Student {n}", answer] if isinstance(answer, str) else list(answer))
+        return InMemorySpreadsheet({
+            "sampel answers": rows,
+            "sample rubric": RUBRIC_ROWS,
+            "Prompt": PROMPT_ROWS,
+        })
+
+    return build
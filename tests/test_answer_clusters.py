@@ -0,0 +1,57 @@
+import pytest
+
+from answer_clusters import AnswerClusterer, canonical_answer, jaccard, numeric_tokens, shingles
+
+
+@pytest.mark.parametrize("first, second", [
+    ("The answer is 5.", "the answer is 5"),
+    ("Speed = d/t!", "speed=d/t"),
+    ("It is 1,000 m", "It is 1,000 m."),
+    ("A well-known result", "a well known result"),
+])
+def test_formatting_differences_are_exact_duplicates(first, second):
+    assert canonical_answer(first) == canonical_answer(second)
+
+    clusterer = AnswerClusterer(threshold=1.0)
+    assert clusterer.assign(2, first) == 2
+    assert clusterer.assign(3, second) == 2
+
+
+@pytest.mark.parametrize("first, second", [
+    ("The answer is -5", "The answer is 5"),
+    ("x = 1.5", "x = 15"),
+    ("a/b", "ab"),
+    ("x = a + b", "x = ab"),
+])
+def test_meaningful_punctuation_is_kept(first, second):
+    assert canonical_answer(first) != canonical_answer(second)
+
+    clusterer = AnswerClusterer(threshold=1.0)
+    assert clusterer.assign(2, first) == 2
+    assert clusterer.assign(3, second) == 3
+
+
+def test_numeric_tokens_keep_sign_and_decimals():
+    assert numeric_tokens(canonical_answer("x = -1.5 or 2, maybe .5")) == ("-1.5", "2", ".5")
+
+
+def test_near_duplicates_with_different_numbers_are_not_merged():
+    first = "The car's velocity is v = 12 m/s, displacement over time."
+    second = "The car's velocity is v = 72 m/s, displacement over time."
+    similarity = jaccard(shingles(canonical_answer(first), 3), shingles(canonical_answer(second), 3))
+    assert similarity >= 0.8
+
+    clusterer = AnswerClusterer(threshold=0.8)
+    assert clusterer.assign(2, first) == 2
+    assert clusterer.assign(3, second) == 3
+    assert clusterer.near_duplicates == 0
+
+
+def test_near_duplicates_with_the_same_numbers_are_merged():
+    first = "Velocity is displacement divided by time, so the car moves at 12 m/s to the north."
+    second = "Velocity is displacment divided by time, so the car moves at 12 m/s to the north."
+
+    clusterer = AnswerClusterer(threshold=0.8)
+    assert clusterer.assign(2, first) == 2
+    assert clusterer.assign(3, second) == 2
+    assert clusterer.near_duplicates == 1
@@ -0,0 +1,100 @@
+import pytest
+
+import batch_grade
+from batch_grade import Assignment, AssignmentResult, format_summary, parse_manifest, run_batch
+from grading import GradingSummary
+
+
+def test_defaults_apply_to_every_entry_and_entries_override_them():
+    assignments = parse_manifest({
+        "defaults": {"answers_sheet": "answers", "incremental": True, "batch_size": 4},
+        "assignments": [
+            {"name": "Period 1", "spreadsheet": "P1 Responses"},
+            {"name": "Period 2", "spreadsheet": "P2 Responses", "batch_size": 8, "answers_sheet": "late"},
+        ],
+    })
+
+    assert assignments == [
+        Assignment("Period 1", "P1 Responses", answers_sheet="answers", incremental=True, batch_size=4),
+        Assignment("Period 2", "P2 Responses", answers_sheet="late", incremental=True, batch_size=8),
+    ]
+    assert assignments[0].rubric_sheet == "sample rubric"  # Built-in default when neither sets it.
+    assert assignments[0].concurrency is None  # Left to the command line.
+
+
+def test_bare_list_manifest_and_names_defaulting_to_the_spreadsheet():
+    assignments = parse_manifest([{"spreadsheet": "Lab Responses"}, {"name": "Essay", "spreadsheet": "Essays"}])
+
+    assert [(a.name, a.spreadsheet) for a in assignments] == [("Lab Responses", "Lab Responses"),
+                                                                ("Essay", "Essays")]
+
+
+@pytest.mark.parametrize("manifest, message", [
+    ({"assignments": [{"spreadsheet": "A", "batchsize": 3, "colour": "red"}]},
+     "Assignment 1 has unknown keys: batchsize, colour."),
+    ({"defaults": {"answer_sheet": "x"}, "assignments": [{"spreadsheet": "A"}]},
+     "Assignment 1 has unknown keys: answer_sheet."),
+    ({"assignments": [{"spreadsheet": "A"}, {"name": "B"}]}, "Assignment 2 does not name a spreadsheet."),
+    ({"assignments": [{"spreadsheet": "A"}, {"name": "A", "spreadsheet": "Other"}, {"spreadsheet": "C"},
+                      {"name": "C", "spreadsheet": "D"}]},
+     "Assignment names must be unique; repeated: A, C."),
+    ({"defaults": {"incremental": True}}, "The manifest lists no assignments."),
+    ([], "The manifest lists no assignments."),
+])
+def test_invalid_manifests_are_rejected(manifest, message):
+    with pytest.raises(ValueError) as excinfo:
+        parse_manifest(manifest)
+    assert str(excinfo.value) == message
+
+
+def test_one_failing_assignment_does_not_stop_the_others(make_spreadsheet, fake_api, monkeypatch):
+    server, session = fake_api()
+    spreadsheets = {
+        "P1 Responses": make_spreadsheet([f"Answer {n}" for n in range(1, 4)]),
+        "P2 Responses": make_spreadsheet([f"Answer {n}" for n in range(10, 15)]),
+    }
+
+    def open_spreadsheet(name, metadata_cache=None):
+        if name not in spreadsheets:
+            raise LookupError(f"Spreadsheet {name!r} not found")
+        return spreadsheets[name]
+
+    monkeypatch.setattr(session, "open_spreadsheet", open_spreadsheet)
+    assignments = parse_manifest([
+        {"name": "Period 1", "spreadsheet": "P1 Responses"},
+        {"name": "Missing", "spreadsheet": "Nowhere"},
+        {"name": "Period 2", "spreadsheet": "P2 Responses"},
+    ])
+    args = batch_grade.parse_args(["manifest.json", "--quiet", "--no-cache"])
+
+    results = run_batch(session, assignments, args, parallel_assignments=3)
+
+    assert [result.assignment.name for result in results] == ["Period 1", "Missing", "Period 2"]
+    assert [result.summary.rows_graded for result in (results[0], results[2])] == [3, 5]
+    assert isinstance(results[1].error, LookupError) and results[1].summary is None
+    assert server.request_count == 8
+    grades = spreadsheets["P2 Responses"].worksheet("sampel answers").rows
+    assert [row[2] for row in grades[1:]] == ["10", "11", "12", "13", "14"]
+
+
+def summary(graded, cached, failed):
+    return GradingSummary(rows_done=graded + cached + failed, rows_graded=graded, rows_failed=failed,
+                          cache_hits=cached, api_requests=graded, elapsed_seconds=1.0)
+
+
+def test_summary_totals_skip_failed_assignments():
+    results = [
+        AssignmentResult(Assignment("Period 1", "P1"), summary=summary(10, 2, 0), elapsed_seconds=3.25),
+        AssignmentResult(Assignment("Missing", "Nowhere"), error=LookupError("not found"), elapsed_seconds=0.5),
+        AssignmentResult(Assignment("A much longer name", "P2"), summary=summary(5, 1, 3), elapsed_seconds=12.0),
+    ]
+
+    lines = format_summary(results).splitlines()
+
+    assert lines == [
+        "Assignment           Graded   Cached   Failed   Elapsed  Status",
+        "Period 1                 10        2        0      3.2s  ok",
+        "Missing                   -        -        -      0.5s  error: not found",
+        "A much longer name        5        1        3     12.0s  rows left ungraded",
+        "Total                    15        3        3",
+    ]
@@ -0,0 +1,25 @@
+import pytest
+
+from data_sources import DataSource, MockDataSource
+
+
+def test_data_source_subclasses_must_implement_every_fetch():
+    class TeachersOnly(DataSource):
+        def fetch_teachers(self):
+            return []
+
+    with pytest.raises(TypeError):
+        TeachersOnly()
+    with pytest.raises(TypeError):
+        DataSource()
+
+
+def test_bulk_schedule_fetch_defaults_to_one_fetch_per_section():
+    source = MockDataSource()
+    section_ids = [section["id"] for section in source.fetch_sections("t_1001")]
+
+    schedules = source.fetch_master_schedules(section_ids)
+
+    assert list(schedules) == section_ids
+    assert all(schedule.equals(source.fetch_master_schedule(section_id))
+               for section_id, schedule in schedules.items())
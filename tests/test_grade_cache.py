@@ -0,0 +1,112 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import grade_cache
+import grading
+from grade_cache import GradeCache, answer_fingerprint, cache_key
+
+GRADE = json.dumps({"Criteria": {"Accuracy": 3}, "Overall": 3, "Explanation": "Good."})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replaces the cache's wall clock with one the test moves by hand (now[0], in seconds)."""
+    now = [1_000_000.0]
+    monkeypatch.setattr(grade_cache, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def key_for(answer, prompt="Prompt", rubric="Rubric", model="gpt-4", temperature=0.0):
+    return cache_key(prompt, rubric, answer, model, temperature)
+
+
+def test_keys_ignore_whitespace_but_not_the_inputs_that_shape_the_grade():
+    answer = "Velocity is displacement over time."
+    base = key_for(answer)
+
+    assert key_for("  Velocity is  displacement\nover time. ") == base
+    assert answer_fingerprint(" Velocity  is displacement over time.") == answer_fingerprint(answer)
+    changed = [
+        key_for("Velocity is distance over time."),
+        key_for(answer, prompt="Other prompt"),
+        key_for(answer, rubric="Other rubric"),
+        key_for(answer, model="gpt-4o"),
+        key_for(answer, temperature=0.7),
+    ]
+    assert base not in changed
+
+
+def test_hits_misses_and_persistence_across_reopen(tmp_path):
+    path = str(tmp_path / "grades.sqlite3")
+    with GradeCache(path) as cache:
+        assert cache.get(key_for("a")) is None
+        cache.put(key_for("a"), GRADE)
+        assert cache.get(key_for(" a ")) == GRADE
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    with GradeCache(path) as reopened:
+        assert reopened.get(key_for("a")) == GRADE
+        assert len(reopened) == 1
+
+
+def test_entries_expire_after_max_age(tmp_path, clock):
+    with GradeCache(str(tmp_path / "grades.sqlite3"), max_age_days=1) as cache:
+        cache.put(key_for("a"), GRADE)
+        clock[0] += 86400 - 1
+        assert cache.get(key_for("a")) == GRADE
+
+        clock[0] += 2
+        assert cache.get(key_for("a")) is None
+        assert cache.evict() == 1
+        assert len(cache) == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    with GradeCache(str(tmp_path / "grades.sqlite3"), max_entries=2) as cache:
+        for answer in ("a", "b"):
+            clock[0] += 1
+            cache.put(key_for(answer), GRADE)
+        clock[0] += 1
+        cache.get(key_for("a"))  # "b" is now the least recently used.
+        clock[0] += 1
+        cache.put(key_for("c"), GRADE)
+
+        assert cache.evict() == 1
+        assert cache.get(key_for("b")) is None
+        assert cache.get(key_for("a")) == GRADE
+        assert cache.get(key_for("c")) == GRADE
+
+
+def test_no_cache_and_clear_cache_flags(tmp_path):
+    path = str(tmp_path / "grades.sqlite3")
+    with GradeCache(path) as cache:
+        cache.put(key_for("a"), GRADE)
+
+    assert grading.grade_cache_from_args(grading.parse_args(["--cache-path", path, "--no-cache"])) is None
+    with GradeCache(path) as cache:
+        assert len(cache) == 1  # --no-cache alone leaves the cache alone.
+
+    cleared = grading.grade_cache_from_args(grading.parse_args(["--cache-path", path, "--clear-cache"]))
+    assert len(cleared) == 0
+    cleared.put(key_for("a"), GRADE)
+    cleared.close()
+
+    assert grading.grade_cache_from_args(grading.parse_args(["--cache-path", path, "--no-cache",
+                                                             "--clear-cache"])) is None
+    with GradeCache(path) as cache:
+        assert len(cache) == 0
+
+
+def test_second_run_is_served_from_the_cache(tmp_path, make_spreadsheet, fake_api):
+    server, session = fake_api()
+    answers = [f"Answer {n}" for n in range(1, 9)]
+    with GradeCache(str(tmp_path / "grades.sqlite3")) as cache:
+        first = grading.process_student_answers(make_spreadsheet(answers), cache=cache, quiet=True, session=session)
+        second = grading.process_student_answers(make_spreadsheet(answers), cache=cache, quiet=True,
+                                                 session=session)
+
+    assert (first.api_requests, first.cache_hits) == (8, 0)
+    assert (second.api_requests, second.cache_hits, second.rows_graded) == (0, 8, 8)
+    assert server.request_count == 8
@@ -0,0 +1,126 @@
+import json
+
+import pytest
+
+import grading
+from conftest import numbered_grade
+
+RUBRIC_TEXT = "Criterion | Points\nAccuracy | 3\nUnits | 2"
+PROMPT = "Grade the student's explanation of velocity."
+VALID = {"Criteria": {"Accuracy": 3, "Units": 2}, "Overall": 5, "Explanation": "Good."}
+
+
+@pytest.mark.parametrize("value, expected", [
+    (3, 3), (2.5, 2.5), (4.0, 4), ("3", 3), (" 3/4 ", 3), ("85%", 85), ("-1", -1), ("2.50 points", 2.5),
+    ("none", None), ("", None), (None, None), (True, None), ([3], None),
+])
+def test_coerce_score(value, expected):
+    assert grading.coerce_score(value) == expected
+
+
+def test_validate_grade_cleans_scores_and_confidence():
+    grade = grading.validate_grade({
+        "Criteria": {" Accuracy ": "3/3", "Units": 2.0}, "Overall": "B+", "Explanation": None, "Confidence": "85",
+    })
+
+    assert grade == {"Criteria": {"Accuracy": 3, "Units": 2}, "Overall": "B+", "Explanation": "", "Confidence": 0.85}
+
+
+@pytest.mark.parametrize("confidence, expected", [(0.4, 0.4), (85, 0.85), (150, 1), (-0.2, 0), ("n/a", None)])
+def test_confidence_is_kept_between_zero_and_one(confidence, expected):
+    grade = grading.validate_grade(dict(VALID, Confidence=confidence))
+
+    assert grade.get("Confidence") == expected
+
+
+@pytest.mark.parametrize("grade, message", [
+    ([VALID], "not a JSON object"),
+    ({"Criteria": {"Accuracy": 3}, "Overall": 3}, "missing keys: Explanation"),
+    (dict(VALID, Criteria={}), "non-empty object"),
+    (dict(VALID, Criteria=[3, 2]), "non-empty object"),
+    (dict(VALID, Criteria={"Accuracy": "excellent"}), "'Accuracy' is not a number"),
+    (dict(VALID, Overall=" "), "Overall grade is empty"),
+])
+def test_validate_grade_rejects_malformed_grades(grade, message):
+    with pytest.raises(grading.GradeParseError, match=message):
+        grading.validate_grade(grade)
+
+
+def test_parse_grade_result_strips_code_fences():
+    content = "```json\n" + json.dumps(VALID) + "\n```"
+
+    assert grading.parse_grade_result(content) == VALID
+    with pytest.raises(grading.GradeParseError, match="not valid JSON"):
+        grading.parse_grade_result("Overall: 5")
+
+
+def test_grade_row_values_matches_criteria_and_leaves_missing_ones_blank():
+    grade = {"Criteria": {"accuracy": 3, "Use of units!": 1}, "Overall": 4, "Explanation": "Fine."}
+
+    values = grading.grade_row_values(grade, ["Accuracy", "Use of Units", "Clarity"])
+
+    assert values == {"Grade": 4, "Accuracy Score": 3, "Use of Units Score": 1, "Clarity Score": "",
+                      "Explanation": "Fine."}
+    assert list(values) == ["Grade", "Accuracy Score", "Use of Units Score", "Clarity Score", "Explanation"]
+
+
+def malformed_then_valid(bad_replies):
+    """Responder that answers with bad_replies first, then with numbered grades."""
+    replies = list(bad_replies)
+
+    def respond(messages):
+        if replies:
+            return replies.pop(0)
+        return json.dumps(numbered_grade(str(messages[-1]["content"]).split("Student Answer:\n", 1)[1]))
+
+    return respond
+
+
+def test_malformed_replies_are_counted_and_retried_with_backoff(fake_api, monkeypatch):
+    server, session = fake_api(responder=malformed_then_valid(["not json", json.dumps({"Overall": 3})]))
+    sleeps = []
+    monkeypatch.setattr(grading.time, "sleep", sleeps.append)
+    stats = grading.RunStats()
+
+    results = list(grading.grade_answers_concurrently([(2, "Answer 7")], RUBRIC_TEXT, PROMPT, max_workers=1,
+                                                      stats=stats, max_parse_attempts=3, parse_retry_delay=0.5,
+                                                      session=session))
+
+    assert results == [(2, grading.validate_grade(numbered_grade("Answer 7")))]
+    assert server.request_count == 3
+    assert sleeps == [0.5, 1.0]
+    assert stats.counters["malformed_results"] == 2
+    assert stats.counters["parse_retries"] == 2
+
+
+def test_row_fails_once_parse_attempts_run_out(fake_api, monkeypatch):
+    server, session = fake_api(responder=lambda messages: "still not json")
+    monkeypatch.setattr(grading.time, "sleep", lambda seconds: None)
+    stats = grading.RunStats()
+
+    results = list(grading.grade_answers_concurrently([(2, "Answer 7")], RUBRIC_TEXT, PROMPT, max_workers=1,
+                                                      stats=stats, max_parse_attempts=3, session=session))
+
+    assert results == [(2, None)]
+    assert server.request_count == 3
+    assert stats.counters["malformed_results"] == 3
+    assert stats.failed_rows == [2]
+
+
+def test_each_graded_row_is_written_as_one_contiguous_range(make_spreadsheet, fake_api):
+    _, session = fake_api()
+    spreadsheet = make_spreadsheet(["Answer 1", "Answer 2", "Answer 3"])
+    worksheet = spreadsheet.worksheet("sampel answers")
+    updates = []
+    batch_update = worksheet.batch_update
+    worksheet.batch_update = lambda data, **kwargs: (updates.append(data), batch_update(data, **kwargs))[1]
+
+    grading.process_student_answers(spreadsheet, flush_every=10, rubric_range="A1:C3", quiet=True, session=session)
+
+    headers, results = updates
+    assert headers == [{"range": "C1:G1", "values": [["Grade", "Accuracy Score", "Units Score", "Explanation",
+                                                      "Answer Fingerprint"]]}]
+    assert [entry["range"] for entry in results] == ["C2:G4"]
+    for n, row in enumerate(results[0]["values"], start=1):
+        assert row[:3] == [n, n, 1]
+        assert row[4] == grading.answer_fingerprint(f"Answer {n}")
@@ -0,0 +1,95 @@
+import random
+import time
+
+import grading
+from answer_clusters import AnswerClusterer
+from resilience import ResilientCaller
+from conftest import answer_number, numbered_responder
+
+RUBRIC_TEXT = "Criterion | Points\nAccuracy | 3\nUnits | 2"
+PROMPT = "Grade the student's explanation of velocity."
+
+
+def jittered_responder(messages):
+    """numbered_responder, after a random delay so requests finish out of order."""
+    time.sleep(random.uniform(0, 0.02))
+    return numbered_responder(messages)
+
+
+def test_results_keep_job_order_under_concurrency(fake_api):
+    server, session = fake_api(responder=jittered_responder)
+    jobs = [(row_idx, f"Answer {row_idx}: velocity is displacement over time.") for row_idx in range(2, 62)]
+
+    results = list(grading.grade_answers_concurrently(jobs, RUBRIC_TEXT, PROMPT, max_workers=8, session=session))
+
+    assert [row_idx for row_idx, _ in results] == [row_idx for row_idx, _ in jobs]
+    assert all(grade["Overall"] == row_idx for row_idx, grade in results)
+    assert server.request_count == len(jobs)
+    assert server.max_in_flight > 1
+
+
+def test_batched_results_keep_job_order(fake_api):
+    server, session = fake_api(responder=jittered_responder)
+    jobs = [(row_idx, f"Answer {row_idx}") for row_idx in range(2, 40)]
+
+    results = list(grading.grade_answers_concurrently(jobs, RUBRIC_TEXT, PROMPT, max_workers=4, batch_size=5,
+                                                      session=session))
+
+    assert [(row_idx, grade["Overall"]) for row_idx, grade in results] == [
+        (row_idx, answer_number(answer)) for row_idx, answer in jobs
+    ]
+    assert server.request_count == 8  # 38 answers, five per request.
+
+
+def test_window_stays_bounded_for_generator_jobs(fake_api):
+    _, session = fake_api()
+    pulled = []
+
+    def jobs():
+        for row_idx in range(2, 202):
+            pulled.append(row_idx)
+            yield row_idx, f"Answer {row_idx}"
+
+    results = grading.grade_answers_concurrently(jobs(), RUBRIC_TEXT, PROMPT, max_workers=2, session=session)
+    first_row, _ = next(results)
+
+    assert first_row == 2
+    assert len(pulled) <= 2 * 2 + 1
+    results.close()
+
+
+def test_duplicate_answers_receive_their_representatives_grade(fake_api):
+    server, session = fake_api()
+    distinct = [f"Answer {n}: velocity is displacement over time." for n in range(1, 6)]
+    jobs = [(row_idx, distinct[n % len(distinct)]) for n, row_idx in enumerate(range(2, 22))]
+    clusterer = AnswerClusterer(threshold=1.0)
+
+    results = list(grading.grade_answers_concurrently(jobs, RUBRIC_TEXT, PROMPT, max_workers=4,
+                                                      clusterer=clusterer, session=session))
+
+    assert [(row_idx, grade["Overall"]) for row_idx, grade in results] == [
+        (row_idx, answer_number(answer)) for row_idx, answer in jobs
+    ]
+    assert server.request_count == len(distinct)
+    assert clusterer.exact_duplicates == len(jobs) - len(distinct)
+
+
+def test_dead_lettered_cluster_is_regraded_once(fake_api):
+    server, session = fake_api(fail_first=1)
+    distinct = [f"Answer {n}: velocity is displacement over time." for n in range(1, 11)]
+    jobs = [(row_idx, distinct[n % len(distinct)]) for n, row_idx in enumerate(range(2, 32))]
+    stats = grading.RunStats()
+    caller = ResilientCaller(max_attempts=1, stats=stats, sleep=lambda seconds: None)
+
+    results = list(grading.grade_answers_concurrently(jobs, RUBRIC_TEXT, PROMPT, max_workers=1, stats=stats,
+                                                      caller=caller, clusterer=AnswerClusterer(threshold=1.0),
+                                                      session=session))
+
+    # The first answer's cluster is dead-lettered, re-processed after the others and yielded last.
+    first_cluster = [row_idx for row_idx, answer in jobs if answer == distinct[0]]
+    assert [row_idx for row_idx, _ in results[-len(first_cluster):]] == first_cluster
+    assert sorted((row_idx, grade["Overall"]) for row_idx, grade in results) == [
+        (row_idx, answer_number(answer)) for row_idx, answer in jobs
+    ]
+    assert server.request_count == len(distinct) + 1
+    assert stats.failed_rows == []
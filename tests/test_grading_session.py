@@ -0,0 +1,72 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import grading
+from fake_openai_server import FakeChatCompletionsServer
+
+
+@pytest.fixture
+def server():
+    with FakeChatCompletionsServer() as fake:
+        yield fake
+
+
+def ask(session):
+    reply = session.openai_client.chat.completions.create(
+        model=grading.DEFAULT_MODEL, messages=[{"role": "user", "content": "Grade this."}]
+    )
+    return reply.choices[0].message.content
+
+
+def test_nothing_is_loaded_until_the_client_is_used(tmp_path, server):
+    key_path = tmp_path / "openai_key.txt"
+    session = grading.GradingSession(api_key_path=str(key_path), base_url=server.base_url)
+    assert session._openai_client is None  # The key file does not exist yet; that is fine until first use.
+
+    key_path.write_text("  sk-from-file\n")
+    with session:
+        assert ask(session)
+        assert session.openai_client.api_key == "sk-from-file"
+    assert server.request_count == 1
+
+
+def test_missing_key_file_fails_on_first_use(tmp_path, server):
+    session = grading.GradingSession(api_key_path=str(tmp_path / "missing.txt"), base_url=server.base_url)
+
+    with pytest.raises(FileNotFoundError):
+        session.openai_client
+
+
+def test_client_is_reused_and_recreated_after_close(server):
+    session = grading.GradingSession(api_key="test", base_url=server.base_url)
+    client = session.openai_client
+    assert session.openai_client is client
+
+    session.close()
+    assert session._openai_client is None
+    recreated = session.openai_client
+    assert recreated is not client
+    assert ask(session)
+    session.close()
+
+
+def test_set_base_url_switches_endpoint(server):
+    with FakeChatCompletionsServer() as other, grading.GradingSession(api_key="test",
+                                                                      base_url=server.base_url) as session:
+        ask(session)
+        session.set_base_url(other.base_url)
+        ask(session)
+
+    assert (server.request_count, other.request_count) == (1, 1)
+
+
+def test_connection_pool_caps_concurrent_requests():
+    with FakeChatCompletionsServer(latency=0.1) as server, \
+            grading.GradingSession(api_key="test", base_url=server.base_url, max_connections=2) as session:
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            replies = list(pool.map(lambda _: ask(session), range(6)))
+
+    assert all(replies)
+    assert server.request_count == 6
+    assert server.max_in_flight == 2
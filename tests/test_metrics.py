@@ -0,0 +1,127 @@
+import json
+import os
+
+import pytest
+
+import metrics
+from metrics import JsonlMetricsSink, PrometheusMetricsSink, StageTimings, open_metrics_sink
+
+
+def timings_of(stage_samples):
+    timings = StageTimings()
+    for stage, samples in stage_samples.items():
+        for seconds in samples:
+            timings.record(stage, seconds)
+    return timings
+
+
+def test_percentiles_use_the_nearest_rank():
+    # Recorded out of order: 0.001s .. 0.100s.
+    snapshot = timings_of({"api": [n / 1000 for n in reversed(range(1, 101))]}).snapshot()["api"]
+
+    assert snapshot["count"] == 100
+    assert snapshot["total_seconds"] == pytest.approx(5.05)
+    assert snapshot["mean_ms"] == pytest.approx(50.5)
+    assert snapshot["p50_ms"] == pytest.approx(50)
+    assert snapshot["p95_ms"] == pytest.approx(95)
+    assert snapshot["max_ms"] == pytest.approx(100)
+
+
+@pytest.mark.parametrize("samples, p50, p95", [
+    ([0.2], 200, 200),
+    ([0.3, 0.1], 100, 300),
+    ([0.3, 0.1, 0.2], 200, 300),
+    ([0.4, 0.1, 0.3, 0.2], 200, 400),
+])
+def test_percentiles_of_few_samples(samples, p50, p95):
+    snapshot = timings_of({"parse": samples}).snapshot()["parse"]
+    assert (snapshot["p50_ms"], snapshot["p95_ms"]) == (pytest.approx(p50), pytest.approx(p95))
+
+
+def test_samples_are_capped_but_count_total_and_max_are_exact(monkeypatch):
+    monkeypatch.setattr(metrics, "MAX_SAMPLES_PER_STAGE", 10)
+    timings = timings_of({"api": [0.001] * 99 + [1.0]})
+
+    snapshot = timings.snapshot()["api"]
+    assert len(timings._stages["api"]["samples"]) == 10
+    assert snapshot["count"] == 100
+    assert snapshot["total_seconds"] == pytest.approx(1.099)
+    assert snapshot["max_ms"] == pytest.approx(1000)
+
+
+def test_span_records_a_sample_when_the_body_raises():
+    timings = StageTimings()
+    with pytest.raises(ValueError):
+        with timings.span("parse"):
+            raise ValueError("bad JSON")
+    with timings.span("write_back"):
+        pass
+
+    assert list(timings.snapshot()) == ["parse", "write_back"]
+    assert timings.snapshot()["parse"]["count"] == 1
+
+
+def test_jsonl_sink_appends_one_record_per_run(tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    sink = open_metrics_sink(str(path))
+    assert isinstance(sink, JsonlMetricsSink)
+
+    sink.write({"spreadsheet": "Period 1"}, {"api_requests": 3, "cache_hits": 1}, timings_of({"api": [0.5]}))
+    sink.write({"spreadsheet": "Period 2"}, {"api_requests": 0}, StageTimings())
+
+    first, second = [json.loads(line) for line in path.read_text().splitlines()]
+    assert set(first) == {"timestamp", "labels", "counters", "stages"}
+    assert first["labels"] == {"spreadsheet": "Period 1"}
+    assert first["counters"] == {"api_requests": 3, "cache_hits": 1}
+    assert first["stages"] == {"api": {"count": 1, "total_seconds": 0.5, "mean_ms": 500.0, "p50_ms": 500.0,
+                                       "p95_ms": 500.0, "max_ms": 500.0}}
+    assert (second["labels"], second["stages"]) == ({"spreadsheet": "Period 2"}, {})
+
+
+def test_prometheus_sink_keeps_the_latest_values_per_label_set(tmp_path):
+    path = tmp_path / "grading.prom"
+    sink = open_metrics_sink(str(path))
+    assert isinstance(sink, PrometheusMetricsSink)
+
+    sink.write({"sheet": "P1"}, {"api_requests": 3}, timings_of({"api": [0.25]}))
+    sink.write({"sheet": 'Say "hi"\n'}, {"api_requests": 1}, StageTimings())
+    sink.write({"sheet": "P1"}, {"api_requests": 5}, timings_of({"api": [0.5, 1.5]}))
+
+    assert path.read_text().splitlines() == [
+        "# TYPE grading_api_requests gauge",
+        'grading_api_requests{sheet="P1"} 5',
+        'grading_api_requests{sheet="Say \\"hi\\"\\n"} 1',
+        "# TYPE grading_stage_seconds_total gauge",
+        'grading_stage_seconds_total{sheet="P1",stage="api"} 2.000000',
+        "# TYPE grading_stage_count gauge",
+        'grading_stage_count{sheet="P1",stage="api"} 2',
+        "# TYPE grading_stage_p50_seconds gauge",
+        'grading_stage_p50_seconds{sheet="P1",stage="api"} 0.500000',
+        "# TYPE grading_stage_p95_seconds gauge",
+        'grading_stage_p95_seconds{sheet="P1",stage="api"} 1.500000',
+        "# TYPE grading_stage_max_seconds gauge",
+        'grading_stage_max_seconds{sheet="P1",stage="api"} 1.500000',
+    ]
+    assert os.listdir(tmp_path) == ["grading.prom"]  # The temporary file was renamed into place.
+
+
+def test_prometheus_file_is_replaced_atomically(tmp_path, monkeypatch):
+    path = tmp_path / "grading.prom"
+    sink = PrometheusMetricsSink(str(path))
+    sink.write({"sheet": "P1"}, {"api_requests": 3}, StageTimings())
+    before = path.read_text()
+
+    def interrupted(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(metrics.os, "replace", interrupted)
+    with pytest.raises(OSError):
+        sink.write({"sheet": "P1"}, {"api_requests": 4}, StageTimings())
+
+    # A scrape during the failed write still reads the complete previous file.
+    assert path.read_text() == before
+
+
+def test_no_metrics_file_means_no_sink():
+    assert open_metrics_sink(None) is None
+    assert open_metrics_sink("") is None
@@ -0,0 +1,106 @@
+import json
+
+import grading
+from conftest import answer_number
+from fake_openai_server import BATCH_ANSWERS_MARKER
+
+RUBRIC_TEXT = "Criterion | Points\nAccuracy | 3\nUnits | 2"
+PROMPT = "Grade the student's explanation of velocity."
+CHEAP, STRONG = "cheap-model", "strong-model"
+
+
+def cheap_grade(answer):
+    """The cheap tier is sure of "sure" answers, unsure of "unsure" ones and scores "edge" ones at 69."""
+    number = answer_number(answer)
+    if answer.startswith("invalid"):
+        return "Sorry, I cannot grade this."
+    overall = 69 if answer.startswith("edge") else number
+    confidence = 0.3 if answer.startswith("unsure") else 0.95
+    return {"Criteria": {"Accuracy": 3, "Units": 2}, "Overall": overall, "Explanation": "cheap",
+            "Confidence": confidence}
+
+
+def strong_grade(answer):
+    """The strong tier adds 100 so tests can tell who graded; it is unsure and near a boundary, but kept."""
+    return {"Criteria": {"Accuracy": 3, "Units": 2}, "Overall": 100 + answer_number(answer),
+            "Explanation": "strong", "Confidence": 0.1}
+
+
+def responder_for(grade_answer):
+    def respond(messages):
+        prompt = str(messages[-1]["content"])
+        if BATCH_ANSWERS_MARKER in prompt:
+            items = json.loads(prompt.split(BATCH_ANSWERS_MARKER, 1)[1].split("\n", 1)[1])
+            replies = [grade_answer(item["answer"]) for item in items]
+            return json.dumps([dict(reply, row=item["row"]) for item, reply in zip(items, replies)
+                               if isinstance(reply, dict)])
+        reply = grade_answer(prompt.split("Student Answer:\n", 1)[1])
+        return reply if isinstance(reply, str) else json.dumps(reply)
+    return respond
+
+
+def run_cascade(fake_api, answers, batch_size=1):
+    server, session = fake_api(responders={CHEAP: responder_for(cheap_grade), STRONG: responder_for(strong_grade)})
+    cascade = grading.build_cascade([CHEAP, STRONG], min_confidence=0.7, boundaries="70", boundary_margin=1)
+    stats = grading.RunStats()
+    jobs = list(enumerate(answers, start=2))
+    results = dict(grading.grade_answers_concurrently(jobs, RUBRIC_TEXT, PROMPT, max_workers=2, batch_size=batch_size,
+                                                      stats=stats, cascade=cascade, parse_retry_delay=0,
+                                                      session=session))
+    return server, stats, [results[row_idx]["Overall"] for row_idx, _ in jobs]
+
+
+def test_each_escalation_rule_sends_the_answer_to_the_next_tier(fake_api):
+    answers = ["sure 1", "invalid 2", "unsure 3", "edge 4", "sure 5"]
+
+    server, stats, overall = run_cascade(fake_api, answers)
+
+    assert overall == [1, 102, 103, 104, 5]
+    assert server.model_requests == {CHEAP: 5, STRONG: 3}
+    counters = stats.counters
+    assert (counters["tier0_requests"], counters["tier0_accepted"], counters["tier0_escalated"]) == (5, 2, 3)
+    assert (counters["tier1_requests"], counters["tier1_accepted"], counters["tier1_escalated"]) == (3, 3, 0)
+    assert (counters["escalated_invalid"], counters["escalated_low_confidence"],
+            counters["escalated_near_boundary"]) == (1, 1, 1)
+    # Lower tiers escalate a malformed reply instead of retrying it.
+    assert counters["malformed_results"] == 1
+    assert "parse_retries" not in counters
+
+
+def test_last_tier_grade_is_kept_even_when_it_would_escalate(fake_api):
+    _, stats, overall = run_cascade(fake_api, ["unsure 7"])
+
+    assert overall == [107]  # Confidence 0.1, but there is no tier left to ask.
+    assert stats.failed_rows == []
+
+
+def test_batched_first_tier_escalates_single_answers(fake_api):
+    answers = ["sure 1", "unsure 2", "sure 3", "invalid 4", "edge 5", "sure 6"]
+
+    server, stats, overall = run_cascade(fake_api, answers, batch_size=3)
+
+    assert overall == [1, 102, 3, 104, 105, 6]
+    # Two batched requests; the invalid answer is missing from its batch reply and retried alone.
+    assert server.model_requests[CHEAP] == 2 + 1
+    assert server.model_requests[STRONG] == 3
+    assert stats.counters["tier0_accepted"] == 3
+
+
+def test_escalation_reason():
+    cascade = grading.ModelCascade((CHEAP, STRONG), min_confidence=0.7, boundaries=(60.0, 70.0), boundary_margin=1)
+    grade = {"Criteria": {}, "Overall": 85, "Explanation": ""}
+
+    assert cascade.escalation_reason(grade) == "low_confidence"  # No Confidence reported.
+    assert cascade.escalation_reason(dict(grade, Confidence=0.69)) == "low_confidence"
+    assert cascade.escalation_reason(dict(grade, Confidence=0.7)) is None
+    assert cascade.escalation_reason(dict(grade, Overall=59, Confidence=0.9)) == "near_boundary"
+    assert cascade.escalation_reason(dict(grade, Overall=71, Confidence=0.9)) == "near_boundary"
+    assert cascade.escalation_reason(dict(grade, Overall=71.5, Confidence=0.9)) is None
+    assert cascade.escalation_reason(dict(grade, Overall="B+", Confidence=0.9)) is None
+
+
+def test_cascade_settings_change_the_cache_model():
+    base = grading.build_cascade([CHEAP, STRONG], min_confidence=0.7)
+    assert grading.build_cascade([CHEAP]).cache_model == CHEAP
+    assert base.cache_model != grading.build_cascade([CHEAP, STRONG], min_confidence=0.8).cache_model
+    assert base.cache_model != grading.build_cascade([CHEAP, STRONG], min_confidence=0.7, boundaries="70").cache_model
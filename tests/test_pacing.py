@@ -0,0 +1,219 @@
+import random
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from bench_pacing import make_plan, make_schedule, reference_build_pacing
+from pacing import (
+    PacingIndex,
+    PacingStore,
+    build_content_lookup,
+    build_pacing,
+    bulk_repace,
+    empty_pacing,
+    plan_from_content,
+    prepare_content,
+    repace_section,
+    seed_plan,
+    seed_plans,
+)
+
+
+def assert_same_pacing(actual, expected):
+    if expected.empty:
+        assert actual.empty
+        return
+    pd.testing.assert_frame_equal(actual.reset_index(drop=True), expected.reset_index(drop=True),
+                                  check_dtype=False)
+
+
+@pytest.mark.parametrize("weeks, lessons", [(40, 90), (4, 30), (40, 10)])
+def test_build_pacing_matches_the_row_by_row_reference(weeks, lessons):
+    schedule = make_schedule(date(2025, 8, 25), weeks)
+    plan = make_plan(lessons, random.Random(weeks * lessons))
+
+    assert_same_pacing(build_pacing(schedule, plan), reference_build_pacing(schedule, plan))
+
+
+@pytest.mark.parametrize("weeks", [40, 6])
+def test_set_duration_matches_a_full_rebuild(weeks):
+    rng = random.Random(weeks)
+    schedule = make_schedule(date(2025, 8, 25), weeks)
+    plan = make_plan(60, rng)
+    index = PacingIndex(schedule, plan)
+
+    # Edits anywhere in the plan, including zero-day lessons and lessons past the schedule's end.
+    for _ in range(40):
+        lesson_pos = rng.randrange(len(plan))
+        duration_days = rng.choice([0, 1, 2, 3, 5, 8])
+        plan = plan.copy()
+        plan.iloc[lesson_pos, plan.columns.get_loc("duration_days")] = duration_days
+
+        pacing = index.set_duration(lesson_pos, duration_days)
+
+        assert_same_pacing(pacing, build_pacing(schedule, plan))
+        pd.testing.assert_frame_equal(index.plan, plan)
+
+
+def assert_same_repace(actual, expected):
+    assert actual.section_id == expected.section_id
+    assert actual.reseeded == expected.reseeded
+    pd.testing.assert_frame_equal(actual.plan, expected.plan)
+    pd.testing.assert_frame_equal(actual.pacing, expected.pacing)
+    if expected.index is None:
+        assert actual.index is None
+        return
+    pd.testing.assert_frame_equal(actual.index.meetings, expected.index.meetings)
+    for name in ("durations", "spans", "lesson_starts"):
+        assert (getattr(actual.index, name) == getattr(expected.index, name)).all()
+
+
+def test_bulk_repace_matches_repacing_each_section():
+    rng = random.Random(3)
+    content = prepare_content(make_plan(120, rng))
+    schedule = make_schedule(date(2025, 8, 25), 30)
+    partial = [plan_from_content(content.sample(frac=0.8, random_state=n).sort_index()) for n in range(6)]
+    extra_column = partial[0].assign(notes="")
+    text_units = partial[1].assign(unit=partial[1]["unit"].astype(str))
+    datetime_schedule = schedule.assign(date=pd.to_datetime(schedule["date"]))
+    doubled_schedule = pd.concat([schedule, schedule.iloc[::-7]], ignore_index=True)  # Repeated dates.
+
+    plans = {
+        "partial_a": partial[2], "partial_b": partial[3], "short_year": partial[4],
+        "complete": seed_plan(content, partial[5]), "extra_column": extra_column, "text_units": text_units,
+        "datetime_dates": partial[2], "repeated_dates": partial[3], "no_schedule": partial[4],
+        "no_meetings": partial[5],
+    }
+    schedules = {
+        "partial_a": schedule, "partial_b": schedule, "short_year": make_schedule(date(2025, 8, 25), 3),
+        "complete": schedule, "extra_column": schedule, "text_units": schedule,
+        "datetime_dates": datetime_schedule, "repeated_dates": doubled_schedule, "no_schedule": None,
+        "no_meetings": schedule.assign(block_id=None), "new_section": schedule, "empty_schedule": schedule.iloc[:0],
+    }
+
+    for reseed in (True, False):
+        expected = [repace_section(sid, content, plans.get(sid), schedules[sid], reseed) for sid in schedules]
+        actual = bulk_repace(content, plans, schedules, reseed=reseed)
+        assert [result.section_id for result in actual] == list(schedules)
+        for actual_result, expected_result in zip(actual, expected):
+            assert_same_repace(actual_result, expected_result)
+
+
+def test_seed_plans_matches_seed_plan():
+    rng = random.Random(5)
+    content = prepare_content(make_plan(300, rng))
+    plans = {f"s{n}": plan_from_content(content.sample(frac=0.9, random_state=n).sort_index()).iloc[::-1]
+             for n in range(20)}
+    plans["none"] = None
+    plans["complete"] = plan_from_content(content)
+
+    seeded = seed_plans(content, plans)
+
+    for section_id, plan in plans.items():
+        expected = seed_plan(content, plan)
+        if expected is None:
+            assert seeded[section_id] is None
+        else:
+            pd.testing.assert_frame_equal(seeded[section_id], expected)
+
+
+MON, TUE, WED, THU, FRI = (date(2025, 9, day) for day in range(1, 6))
+
+
+@pytest.fixture
+def store():
+    # Stored out of date order, with two lessons on Wednesday.
+    return PacingStore(pd.DataFrame({
+        "date": [WED, MON, FRI, WED],
+        "lesson_id": ["L2", "L1", "L4", "L3"],
+    }))
+
+
+def lesson_ids(records):
+    return [record["lesson_id"] for record in records]
+
+
+@pytest.mark.parametrize("start, end, expected", [
+    (MON, FRI, ["L1", "L2", "L3", "L4"]),  # Both ends inclusive.
+    (WED, WED, ["L2", "L3"]),  # A single day, keeping stored order within it.
+    (TUE, THU, ["L2", "L3"]),  # Ends without lessons.
+    (TUE, TUE, []),
+    (FRI, MON, []),  # Reversed range.
+    (date(2025, 8, 1), date(2025, 8, 31), []),  # Entirely before the first lesson.
+    (date(2025, 9, 6), date(2025, 9, 30), []),  # Entirely after the last lesson.
+    (date(2025, 8, 25), MON, ["L1"]),  # Starts before the store.
+    (THU, date(2025, 12, 31), ["L4"]),  # Ends after the store.
+])
+def test_pacing_store_between(store, start, end, expected):
+    assert lesson_ids(store.between(start, end)) == expected
+
+
+def test_pacing_store_by_date_omits_days_without_lessons(store):
+    days = store.by_date(MON, THU)
+
+    assert list(days) == [MON, WED]
+    assert lesson_ids(days[WED]) == ["L2", "L3"]
+
+
+def test_empty_pacing_store():
+    store = PacingStore(empty_pacing())
+
+    assert store.records == []
+    assert store.between(MON, FRI) == []
+    assert store.by_date(MON, FRI) == {}
+
+
+def test_prepare_content_types_and_sorts_rows():
+    raw = pd.DataFrame({
+        "order": ["3", 1, None, "2"],
+        "lesson_id": ["L3", "L1", "L0", "L2"],
+        "title": ["Three", "One", "Zero", "Two"],
+        "type": "Lesson",
+        "unit": [2, "1", "x", 1],
+        "lesson_no": [1, 2, 1, "1"],
+    }, index=[10, 11, 12, 13])
+
+    content = prepare_content(raw)
+
+    assert list(content["lesson_id"]) == ["L0", "L2", "L1", "L3"]
+    assert list(content.index) == [0, 1, 2, 3]
+    for col in ("order", "unit", "lesson_no"):
+        assert content[col].dtype.kind == "i"
+    assert list(content["unit"]) == [1, 1, 1, 2]  # "x" became 1.
+    pd.testing.assert_frame_equal(prepare_content(content), content)  # Already canonical.
+    assert list(raw["lesson_id"]) == ["L3", "L1", "L0", "L2"]  # The input is left alone.
+
+
+def test_prepared_content_is_shared_across_sections_without_being_modified():
+    rng = random.Random(7)
+    content = prepare_content(make_plan(40, rng))
+    original = content.copy()
+    schedule = make_schedule(date(2025, 8, 25), 12)
+    plans = {
+        "new": None,
+        "partial": plan_from_content(content.iloc[::2]),
+        "complete": plan_from_content(content),
+    }
+
+    seeded = {sid: seed_plan(content, plan) for sid, plan in plans.items()}
+    seeded["new"].loc[0, "title"] = "Edited in one section"
+    seeded["partial"]["duration_days"] = 3
+    results = bulk_repace(content, plans, {sid: schedule for sid in plans})
+    lookup = build_content_lookup(content)
+    lookup[content["lesson_id"][0]]["title"] = "Edited lookup"
+
+    pd.testing.assert_frame_equal(content, original)
+    assert seeded["complete"] is None
+    assert [list(result.plan["lesson_id"]) for result in results] == [list(content["lesson_id"])] * 3
+
+
+def test_in_process_bulk_repace_reports_the_average_time():
+    content = prepare_content(make_plan(20, random.Random(9)))
+    schedule = make_schedule(date(2025, 8, 25), 6)
+
+    results = bulk_repace(content, {}, {"a": schedule, "b": schedule, "c": None})
+
+    assert all(result.bulk for result in results)
+    assert len({result.seconds for result in results}) == 1
+    assert not repace_section("a", content, None, schedule).bulk
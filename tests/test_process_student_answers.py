@@ -0,0 +1,85 @@
+import grading
+
+
+def grade_all(spreadsheet, session, **options):
+    options.setdefault("quiet", True)
+    return grading.process_student_answers(spreadsheet, session=session, **options)
+
+
+def column(worksheet, header):
+    """1-indexed column of a header in the answers sheet."""
+    return worksheet.rows[0].index(header) + 1
+
+
+def test_incremental_run_grades_only_new_and_changed_rows(make_spreadsheet, fake_api):
+    server, session = fake_api()
+    spreadsheet = make_spreadsheet([f"Answer {n}" for n in range(1, 11)])
+    worksheet = spreadsheet.worksheet("sampel answers")
+    grade_all(spreadsheet, session)
+    assert server.request_count == 10
+
+    answer_col = column(worksheet, "Answer")
+    grade_col = column(worksheet, grading.GRADE_HEADER)
+    worksheet.rows[3][answer_col - 1] = "Answer 30"  # Edited after grading (row 4).
+    worksheet.rows[5][grade_col - 1] = ""  # Grade cleared (row 6).
+    worksheet.rows.append(["Late student", "Answer 11"])  # New submission (row 12).
+
+    summary = grade_all(spreadsheet, session, incremental=True)
+
+    assert server.request_count == 10 + 3
+    assert summary.rows_graded == 3
+    assert worksheet.cell_value(4, grade_col) == "30"
+    assert worksheet.cell_value(6, grade_col) == "5"
+    assert worksheet.cell_value(12, grade_col) == "11"
+
+
+def test_rows_without_fingerprint_are_skipped_and_reported(make_spreadsheet, fake_api, capsys):
+    server, session = fake_api()
+    spreadsheet = make_spreadsheet([f"Answer {n}" for n in range(1, 6)])
+    worksheet = spreadsheet.worksheet("sampel answers")
+    grade_all(spreadsheet, session)
+    fingerprint_col = column(worksheet, grading.FINGERPRINT_HEADER)
+    for row in worksheet.rows[1:3]:
+        row[fingerprint_col - 1] = ""  # Graded before fingerprints were stored.
+    capsys.readouterr()
+
+    summary = grade_all(spreadsheet, session, incremental=True)
+
+    assert summary.rows_graded == 0
+    assert server.request_count == 5
+    assert "2 of them have no answer fingerprint" in capsys.readouterr().out
+
+
+def test_regrade_unfingerprinted_backfills_fingerprints(make_spreadsheet, fake_api):
+    server, session = fake_api()
+    spreadsheet = make_spreadsheet([f"Answer {n}" for n in range(1, 6)])
+    worksheet = spreadsheet.worksheet("sampel answers")
+    grade_all(spreadsheet, session)
+    fingerprint_col = column(worksheet, grading.FINGERPRINT_HEADER)
+    for row in worksheet.rows[1:3]:
+        row[fingerprint_col - 1] = ""
+
+    summary = grade_all(spreadsheet, session, incremental=True, regrade_unfingerprinted=True)
+
+    assert summary.rows_graded == 2
+    assert server.request_count == 5 + 2
+    assert worksheet.cell_value(2, fingerprint_col) == grading.answer_fingerprint("Answer 1")
+    assert grade_all(spreadsheet, session, incremental=True).rows_graded == 0
+
+
+def test_paging_reads_past_a_blank_gap_longer_than_a_page(make_spreadsheet, fake_api):
+    server, session = fake_api()
+    answers = [f"Answer {n}" for n in range(1, 4)] + [[]] * 7 + [f"Answer {n}" for n in range(4, 6)]
+    spreadsheet = make_spreadsheet(answers)
+    worksheet = spreadsheet.worksheet("sampel answers")
+    totals = []
+    progress = grading.ProgressTracker(lambda update: totals.append(update.rows_total))
+
+    summary = grade_all(spreadsheet, session, page_size=3, progress=progress)
+
+    assert summary.rows_graded == 5
+    assert server.request_count == 5
+    grade_col = column(worksheet, grading.GRADE_HEADER)
+    assert [worksheet.cell_value(row, grade_col) for row in (12, 13)] == ["4", "5"]
+    assert totals[0] == len(answers)  # Estimated from the grid before the first row finished.
+    assert progress.rows_total == progress.progress().rows_done  # Corrected once paging ended.
@@ -0,0 +1,216 @@
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+
+import grading
+from conftest import answer_number
+from resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ResilientCaller,
+    RetriesExhaustedError,
+    is_retryable,
+    retry_after_seconds,
+)
+
+RUBRIC_TEXT = "Criterion | Points\nAccuracy | 3\nUnits | 2"
+PROMPT = "Grade the student's explanation of velocity."
+
+
+class FakeAPIError(Exception):
+    """Stands in for openai.APIStatusError: a status code and optional response headers."""
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+class Stats:
+    def __init__(self):
+        self.counters = Counter()
+
+    def increment(self, name, amount=1):
+        self.counters[name] += amount
+
+
+def failing(errors, result="ok"):
+    """A callable that raises each of errors in turn, then returns result."""
+    calls = []
+
+    def call():
+        calls.append(len(calls) + 1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    call.calls = calls
+    return call
+
+
+@pytest.mark.parametrize("status_code, retryable", [
+    (408, True), (409, True), (429, True), (500, True), (503, True),
+    (400, False), (401, False), (404, False), (None, False),
+])
+def test_is_retryable(status_code, retryable):
+    assert is_retryable(FakeAPIError(status_code)) is retryable
+
+
+def test_retry_after_seconds_reads_both_headers():
+    assert retry_after_seconds(FakeAPIError(429, {"retry-after": "7"})) == 7.0
+    assert retry_after_seconds(FakeAPIError(429, {"retry-after-ms": "250"})) == 0.25
+    assert retry_after_seconds(FakeAPIError(429)) is None
+
+
+def test_transient_errors_are_retried_with_backoff():
+    sleeps = []
+    stats = Stats()
+    caller = ResilientCaller(max_attempts=4, base_delay=0.5, stats=stats, sleep=sleeps.append)
+    call = failing([FakeAPIError(429), FakeAPIError(503, {"retry-after": "3"})])
+
+    assert caller.call(call) == "ok"
+    assert call.calls == [1, 2, 3]
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= 0.5
+    assert sleeps[1] >= 3  # Retry-After is a floor for the backoff.
+    assert stats.counters == Counter(api_errors=2, api_retries=2)
+
+
+def test_non_retryable_errors_propagate_immediately():
+    sleeps = []
+    caller = ResilientCaller(max_attempts=4, sleep=sleeps.append)
+    call = failing([FakeAPIError(400)])
+
+    with pytest.raises(FakeAPIError):
+        caller.call(call)
+    assert call.calls == [1]
+    assert sleeps == []
+    assert caller.breaker.state == "closed"
+
+
+def test_retries_exhausted_keeps_the_last_error():
+    caller = ResilientCaller(max_attempts=3, sleep=lambda seconds: None)
+    last_error = FakeAPIError(500)
+    call = failing([FakeAPIError(429), FakeAPIError(502), last_error])
+
+    with pytest.raises(RetriesExhaustedError) as raised:
+        caller.call(call)
+    assert raised.value.attempts == 3
+    assert raised.value.last_error is last_error
+
+
+def test_breaker_opens_after_consecutive_failures_and_closes_on_success():
+    breaker = CircuitBreaker(failure_threshold=3, cooldown_seconds=0, max_trips=5)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed"
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.trips == 1
+
+    breaker.before_call()  # The cooldown has passed, so one trial call is let through.
+    assert breaker.state == "half_open"
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_breaker_gives_up_after_max_trips():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=0, max_trips=2)
+    caller = ResilientCaller(max_attempts=10, breaker=breaker, sleep=lambda seconds: None)
+
+    with pytest.raises(CircuitOpenError):
+        caller.call(failing([FakeAPIError(503)] * 10))
+    assert breaker.trips == 3
+
+    breaker.reset()
+    assert breaker.state == "closed"
+    assert caller.call(failing([])) == "ok"
+
+
+def test_rate_limited_requests_are_retried_end_to_end(fake_api):
+    server, session = fake_api(fail_first=3)
+    stats = grading.RunStats()
+    caller = ResilientCaller(stats=stats, sleep=lambda seconds: None)
+    jobs = [(row_idx, f"Answer {row_idx}") for row_idx in range(2, 12)]
+
+    results = list(grading.grade_answers_concurrently(jobs, RUBRIC_TEXT, PROMPT, max_workers=1, stats=stats,
+                                                      caller=caller, session=session))
+
+    assert [(row_idx, grade["Overall"]) for row_idx, grade in results] == [
+        (row_idx, answer_number(answer)) for row_idx, answer in jobs
+    ]
+    assert server.failed_count == 3
+    assert server.request_count == len(jobs) + 3
+    assert stats.counters["api_retries"] == 3
+    assert stats.failed_rows == []
+
+
+class RecordingRateLimiter(grading.RateLimiter):
+    """An uncapped RateLimiter that records the tokens charged for each request."""
+
+    def __init__(self):
+        super().__init__()
+        self.charged = []
+
+    def acquire(self, tokens=0):
+        self.charged.append(tokens)
+        super().acquire(tokens)
+
+
+def test_retried_requests_are_charged_to_the_rate_limiter(fake_api):
+    server, session = fake_api(fail_first=3)
+    rate_limiter = RecordingRateLimiter()
+    caller = ResilientCaller(sleep=lambda seconds: None)
+    jobs = [(row_idx, f"Answer {row_idx}") for row_idx in range(2, 7)]
+
+    results = list(grading.grade_answers_concurrently(jobs, RUBRIC_TEXT, PROMPT, max_workers=1,
+                                                      rate_limiter=rate_limiter, caller=caller, session=session))
+
+    assert all(grade is not None for _, grade in results)
+    assert len(rate_limiter.charged) == server.request_count == len(jobs) + 3
+    assert len(set(rate_limiter.charged[:4])) == 1  # The first row's attempts cost the same.
+
+
+def test_retried_batches_are_charged_for_every_answer(fake_api):
+    server, session = fake_api(fail_first=1)
+    rate_limiter = RecordingRateLimiter()
+    caller = ResilientCaller(sleep=lambda seconds: None)
+    jobs = [(row_idx, f"Answer {row_idx}") for row_idx in range(2, 6)]
+
+    results = list(grading.grade_answers_concurrently(jobs, RUBRIC_TEXT, PROMPT, max_workers=1, batch_size=4,
+                                                      rate_limiter=rate_limiter, caller=caller, session=session))
+
+    assert all(grade is not None for _, grade in results)
+    assert server.request_count == 2
+    first, retry = rate_limiter.charged
+    assert first == retry > 4 * grading.COMPLETION_TOKEN_ESTIMATE
+
+
+def test_dead_lettered_rows_are_regraded_last(fake_api):
+    _, session = fake_api(fail_first=2)
+    stats = grading.RunStats()
+    caller = ResilientCaller(max_attempts=1, stats=stats, sleep=lambda seconds: None)
+    jobs = [(row_idx, f"Answer {row_idx}") for row_idx in range(2, 8)]
+
+    results = list(grading.grade_answers_concurrently(jobs, RUBRIC_TEXT, PROMPT, max_workers=1, stats=stats,
+                                                      caller=caller, session=session))
+
+    assert [row_idx for row_idx, _ in results] == [4, 5, 6, 7, 2, 3]
+    assert all(grade["Overall"] == row_idx for row_idx, grade in results)
+    assert stats.counters["dead_lettered"] == 2
+    assert stats.failed_rows == []
+
+
+def test_rows_failing_the_re_pass_are_yielded_empty(fake_api):
+    _, session = fake_api(fail_every=1)
+    stats = grading.RunStats()
+    caller = ResilientCaller(max_attempts=1, stats=stats, sleep=lambda seconds: None)
+    jobs = [(row_idx, f"Answer {row_idx}") for row_idx in range(2, 5)]
+
+    results = list(grading.grade_answers_concurrently(jobs, RUBRIC_TEXT, PROMPT, max_workers=1, stats=stats,
+                                                      caller=caller, session=session))
+
+    assert results == [(2, None), (3, None), (4, None)]
+    assert sorted(stats.failed_rows) == [2, 3, 4]
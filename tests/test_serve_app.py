@@ -0,0 +1,137 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+import serve_app
+
+
+@pytest.fixture
+def app_server(tmp_path):
+    (tmp_path / "index.html").write_text("<html>" + "grading " * 500 + "</html>")
+    (tmp_path / "openai_key.txt").write_text("sk-secret")
+    servers = []
+
+    def start(**options):
+        server = serve_app.AppServer(("127.0.0.1", 0), str(tmp_path), quiet=True, **options)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def request(server, method, path, body=None, headers=None):
+    connection = http.client.HTTPConnection(*server.server_address[:2], timeout=5)
+    connection.request(method, path, body=body, headers=headers or {})
+    response = connection.getresponse()
+    return response, response.read()
+
+
+def post_result(server, payload):
+    response, body = request(server, "POST", serve_app.CALLBACK_PATH, json.dumps(payload),
+                             {"Content-Type": "application/json"})
+    return response.status, json.loads(body)
+
+
+def read_events(server, request_id, count, headers=None):
+    """Opens the event stream for request_id and returns the first count (event_id, payload) pairs."""
+    connection = http.client.HTTPConnection(*server.server_address[:2], timeout=5)
+    connection.request("GET", f"{serve_app.EVENTS_PATH}?requestId={request_id}", headers=headers or {})
+    response = connection.getresponse()
+    assert response.status == 200
+    events = []
+    event_id = None
+    while len(events) < count:
+        line = response.fp.readline().decode().rstrip("\n")
+        if line.startswith("id: "):
+            event_id = int(line[4:])
+        elif line.startswith("data: "):
+            events.append((event_id, json.loads(line[6:])["payload"]))
+    connection.close()
+    return events
+
+
+def test_results_reach_only_the_stream_for_their_request(app_server):
+    server = app_server()
+    received = {}
+    listeners = [threading.Thread(target=lambda rid=rid: received.setdefault(rid, read_events(server, rid, 1)))
+                 for rid in ("teacher-a", "teacher-b")]
+    for listener in listeners:
+        listener.start()
+    while server.events.subscriber_count < 2:
+        threading.Event().wait(0.01)
+
+    assert post_result(server, {"requestId": "teacher-a", "result": ["A's grades"]}) == (
+        200, {"received": True, "listeners": 1})
+    assert post_result(server, {"requestId": "teacher-b", "result": ["B's grades"]})[0] == 200
+    for listener in listeners:
+        listener.join(5)
+
+    assert [payload["result"] for _, payload in received["teacher-a"]] == [["A's grades"]]
+    assert [payload["result"] for _, payload in received["teacher-b"]] == [["B's grades"]]
+
+
+def test_results_without_request_id_are_rejected(app_server):
+    server = app_server()
+
+    status, body = post_result(server, {"result": ["someone's grades"]})
+
+    assert status == 400
+    assert body["received"] is False
+    assert request(server, "GET", serve_app.EVENTS_PATH)[0].status == 400
+
+
+def test_results_posted_before_the_stream_opens_are_replayed(app_server):
+    server = app_server()
+    post_result(server, {"requestId": "r1", "part": 1})
+    post_result(server, {"requestId": "other", "part": 99})
+    post_result(server, {"requestId": "r1", "part": 2})
+
+    events = read_events(server, "r1", 2)
+    assert [payload["part"] for _, payload in events] == [1, 2]
+
+    # A reconnecting stream only gets what came after its Last-Event-ID.
+    post_result(server, {"requestId": "r1", "part": 3})
+    resumed = read_events(server, "r1", 1, {"Last-Event-ID": str(events[-1][0])})
+    assert [payload["part"] for _, payload in resumed] == [3]
+
+
+def test_cors_is_off_unless_an_origin_is_configured(app_server):
+    response, _ = request(app_server(), "OPTIONS", serve_app.CALLBACK_PATH)
+    assert response.getheader("Access-Control-Allow-Origin") is None
+
+    response, _ = request(app_server(allow_origin="https://n8n.example.org"), "OPTIONS", serve_app.CALLBACK_PATH)
+    assert response.getheader("Access-Control-Allow-Origin") == "https://n8n.example.org"
+
+
+def test_only_front_end_files_are_served(app_server):
+    server = app_server()
+
+    response, body = request(server, "GET", "/", headers={"Accept-Encoding": "gzip"})
+    assert response.status == 200
+    assert response.getheader("Content-Encoding") == "gzip"
+    assert request(server, "GET", "/index.html", headers={"If-None-Match": response.getheader("ETag"),
+                                                          "Accept-Encoding": "gzip"})[0].status == 304
+    assert request(server, "GET", "/openai_key.txt")[0].status == 404
+    assert request(server, "GET", "/../../etc/passwd")[0].status == 404
+
+
+def test_binds_to_localhost_by_default(monkeypatch):
+    captured = {}
+
+    class StopServer(Exception):
+        pass
+
+    def fake_server(address, *args, **kwargs):
+        captured["address"] = address
+        raise StopServer
+
+    monkeypatch.setattr(serve_app, "AppServer", fake_server)
+    with pytest.raises(StopServer):
+        serve_app.main(["--port", "0"])
+    assert captured["address"] == ("127.0.0.1", 0)
@@ -0,0 +1,95 @@
+from collections import Counter
+from types import SimpleNamespace
+
+import gspread
+
+import grading
+from conftest import PROMPT_ROWS, RUBRIC_ROWS
+
+try:
+    from gspread.http_client import HTTPClient as _GspreadHTTPClient  # gspread 6
+except ImportError:
+    _GspreadHTTPClient = gspread.Client  # gspread 5
+
+SPREADSHEET_ID = "sheet-key-1"
+SHEETS = [
+    {"properties": {"sheetId": 0, "title": "sampel answers", "index": 0,
+                    "gridProperties": {"rowCount": 1000, "columnCount": 26}}},
+    {"properties": {"sheetId": 7, "title": "sample rubric", "index": 1,
+                    "gridProperties": {"rowCount": 100, "columnCount": 5}}},
+]
+
+
+class FakeHTTPClient(_GspreadHTTPClient):
+    """Answers the spreadsheet-metadata request for one spreadsheet and counts it."""
+
+    def __init__(self):
+        self.metadata_requests = 0
+
+    def _metadata(self):
+        self.metadata_requests += 1
+        return {"properties": {"title": "Sample Responses"}, "sheets": SHEETS}
+
+    def fetch_sheet_metadata(self, spreadsheet_id, params=None):  # gspread 6
+        return self._metadata()
+
+    def request(self, method, endpoint, params=None, **kwargs):  # gspread 5
+        return SimpleNamespace(json=self._metadata)
+
+
+def open_fake_spreadsheet():
+    client = FakeHTTPClient()
+    return client, gspread.Spreadsheet(client, {"id": SPREADSHEET_ID})
+
+
+def test_cached_worksheet_is_built_without_a_metadata_request(tmp_path):
+    cache_path = str(tmp_path / "sheet_metadata_cache.json")
+    client, spreadsheet = open_fake_spreadsheet()
+    cold_cache = grading.SheetMetadataCache(cache_path)
+    first = grading.open_worksheet(spreadsheet, "sampel answers", cold_cache)
+    cold_cache.save()
+    requests_after_first_run = client.metadata_requests
+
+    # The next run reads the saved properties instead of asking for the metadata again.
+    warm_cache = grading.SheetMetadataCache(cache_path)
+    second = grading.open_worksheet(spreadsheet, "sampel answers", warm_cache)
+    again = grading.open_worksheet(spreadsheet, "sampel answers", warm_cache)
+
+    assert client.metadata_requests == requests_after_first_run
+    for worksheet in (second, again):
+        assert isinstance(worksheet, gspread.Worksheet)
+        assert (worksheet.id, worksheet.title, worksheet.row_count) == (first.id, first.title, 1000)
+        assert SPREADSHEET_ID in worksheet.url
+
+
+def test_cached_spreadsheet_is_opened_by_key(tmp_path):
+    calls = Counter()
+
+    class Client:
+        def open(self, name):
+            calls["open"] += 1
+            return SimpleNamespace(id=SPREADSHEET_ID)
+
+        def open_by_key(self, key):
+            calls["open_by_key"] += 1
+            return SimpleNamespace(id=key)
+
+    cache = grading.SheetMetadataCache(str(tmp_path / "sheet_metadata_cache.json"))
+    grading.open_spreadsheet(Client(), "Sample Responses", cache)
+    reopened = grading.open_spreadsheet(Client(), "Sample Responses", cache)
+
+    assert reopened.id == SPREADSHEET_ID
+    assert calls == Counter(open=1, open_by_key=1)
+
+
+def test_snapshot_is_loaded_in_one_batch_get(make_spreadsheet):
+    spreadsheet = make_spreadsheet(["Answer 1", "Answer 2", "Answer 3"])
+
+    snapshot = grading.load_sheet_snapshot(spreadsheet, rubric_range="A1:C3", answer_rows_limit=2)
+
+    assert spreadsheet.total_api_calls() == 1
+    assert spreadsheet.api_calls == Counter(values_batch_get=1)
+    assert snapshot.custom_prompt == PROMPT_ROWS[1][0]
+    assert [list(row) for row in snapshot.rubric_rows] == RUBRIC_ROWS
+    assert snapshot.answer_headers == ("Name", "Answer")
+    assert [row[1] for row in snapshot.answer_rows] == ["Answer 1", "Answer 2"]
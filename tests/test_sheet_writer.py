@@ -0,0 +1,64 @@
+import time
+
+import grading
+from fake_sheets import InMemoryWorksheet
+from sheet_writer import SheetWriteBuffer, coalesce_cells
+
+
+def test_coalesce_cells_merges_adjacent_rows_and_columns():
+    cells = {(2, 3): "a", (2, 4): "b", (3, 3): "c", (3, 4): "d", (5, 3): "e"}
+
+    assert coalesce_cells(cells) == [
+        {"range": "C2:D3", "values": [["a", "b"], ["c", "d"]]},
+        {"range": "C5:C5", "values": [["e"]]},
+    ]
+
+
+def test_flush_every_rows(make_spreadsheet, fake_api, capsys):
+    _, session = fake_api()
+    spreadsheet = make_spreadsheet([f"Answer {n}" for n in range(1, 31)])
+    worksheet = spreadsheet.worksheet("sampel answers")
+
+    grading.process_student_answers(spreadsheet, flush_every=10, flush_interval=None, quiet=True, session=session)
+
+    assert "in 3 batch updates" in capsys.readouterr().out
+    assert worksheet.api_calls["batch_update"] == 1 + 3  # The new header cells, then three batches of ten rows.
+    assert worksheet.api_calls["update_cell"] == 0
+
+
+def test_flush_interval_writes_without_further_rows():
+    worksheet = InMemoryWorksheet("answers", [["Name", "Answer", "Grade"], ["Student 0", "Answer 1", ""]])
+    buffer = SheetWriteBuffer(worksheet, flush_every=None, flush_interval=0.05)
+
+    buffer.add(2, 3, "3")
+    deadline = time.monotonic() + 2
+    while buffer.pending_count and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert worksheet.api_calls["batch_update"] == 1
+    assert worksheet.cell_value(2, 3) == "3"
+    buffer.close()
+    assert worksheet.api_calls["batch_update"] == 1
+
+
+def test_failed_background_flush_keeps_the_writes():
+    worksheet = InMemoryWorksheet("answers", [["Name", "Answer", "Grade"]])
+    real_batch_update = worksheet.batch_update
+    failures = []
+
+    def flaky_batch_update(data, **kwargs):
+        if not failures:
+            failures.append(data)
+            raise OSError("sheet unavailable")
+        return real_batch_update(data, **kwargs)
+
+    worksheet.batch_update = flaky_batch_update
+    with SheetWriteBuffer(worksheet, flush_every=None, flush_interval=0.05) as buffer:
+        buffer.add(2, 3, "3")
+        deadline = time.monotonic() + 2
+        while buffer.flush_count == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    assert len(failures) == 1
+    assert buffer.flush_count == 1
+    assert worksheet.cell_value(2, 3) == "3"
@@ -0,0 +1,126 @@
+import sqlite3
+import time
+
+import pandas as pd
+import pytest
+
+from storage import PacingStorage
+
+NEVER = 3600.0  # A flush interval long enough that only explicit flushes write.
+
+
+def plan(*lesson_ids):
+    return pd.DataFrame({"order": range(1, len(lesson_ids) + 1), "lesson_id": list(lesson_ids),
+                         "duration_days": [1] * len(lesson_ids)})
+
+
+@pytest.fixture
+def storage_path(tmp_path):
+    return str(tmp_path / "pacing_hub.sqlite3")
+
+
+class FailingConnection:
+    """Wraps a sqlite3 connection so the next `failures` executemany calls raise."""
+
+    def __init__(self, conn, failures=1):
+        self.conn = conn
+        self.failures = failures
+
+    def executemany(self, *args):
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+        return self.conn.executemany(*args)
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+    def __enter__(self):
+        return self.conn.__enter__()
+
+    def __exit__(self, *exc):
+        return self.conn.__exit__(*exc)
+
+
+def test_repeated_saves_are_coalesced_into_one_write(storage_path):
+    storage = PacingStorage(storage_path, flush_interval=NEVER)
+    for n in range(1, 6):
+        storage.save_plan("sec_a", plan(*[f"L{i}" for i in range(n)]))
+    storage.save_plan("sec_b", plan("L9"))
+    assert storage.pending_count == 2
+
+    storage.flush()
+    storage.flush()  # Nothing pending: no second transaction.
+
+    assert (storage.flush_count, storage.frames_written) == (1, 2)
+    storage.close()
+    reopened = PacingStorage(storage_path, flush_interval=NEVER)
+    assert list(reopened.load_plan("sec_a")["lesson_id"]) == ["L0", "L1", "L2", "L3", "L4"]
+    reopened.close()
+
+
+def test_reads_see_pending_writes(storage_path):
+    storage = PacingStorage(storage_path, flush_interval=NEVER)
+    other = PacingStorage(storage_path, flush_interval=NEVER)
+    storage.save_plan("sec_a", plan("L1", "L2"))
+    version = storage.save_content(pd.DataFrame({"lesson_id": ["L1"], "title": ["Intro"]}))
+
+    assert list(storage.load_plan("sec_a")["lesson_id"]) == ["L1", "L2"]
+    assert storage.content()[0] == version
+    assert list(storage.content()[1]["title"]) == ["Intro"]
+    assert other.load_plan("sec_a") is None  # Not committed yet.
+
+    storage.flush()
+    assert list(other.load_plan("sec_a")["lesson_id"]) == ["L1", "L2"]
+    storage.close()
+    other.close()
+
+
+def test_failed_write_is_kept_and_newer_saves_win(storage_path):
+    storage = PacingStorage(storage_path, flush_interval=NEVER)
+    storage._conn = FailingConnection(storage._conn)
+    storage.save_plan("sec_a", plan("L1"))
+    storage.save_plan("sec_b", plan("L5"))
+
+    with pytest.raises(sqlite3.OperationalError):
+        storage.flush()
+    assert storage.pending_count == 2
+    storage.save_plan("sec_a", plan("L1", "L2"))  # Saved while the failed write was pending.
+    storage.flush()
+
+    assert storage.pending_count == 0
+    assert (storage.flush_count, storage.frames_written) == (1, 2)
+    storage.close()
+    reopened = PacingStorage(storage_path, flush_interval=NEVER)
+    assert list(reopened.load_plan("sec_a")["lesson_id"]) == ["L1", "L2"]
+    assert list(reopened.load_plan("sec_b")["lesson_id"]) == ["L5"]
+    reopened.close()
+
+
+def test_writer_thread_flushes_and_retries_after_a_failure(storage_path):
+    storage = PacingStorage(storage_path, flush_interval=0.05)
+    storage._conn = FailingConnection(storage._conn)
+    storage.save_plan("sec_a", plan("L1"))
+
+    deadline = time.monotonic() + 5
+    while storage.flush_count == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert storage.flush_count == 1
+    assert storage._conn.failures == 0
+    storage.close()
+
+
+def test_close_flushes_pending_writes(storage_path):
+    storage = PacingStorage(storage_path, flush_interval=NEVER)
+    storage.save_plan("sec_a", plan("L1"))
+    storage.save_content(pd.DataFrame({"lesson_id": ["L1"], "title": ["Intro"]}))
+
+    storage.close()
+    storage.close()  # Idempotent, e.g. when atexit runs it again.
+
+    reopened = PacingStorage(storage_path, flush_interval=NEVER)
+    assert list(reopened.load_plan("sec_a")["lesson_id"]) == ["L1"]
+    version, content = reopened.content()
+    assert (version, list(content["title"])) == (1, ["Intro"])
+    reopened.close()
@@ -0,0 +1,156 @@
+"""
+Runs the app's session-state and rendering functions in Streamlit's bare mode (no
+server): st.session_state is a plain in-process store and widgets return their defaults.
+"""
+
+import re
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+import streamlit as st
+
+import streamlit_app as app
+
+SECTION = {"id": "sec_phy", "name": "Physics", "year": 2025}
+THIS_WEEK = date.today() - timedelta(days=date.today().weekday())
+
+
+@pytest.fixture
+def session(tmp_path, monkeypatch):
+    """A fresh session with the sample content and SECTION opened, storing into tmp_path."""
+    monkeypatch.setenv("PACING_STORAGE_PATH", str(tmp_path / "pacing_hub.sqlite3"))
+    monkeypatch.delenv("PACING_DATA_SOURCE", raising=False)
+    app.get_storage.clear()
+    st.session_state.clear()
+    app.initialize_session_state()
+    app.initialize_section_data(SECTION)
+    yield st.session_state
+    app.get_storage().close()
+    app.get_storage.clear()
+    st.session_state.clear()
+
+
+@pytest.fixture
+def rendered(monkeypatch):
+    """Collects the HTML each view passes to st.markdown."""
+    html = []
+    monkeypatch.setattr(st, "markdown", lambda body, **kwargs: html.append(body))
+    return html
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    """Counts how often each renderer actually runs (i.e. cache misses)."""
+    calls = {"calendar": 0, "student": 0}
+
+    def counting(name, render):
+        def wrapper(*args, **kwargs):
+            calls[name] += 1
+            return render(*args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(app, "render_calendar", counting("calendar", app.render_calendar))
+    monkeypatch.setattr(app, "render_student_week", counting("student", app.render_student_week))
+    return calls
+
+
+def titles(html):
+    return re.findall(r'<div class="cal-title">(.*?)</div>', html)
+
+
+def test_week_view_is_rebuilt_only_when_the_pacing_changes(session, rendered, builds):
+    app.week_view(SECTION["id"])
+    app.week_view(SECTION["id"])
+    assert builds["calendar"] == 1
+    assert rendered[0] == rendered[1]
+    assert titles(rendered[0]) == ["Intro to Motion", "Velocity &amp; Speed"]
+
+    app.set_lesson_duration(SECTION["id"], "L001", 2)
+    app.week_view(SECTION["id"])
+
+    assert builds["calendar"] == 2
+    assert titles(rendered[2]) == ["Intro to Motion", "Intro to Motion", "Velocity &amp; Speed"]
+
+
+def test_month_view_is_rebuilt_when_the_schedule_changes(session, rendered, builds):
+    app.month_view(SECTION["id"])
+    app.month_view(SECTION["id"])
+    assert builds["calendar"] == 1
+
+    schedule = session.schedule_by_section[SECTION["id"]].copy()
+    schedule.loc[schedule["date"] == THIS_WEEK, "block_id"] = None  # No class on Monday.
+    app.set_section_schedule(SECTION["id"], schedule)
+    app.ensure_pacing(SECTION["id"])
+    app.month_view(SECTION["id"])
+
+    assert builds["calendar"] == 2
+    assert rendered[2] != rendered[0]
+
+
+def test_student_view_is_rebuilt_when_the_content_changes(session, rendered, builds):
+    session.section = SECTION
+    app.student_view()
+    app.student_view()
+    assert builds["student"] == 1
+
+    content = session.content_df.copy()
+    content.loc[content["lesson_id"] == "L001", "slides_url"] = "https://slides.com/motion-v2"
+    app.set_content(content)
+    app.student_view()
+
+    assert builds["student"] == 2
+    assert "https://slides.com/motion-v2" in rendered[2]
+    assert "https://slides.com/intro-motion" not in rendered[2]
+
+
+def test_calendar_cache_keeps_only_the_most_recent_entries(session, monkeypatch):
+    monkeypatch.setattr(app, "CALENDAR_CACHE_SIZE", 3)
+    for n in range(5):
+        app.cached_html(("week", "sec", n), 1, lambda: f"html {n}")
+    app.cached_html(("week", "sec", 2), 1, lambda: "rebuilt")  # A hit moves the entry to the end.
+    app.cached_html(("week", "sec", 5), 1, lambda: "html 5")
+
+    assert list(session.calendar_html_cache) == [("week", "sec", 4), ("week", "sec", 2), ("week", "sec", 5)]
+    assert session.calendar_html_cache[("week", "sec", 2)] == (1, "html 2")
+
+
+HOSTILE = {"title": '<img src=x onerror="alert(1)">', "type": "Lab & <b>Quiz</b>"}
+
+
+def lesson(**fields):
+    return dict({"lesson_id": "L1", "day_index": 1, "duration_days": 1}, **HOSTILE, **fields)
+
+
+def test_calendar_escapes_teacher_supplied_text():
+    html = app.render_calendar([[THIS_WEEK]], {THIS_WEEK: [lesson()]})
+
+    assert "<img" not in html and "<b>" not in html
+    assert "&lt;img src=x onerror=&quot;alert(1)&quot;&gt;" in html
+    assert "Lab &amp; &lt;b&gt;Quiz&lt;/b&gt;" in html
+
+
+def test_student_week_escapes_text_and_links():
+    content_lookup = {"L1": {
+        "slides_url": 'https://slides.com/a"><script>alert(1)</script>',
+        "homework_url": "javascript:alert(1)",
+        "video_url": "  https://youtu.be/abc  ",
+    }}
+
+    html = app.render_student_week({THIS_WEEK: [lesson()]}, content_lookup)
+
+    assert "<img" not in html and "<b>" not in html and "<script>" not in html
+    assert "&lt;img src=x onerror=&quot;alert(1)&quot;&gt;" in html
+    assert 'href="https://slides.com/a&quot;&gt;&lt;script&gt;alert(1)&lt;/script&gt;"' in html
+    assert "javascript:" not in html and "Homework" not in html
+    assert 'href="https://youtu.be/abc"' in html
+
+
+def test_sync_sections_labels_bulk_pass_times_as_averages(session):
+    sections = app.get_data_source().fetch_sections("t_1001")
+
+    table, bulk_seconds = app.sync_sections(sections)
+
+    assert list(table.columns) == ["section", "lessons added", "pacing days", "avg ms (bulk pass)"]
+    assert list(table["section"]) == [section["name"] for section in sections]
+    assert bulk_seconds * 1000 == pytest.approx(table["avg ms (bulk pass)"].sum(), abs=0.1 * len(sections))